@@ -0,0 +1,58 @@
+"""
+Joke file builder - run on a computer, not on the ESP32-C3
+
+Converts the JOKES list in jokes.py into the compact, pre-wrapped jokes.bin
+format read by jokestore.py. Copy the resulting file to the board next to
+main.py.
+
+Usage:
+    python build_jokes.py [output.bin]
+"""
+
+import struct
+import sys
+
+from jokes import JOKES
+from jokestore import HEADER_SIZE, INDEX_ENTRY_SIZE, MAGIC, VERSION, split_lines
+
+
+def encode_side(text):
+    """Encode one side of a joke as a line count plus length-prefixed lines"""
+    lines = split_lines(text)
+    if len(lines) > 255:
+        raise ValueError(f"Too many lines ({len(lines)}): {text!r}")
+    record = bytearray([len(lines)])
+    for line in lines:
+        data = line.encode("utf-8")
+        if len(data) > 255:
+            raise ValueError(f"Line too long ({len(data)} bytes): {line!r}")
+        record.append(len(data))
+        record += data
+    return record
+
+
+def build(jokes):
+    """Return the complete joke file contents for a list of (question, answer)"""
+    if len(jokes) > 0xFFFF:
+        raise ValueError(f"Too many jokes ({len(jokes)}), the limit is 65535")
+    header = MAGIC + struct.pack("<BBH", VERSION, 0, len(jokes))
+    offset = HEADER_SIZE + len(jokes) * INDEX_ENTRY_SIZE
+    index = bytearray()
+    records = bytearray()
+    for question, answer in jokes:
+        index += struct.pack("<I", offset + len(records))
+        records += encode_side(question)
+        records += encode_side(answer)
+    return header + index + records
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else "jokes.bin"
+    data = build(JOKES)
+    with open(path, "wb") as f:
+        f.write(data)
+    print(f"Wrote {len(JOKES)} jokes ({len(data)} bytes) to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,1111 @@
+"""
+Joke machine checks - run on a computer, not on the ESP32-C3
+
+Runs ssd1306.py and main.py against fake micropython, framebuf, machine,
+time and asyncio modules. The fake I2C bus records every transaction and
+charges it a simulated transfer time on a virtual clock, and the fake SPI
+bus counts transfers, bytes and re-initialisations, so bus traffic and
+timing can be checked without a board. Prints one line per check and exits with
+status 1 if any check fails.
+
+Usage:
+    python check.py [check ...]
+"""
+
+import contextlib
+import heapq
+import io
+import os
+import sys
+import tempfile
+import tracemalloc
+import types
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# SPI: chip select, D/C and call overhead of each transfer, at 160 MHz
+SPI_TRANSFER_US = 4
+
+# Leaving light sleep and one pass of the power-save loop
+WAKE_US = 500
+
+# Simulated SoftI2C speed: about 360 kHz, 9 clocks per byte, plus start,
+# address and stop for each transaction
+BYTE_US = 25
+TRANSACTION_US = 50
+
+
+class Stop(Exception):
+    """Raised by the fake clock when the simulated time is up"""
+
+
+class Simulation:
+    """Virtual clock, button presses and bus of one run"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.us = 0
+        self.end_us = None
+        self.presses = []  # (down us, up us), sorted
+        self.polls = []  # times the button was read
+        self.irq = None  # (handler, pin) of the button interrupt
+        self.wakeups = 0  # times the CPU woke from a sleep
+        self.gpio_wake = True  # False: Pin.irq(wake=...) raises ValueError
+        self.wake_on_button = False
+        self.naps = []  # (start us, end us) of each lightsleep()
+        self.i2c = None
+
+    def sleep(self, us):
+        """Idle the CPU for us"""
+        if us > 0:
+            self.wakeups += 1
+            self.advance(us)
+
+    def advance(self, us):
+        self.us += us
+        if self.end_us is not None and self.us >= self.end_us:
+            self.us = self.end_us
+            raise Stop
+
+    def button(self):
+        """Button level now: 0 while pressed (pull-up)"""
+        for down, up in self.presses:
+            if down <= self.us < up:
+                return 0
+            if down > self.us:
+                break
+        return 1
+
+
+SIM = Simulation()
+
+
+# Fake time -------------------------------------------------------------------
+
+def ticks_us():
+    return SIM.us
+
+
+def ticks_ms():
+    return SIM.us // 1000
+
+
+def ticks_diff(a, b):
+    return a - b
+
+
+def ticks_add(a, b):
+    return a + b
+
+
+def sleep(seconds):
+    SIM.sleep(round(seconds * 1000000))
+
+
+def sleep_ms(ms):
+    SIM.sleep(ms * 1000)
+
+
+def sleep_us(us):
+    SIM.sleep(us)
+
+
+# Fake framebuf ---------------------------------------------------------------
+
+MONO_VLSB = 0
+
+
+def glyph(char):
+    """8 column bytes of a made-up 8x8 font (the real font is built in)"""
+    if char == " ":
+        return bytes(8)
+    n = ord(char)
+    return bytes(((n * 7 + k * 29) % 127) | 0x41 for k in range(7)) + b"\x00"
+
+
+class FrameBuffer:
+    """The parts of framebuf.FrameBuffer used here, MONO_VLSB only"""
+
+    def __init__(self, buffer, width, height, format):
+        self._fb = buffer
+        self._fb_width = width
+        self._fb_height = height
+
+    def pixel(self, x, y, c=None):
+        if not (0 <= x < self._fb_width and 0 <= y < self._fb_height):
+            return None
+        i = (y >> 3) * self._fb_width + x
+        bit = 1 << (y & 7)
+        if c is None:
+            return 1 if self._fb[i] & bit else 0
+        if c:
+            self._fb[i] |= bit
+        else:
+            self._fb[i] &= ~bit
+        return None
+
+    def fill(self, c):
+        value = 0xFF if c else 0
+        for i in range(len(self._fb)):
+            self._fb[i] = value
+
+    def fill_rect(self, x, y, w, h, c):
+        for yy in range(y, y + h):
+            for xx in range(x, x + w):
+                self.pixel(xx, yy, c)
+
+    def text(self, s, x, y, c=1):
+        for i, char in enumerate(s):
+            for k, column in enumerate(glyph(char)):
+                for row in range(8):
+                    if column >> row & 1:
+                        self.pixel(x + i * 8 + k, y + row, c)
+
+
+# Fake machine ----------------------------------------------------------------
+
+class Pin:
+    IN = 1
+    OUT = 3
+    PULL_UP = 2
+    IRQ_FALLING = 2
+    WAKE_LOW = 4
+
+    def __init__(self, id, mode=None, pull=None):
+        self.id = id
+
+    def value(self):
+        SIM.polls.append(SIM.us)
+        return SIM.button()
+
+    def irq(self, trigger=None, handler=None, wake=None):
+        if wake is not None:
+            if not SIM.gpio_wake:
+                raise ValueError("wake not supported")
+            SIM.wake_on_button = True
+        if handler is not None and trigger == Pin.IRQ_FALLING:
+            SIM.irq = (handler, self)
+
+
+class Bus:
+    """Fake I2C bus: records (time us, payload) and charges transfer time"""
+
+    def __init__(self):
+        self.transactions = []
+
+    def clear(self):
+        self.transactions = []
+
+    def writeto(self, addr, buf):
+        self.record(bytes(buf))
+
+    def writevto(self, addr, vector):
+        self.record(b"".join(bytes(part) for part in vector))
+
+    def record(self, payload):
+        self.transactions.append((SIM.us, payload))
+        SIM.advance(TRANSACTION_US + (len(payload) + 1) * BYTE_US)
+
+    def commands(self):
+        """Command byte strings sent, one per transaction"""
+        return [p[1:] for _, p in self.transactions if not p[0] & 0x40]
+
+    def data_bytes(self):
+        return sum(len(p) - 1 for _, p in self.transactions if p[0] & 0x40)
+
+    def one_per_command(self):
+        """Transactions the same traffic took with one per command byte"""
+        return sum(len(p) - 1 if not p[0] & 0x40 else 1 for _, p in self.transactions)
+
+
+class SPI:
+    """Fake SPI bus: counts inits, transfers and bytes, and keeps what was sent"""
+
+    def __init__(self):
+        self.inits = 0
+        self.transfers = 0
+        self.bytes = 0
+        self.sent = []  # buffer objects passed to write()
+
+    def init(self, baudrate=None, polarity=0, phase=0):
+        self.inits += 1
+        self.baudrate = baudrate
+
+    def write(self, buf):
+        self.transfers += 1
+        self.bytes += len(buf)
+        self.sent.append(buf)
+
+    def us(self):
+        """Time the transfers take at the configured baudrate"""
+        return self.bytes * 8 * 1000000 / self.baudrate + self.transfers * SPI_TRANSFER_US
+
+
+class OutPin:
+    """dc, res and cs of the SPI display; counts chip-select windows"""
+
+    OUT = 3
+
+    def __init__(self):
+        self.level = None
+        self.selects = 0
+
+    def init(self, mode, value=None):
+        self.level = value
+
+    def __call__(self, value):
+        if self.level and not value:
+            self.selects += 1
+        self.level = value
+
+
+class Controller:
+    """The SSD1306's display RAM, rebuilt from the I2C transactions sent to it
+
+    Follows the column and page address windows (horizontal addressing)
+    and the display start line, so what the panel shows can be compared
+    with what the program meant to show.
+    """
+
+    # Commands followed by one argument byte; 0x21 and 0x22 take two
+    ONE_ARG = (0x20, 0x81, 0x8D, 0xA8, 0xD3, 0xD5, 0xD9, 0xDA, 0xDB)
+
+    def __init__(self, width=128, height=64):
+        self.width = width
+        self.pages = height // 8
+        self.ram = bytearray(width * self.pages)
+        self.start_line = 0
+        self.columns = (0, width - 1)
+        self.page_range = (0, self.pages - 1)
+        self.col = 0
+        self.page = 0
+        self.seen = 0  # transactions already applied
+
+    def update(self, bus):
+        """Apply the transactions recorded on bus since the last update"""
+        for _, payload in bus.transactions[self.seen :]:
+            if payload[0] & 0x40:
+                self.data(payload[1:])
+            else:
+                self.commands(payload[1:])
+        self.seen = len(bus.transactions)
+
+    def commands(self, cmds):
+        i = 0
+        while i < len(cmds):
+            cmd = cmds[i]
+            if cmd in (0x21, 0x22):
+                first, last = cmds[i + 1], cmds[i + 2]
+                if cmd == 0x21:
+                    self.columns = (first, last)
+                    self.col = first
+                else:
+                    self.page_range = (first, last)
+                    self.page = first
+                i += 3
+                continue
+            if 0x40 <= cmd < 0x80:
+                self.start_line = cmd & 0x3F
+            i += 2 if cmd in self.ONE_ARG else 1
+
+    def data(self, data):
+        for byte in data:
+            self.ram[self.page * self.width + self.col] = byte
+            if self.col < self.columns[1]:
+                self.col += 1
+                continue
+            self.col = self.columns[0]
+            self.page = self.page + 1 if self.page < self.page_range[1] else self.page_range[0]
+
+    def shown(self):
+        """The panel's pixel rows, top first"""
+        return rows(self.ram, self.width, self.start_line)
+
+
+def rows(buf, width, start_line=0):
+    """Pixel rows of a MONO_VLSB buffer shown from start_line, as bytes each"""
+    height = len(buf) // width * 8
+    result = []
+    for r in range(height):
+        y = (r + start_line) % height
+        base = (y >> 3) * width
+        bit = 1 << (y & 7)
+        result.append(bytes(1 if buf[base + x] & bit else 0 for x in range(width)))
+    return result
+
+
+def SoftI2C(scl=None, sda=None, freq=400000):
+    SIM.i2c = Bus()
+    return SIM.i2c
+
+
+SLEEP = 2
+
+
+def lightsleep(ms=None):
+    """Sleep for ms, or until the button is pressed if it can wake the CPU"""
+    until = SIM.end_us if ms is None else SIM.us + ms * 1000
+    if SIM.wake_on_button:
+        for down, _ in SIM.presses:
+            if down > SIM.us:
+                until = min(until, down)
+                break
+    start = SIM.us
+    try:
+        SIM.sleep(until - SIM.us)
+    finally:
+        SIM.naps.append((start, SIM.us))
+    SIM.advance(WAKE_US)
+
+
+# Virtual-time asyncio ----------------------------------------------------------
+
+class Request:
+    """Yielded by a task to the loop: ("sleep", wake us) or ("event", Event)"""
+
+    def __init__(self, kind, arg):
+        self.kind = kind
+        self.arg = arg
+
+    def __await__(self):
+        yield self
+
+
+class Event:
+    def __init__(self):
+        self.flag = False
+        self.waiters = []
+
+    def set(self):
+        self.flag = True
+        LOOP.ready.extend(self.waiters)
+        self.waiters = []
+
+    def clear(self):
+        self.flag = False
+
+    def is_set(self):
+        return self.flag
+
+    async def wait(self):
+        if not self.flag:
+            await Request("event", self)
+
+
+class ThreadSafeFlag:
+    """An Event that clears itself when a waiter wakes"""
+
+    def __init__(self):
+        self.event = Event()
+
+    def set(self):
+        self.event.set()
+
+    async def wait(self):
+        await self.event.wait()
+        self.event.clear()
+
+
+class Task:
+    def __init__(self, coro):
+        self.coro = coro
+        self.done = Event()
+        self.result = None
+
+
+class Loop:
+    """Runs tasks in order; when all wait, idles until the next sleeper or press
+
+    A press raises the button interrupt at its start, or at the next switch
+    between tasks if the CPU is busy then.
+    """
+
+    def __init__(self):
+        self.ready = []
+        self.sleeping = []  # heap of (wake us, sequence, task)
+        self.sequence = 0
+        self.pressed = 0  # presses whose interrupt has been raised
+
+    def spawn(self, coro):
+        task = Task(coro)
+        self.ready.append(task)
+        return task
+
+    def step(self, task):
+        try:
+            request = task.coro.send(None)
+        except StopIteration as e:
+            task.result = e.value
+            task.done.set()
+            return
+        if request.kind == "sleep":
+            heapq.heappush(self.sleeping, (request.arg, self.sequence, task))
+            self.sequence += 1
+        else:
+            request.arg.waiters.append(task)
+
+    def interrupts(self):
+        while self.pressed < len(SIM.presses) and SIM.presses[self.pressed][0] <= SIM.us:
+            self.pressed += 1
+            if SIM.irq is not None:
+                handler, pin = SIM.irq
+                handler(pin)
+
+    def run(self, coro):
+        main = self.spawn(coro)
+        while not main.done.flag:
+            self.interrupts()
+            while self.ready:
+                self.step(self.ready.pop(0))
+                self.interrupts()
+            if main.done.flag:
+                break
+            wake = [self.sleeping[0][0]] if self.sleeping else []
+            if self.pressed < len(SIM.presses):
+                wake.append(SIM.presses[self.pressed][0])
+            if not wake:
+                if SIM.end_us is None:
+                    raise RuntimeError("All tasks are waiting, nothing can wake them")
+                wake.append(SIM.end_us)  # idle until the time is up
+            SIM.sleep(min(wake) - SIM.us)
+            while self.sleeping and self.sleeping[0][0] <= SIM.us:
+                self.ready.append(heapq.heappop(self.sleeping)[2])
+        return main.result
+
+
+LOOP = Loop()
+
+
+async def async_sleep_ms(ms):
+    await Request("sleep", SIM.us + max(0, ms) * 1000)
+
+
+async def async_sleep(seconds):
+    await Request("sleep", SIM.us + max(0, round(seconds * 1000000)))
+
+
+async def gather(*coros):
+    tasks = [coro if isinstance(coro, Task) else LOOP.spawn(coro) for coro in coros]
+    for task in tasks:
+        await task.done.wait()
+    return [task.result for task in tasks]
+
+
+def create_task(coro):
+    return LOOP.spawn(coro)
+
+
+def run_async(coro):
+    global LOOP
+    LOOP = Loop()
+    return LOOP.run(coro)
+
+
+# Loading the program -----------------------------------------------------------
+
+def fake_modules():
+    micropython = types.ModuleType("micropython")
+    micropython.const = lambda value: value
+    framebuf = types.ModuleType("framebuf")
+    framebuf.FrameBuffer = FrameBuffer
+    framebuf.MONO_VLSB = MONO_VLSB
+    machine = types.ModuleType("machine")
+    machine.Pin = Pin
+    machine.SoftI2C = SoftI2C
+    machine.SLEEP = SLEEP
+    machine.lightsleep = lightsleep
+    fake_time = types.ModuleType("time")
+    fake_time.ticks_us = ticks_us
+    fake_time.ticks_ms = ticks_ms
+    fake_time.ticks_diff = ticks_diff
+    fake_time.ticks_add = ticks_add
+    fake_time.sleep = sleep
+    fake_time.sleep_ms = sleep_ms
+    fake_time.sleep_us = sleep_us
+    fake_asyncio = types.ModuleType("asyncio")
+    fake_asyncio.Event = Event
+    fake_asyncio.ThreadSafeFlag = ThreadSafeFlag
+    fake_asyncio.sleep = async_sleep
+    fake_asyncio.sleep_ms = async_sleep_ms
+    fake_asyncio.gather = gather
+    fake_asyncio.create_task = create_task
+    fake_asyncio.run = run_async
+    return {
+        "micropython": micropython,
+        "framebuf": framebuf,
+        "machine": machine,
+        "time": fake_time,
+        "asyncio": fake_asyncio,
+    }
+
+
+@contextlib.contextmanager
+def faked():
+    """The fakes in place of the real modules, for imports made inside"""
+    modules = fake_modules()
+    saved = {name: sys.modules.get(name) for name in modules}
+    sys.modules.update(modules)
+    try:
+        yield
+    finally:
+        for name, module in saved.items():
+            if module is None:
+                sys.modules.pop(name, None)
+            else:
+                sys.modules[name] = module
+
+
+def load_program():
+    """Import main.py and ssd1306.py with the fakes in place of their imports
+
+    The real time module is put back afterwards for the rest of Python; the
+    program modules keep the fake one they imported.
+    """
+    sys.path.insert(0, HERE)
+    with faked():
+        import main
+        import perf
+        import ssd1306
+    return main, perf, ssd1306
+
+
+program, perf, ssd1306 = load_program()
+import build_jokes  # noqa: E402
+import jokes  # noqa: E402
+import jokestore  # noqa: E402
+
+# Settings at the top of main.py, restored before every run
+DEFAULTS = {name: value for name, value in vars(program).items() if name.isupper()}
+
+
+def new_machine(**settings):
+    """A JokeMachine on a fresh fake board, with main.py settings overridden"""
+    SIM.reset()
+    vars(program).update(DEFAULTS)
+    vars(program).update(settings)
+    with contextlib.redirect_stdout(io.StringIO()):
+        return program.JokeMachine()
+
+
+def flush(machine):
+    while machine.flush_display():
+        pass
+
+
+def run(machine, seconds):
+    """Run the machine's main loop until the simulated time is up; returns
+    what it printed"""
+    SIM.end_us = SIM.us + seconds * 1000000
+    console = io.StringIO()
+    with contextlib.redirect_stdout(console):
+        try:
+            machine.run()
+        except Stop:
+            pass
+    return console.getvalue()
+
+
+# A joke too tall for the screen, so it scrolls
+LONG_JOKE = (
+    "Why did the scarecrow keep telling the same long story over and over "
+    "again to every crow that landed on the fence all afternoon?",
+    "He was outstanding in his field!",
+)
+
+
+# Checks ------------------------------------------------------------------------
+
+def check_bus():
+    """Command sequences go out in one I2C transaction each"""
+    SIM.reset()
+    bus = Bus()
+    display = ssd1306.SSD1306_I2C(128, 64, bus, partial=True)
+    init_commands = bus.commands()[0]
+    results = [("init_display + first frame", bus)]
+    if len(init_commands) != 25:
+        return f"init_display sent {len(init_commands)} command bytes in its first transaction"
+
+    frame = Bus()
+    display.i2c = frame
+    display.fill(1)
+    display.show(full=True)
+    results.append(("full frame", frame))
+    if len(frame.transactions) != 2:
+        return f"a full frame took {len(frame.transactions)} transactions, expected 2"
+
+    machine = new_machine()
+    machine.show_question()
+    flush(machine)
+    answer = SIM.i2c
+    answer.clear()
+    machine.show_answer()
+    machine.display.show()  # in one go, not in FLUSH_CHUNK_BYTES chunks
+    results.append(("question -> answer (partial)", answer))
+    windows = answer.commands()
+    if any(len(cmds) != 6 for cmds in windows):
+        return "a partial refresh window was not sent as one 6-byte command transaction"
+    if len(answer.transactions) != 2 * len(windows):
+        return f"{len(answer.transactions)} transactions for {len(windows)} windows"
+
+    for name, recorded in results:
+        print(
+            f"    {name:<30} {len(recorded.transactions):3d} transactions "
+            f"(one per command: {recorded.one_per_command()})"
+        )
+    return None
+
+
+def new_spi_display(baudrate, shared_bus=False):
+    spi = SPI()
+    cs = OutPin()
+    with faked():  # the driver imports time when it resets the display
+        display = ssd1306.SSD1306_SPI(
+            128, 64, spi, OutPin(), OutPin(), cs,
+            partial=True, baudrate=baudrate, shared_bus=shared_bus,
+        )
+    return display, spi, cs
+
+
+def spi_frames(display, spi, frames=50):
+    """Flush frames of changing text in 128-byte steps; (frames, copies, views)
+
+    copies are buffers sent that are not the framebuffer or one of the
+    driver's preallocated command buffers, views the temporary memoryviews
+    of partial page spans.
+    """
+    own = {id(display.buffer), id(display.window_cmds), id(display.pair_cmds), id(display.cmd_buf)}
+    own.update(id(view) for view in display.page_views)
+    sent = len(spi.sent)
+    for n in range(frames):
+        display.fill_rect(0, 16, 128, 16, 0)
+        display.text(f"frame {n}", 0, 16 + n % 8)
+        display.show_begin()
+        while display.show_step(128):
+            pass
+    views = copies = 0
+    for buf in spi.sent[sent:]:
+        if id(buf) in own:
+            continue
+        if isinstance(buf, memoryview) and buf.obj is display.buffer:
+            views += 1
+        else:
+            copies += 1
+    return frames, copies, views
+
+
+def alloc_peak(fn, times=100):
+    """Peak bytes allocated while calling fn() times times, over an empty call"""
+    def calls(f):
+        f()
+        tracemalloc.start()
+        for _ in range(times):
+            f()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return peak
+
+    return calls(fn) - calls(lambda: None)
+
+
+def check_spi():
+    """SPI transfers: one per window, no re-init or buffer copies per frame"""
+    display, spi, cs = new_spi_display(40000000)
+    if spi.inits != 1:
+        return f"spi.init() called {spi.inits} times while setting up the display"
+    if cs.selects != spi.transfers:
+        return f"{cs.selects} chip selects for {spi.transfers} transfers"
+    if len(spi.sent) != 3:
+        return f"init_display + first frame took {len(spi.sent)} transfers, expected 3"
+    inits, transfers = spi.inits, spi.transfers
+    frames, copies, views = spi_frames(display, spi)
+    if spi.inits != inits:
+        return f"spi.init() called {spi.inits - inits} times in {frames} frames"
+    if copies:
+        return f"{copies} buffer copies sent in {frames} frames"
+    print(
+        f"    {frames} partial frames: {spi.transfers - transfers} transfers, "
+        f"{copies} buffer copies, {views} page-span views, no re-init"
+    )
+
+    # find_dirty compares preallocated page views; slicing each page of the
+    # framebuffer and the shadow would allocate two page copies per page
+    def slicing():
+        for page in range(display.pages):
+            start = page * display.width
+            end = start + display.width
+            if display.buffer[start:end] != display.shadow[start:end]:
+                break
+
+    peak = alloc_peak(display.find_dirty)
+    if peak >= display.width:
+        return f"find_dirty allocated up to {peak} bytes, a page copy or more"
+    print(
+        f"    find_dirty x100: peak {peak} bytes allocated "
+        f"(comparing page slices: {alloc_peak(slicing)})"
+    )
+
+    shared, spi, _ = new_spi_display(40000000, shared_bus=True)
+    spi_frames(shared, spi, frames=1)
+    if spi.inits != spi.transfers + 1:
+        return f"shared bus: {spi.inits} inits for {spi.transfers} transfers"
+
+    for baudrate in (10 * 1024 * 1024, 40000000):
+        display, spi, _ = new_spi_display(baudrate)
+        spi.transfers = spi.bytes = 0
+        display.fill(1)
+        display.show(full=True)
+        print(
+            f"    full frame at {baudrate / 1000000:4.1f} MHz: {spi.us():6.0f} us "
+            f"({1000000 / spi.us():4.0f} frames/s)"
+        )
+    return None
+
+
+def poll_gaps(**settings):
+    """Longest gap between button reads, and the longest flush step
+
+    Runs the polling loop for a minute of auto-cycling, presses and a
+    scrolling joke. Returns (longest gap us, longest step us, most data
+    bytes in one step, scroll steps).
+    """
+    machine = new_machine(AUTO_DISPLAY_TIME=1, SCROLL_HOLD_MS=200, SCROLL_STEP_MS=100, **settings)
+    machine.jokes = jokestore.JokeList([LONG_JOKE] + list(jokes.JOKES[:5]))
+    SIM.presses = [(t * 1000, t * 1000 + 80000) for t in range(700, 60000, 1300)]
+    steps = []
+
+    def flush_display(step=machine.flush_display):
+        start, sent = SIM.us, SIM.i2c.data_bytes()
+        pending = step()
+        steps.append((SIM.us - start, SIM.i2c.data_bytes() - sent))
+        return pending
+
+    machine.flush_display = flush_display
+    run(machine, 60)
+    scrolls = sum(1 for cmds in SIM.i2c.commands() if len(cmds) == 1 and 0x40 < cmds[0] < 0x80)
+    gaps = [b - a for a, b in zip(SIM.polls, SIM.polls[1:])]
+    return max(gaps), max(us for us, _ in steps), max(sent for _, sent in steps), scrolls
+
+
+def check_latency():
+    """A press is read within one flush chunk of the 10ms poll"""
+    chunk = DEFAULTS["FLUSH_CHUNK_BYTES"]
+    for full in (False, True):
+        gap, step, sent, scrolls = poll_gaps(PARTIAL_REFRESH=not full)
+        if not scrolls:
+            return "the long joke never scrolled"
+        if sent > chunk:
+            return f"a flush step sent {sent} data bytes, more than one {chunk}-byte chunk"
+        if gap > 10000 + step:
+            return f"{gap} us between button reads, more than 10ms + one {step} us chunk"
+        unchunked = poll_gaps(PARTIAL_REFRESH=not full, FLUSH_CHUNK_BYTES=0)[0]
+        kind = "full frames" if full else "partial refresh"
+        print(
+            f"    {kind:<16} longest gap between button reads {gap / 1000:5.1f} ms "
+            f"(10 ms + {step / 1000:.1f} ms chunk), unchunked {unchunked / 1000:5.1f} ms"
+        )
+    return None
+
+
+def scroll_view(machine):
+    """The frame a scrolling joke should show: its banner over the lines
+    from scroll_top on"""
+    width = DEFAULTS["DISPLAY_WIDTH"]
+    frame = bytearray(machine.banner)
+    content_pages = DEFAULTS["DISPLAY_HEIGHT"] // 8 - machine.header_pages
+    top = machine.scroll_top * width
+    frame += machine.scroll_data[top : top + content_pages * width]
+    return frame
+
+
+def check_scroll():
+    """Scroll steps send a few pages and the panel always shows the right rows"""
+    width = DEFAULTS["DISPLAY_WIDTH"]
+    for partial in (True, False):
+        machine = new_machine(AUTO_MODE=False, PARTIAL_REFRESH=partial)
+        machine.jokes = jokestore.JokeList([LONG_JOKE] + list(jokes.JOKES[:2]))
+        panel = Controller()
+        bus = SIM.i2c
+        machine.show_question()
+        flush(machine)
+        panel.update(bus)
+        if panel.shown() != rows(scroll_view(machine), width):
+            return "the top of the long joke is not what the panel shows"
+        sent = []
+        while machine.scroll_top < machine.scroll_max:
+            SIM.advance(max(0, machine.next_scroll_time * 1000 - SIM.us))
+            before = bus.data_bytes()
+            machine.handle_scroll()
+            flush(machine)
+            sent.append(bus.data_bytes() - before)
+            panel.update(bus)
+            if panel.shown() != rows(scroll_view(machine), width):
+                return f"after scroll step {machine.scroll_top} the panel shows the wrong rows"
+        if not sent:
+            return "the long joke did not scroll"
+
+        # The answer comes while the first step of a new scroll is going out
+        machine.show_question()
+        flush(machine)
+        SIM.advance(max(0, machine.next_scroll_time * 1000 - SIM.us))
+        machine.handle_scroll()
+        if not machine.flush_display():
+            return "a scroll step went out in one chunk, nothing to interrupt"
+        machine.advance()  # the answer: reset_scroll()
+        flush(machine)
+        panel.update(bus)
+        if panel.start_line != 0:
+            return f"start line {panel.start_line} after reset_scroll"
+        if panel.shown() != rows(machine.display.buffer, width):
+            return "after reset_scroll the panel does not show the framebuffer"
+        machine.advance()  # and on to the next joke, diffed against the shadow
+        flush(machine)
+        panel.update(bus)
+        if panel.shown() != rows(machine.display.buffer, width):
+            return "the screen after reset_scroll was not redrawn correctly"
+
+        full = len(machine.display.buffer)
+        limit = (machine.header_pages + 1) * width
+        if max(sent) > limit:
+            return f"a scroll step sent {max(sent)} bytes, more than the banner and one page"
+        print(
+            f"    {'partial refresh' if partial else 'full frames':<16} {len(sent)} steps, "
+            f"{max(sent)} bytes each at most (a full redraw is {full}); "
+            f"RAM and start line match after reset_scroll"
+        )
+    return None
+
+
+def check_profile():
+    """With PROFILE on, every flushed frame gives one flush sample and idle
+    loop passes give none"""
+    machine = new_machine(PROFILE=1, StageTimer=perf.StageTimer)
+    frames = []
+    idle = 0
+
+    def show_step(max_bytes=0, step=machine.display.show_step):
+        nonlocal idle
+        SIM.advance(2)  # the call itself, so an idle call takes time too
+        sent = len(SIM.i2c.transactions)
+        pending = step(max_bytes)
+        if len(SIM.i2c.transactions) == sent:
+            idle += 1
+        elif not pending:
+            frames.append(SIM.us)
+        return pending
+
+    machine.display.show_step = show_step
+    run(machine, 60)
+    flush = program.STAGE_FLUSH
+    samples = machine.timer.counts[flush]
+    if samples != len(frames):
+        return f"{samples} flush samples for {len(frames)} frames ({idle} idle calls)"
+    shortest = min(machine.timer.samples[flush][: min(samples, machine.timer.size)])
+    print(
+        f"    {len(frames)} frames in a minute: {samples} flush samples, "
+        f"shortest {shortest} us; {idle} idle calls not recorded"
+    )
+    return None
+
+
+def redraws(event_mode, auto_mode):
+    """Press-to-redraw latencies (us) and wake-ups per minute of one loop
+
+    Presses come every 3.7 s for a simulated minute. A redraw counts as
+    done when the last chunk of the frame the press started has been sent.
+    """
+    machine = new_machine(EVENT_MODE=event_mode, AUTO_MODE=auto_mode)
+    SIM.presses = [(t * 1000, t * 1000 + 80000) for t in range(1900, 60000, 3700)]
+    done = []  # times frames finished going out
+
+    def show_step(max_bytes=0, step=machine.display.show_step):
+        sent = len(SIM.i2c.transactions)
+        pending = step(max_bytes)
+        if not pending and len(SIM.i2c.transactions) > sent:
+            done.append(SIM.us)
+        return pending
+
+    machine.display.show_step = show_step
+    run(machine, 60)
+    latencies = []
+    for down, _ in SIM.presses:
+        after = [t for t in done if t > down]
+        if after:
+            latencies.append(after[0] - down)
+    return latencies, SIM.wakeups
+
+
+def check_events():
+    """The event loop redraws as fast as polling while waking far less"""
+    results = {}
+    for event_mode in (False, True):
+        latencies, _ = redraws(event_mode, auto_mode=False)
+        if len(latencies) != 16:
+            return f"{len(latencies)} redraws for 16 presses (EVENT_MODE={event_mode})"
+        _, wakeups = redraws(event_mode, auto_mode=True)
+        results[event_mode] = (max(latencies), sum(latencies) / len(latencies), wakeups)
+    polling, events = results[False], results[True]
+    if events[0] > polling[0]:
+        return f"event loop redraw took up to {events[0]} us, polling {polling[0]} us"
+    if events[2] * 10 > polling[2]:
+        return f"event loop woke {events[2]} times a minute, polling {polling[2]}"
+    for event_mode, (worst, mean, wakeups) in results.items():
+        name = "event loop" if event_mode else "polling loop"
+        print(
+            f"    {name:<12} press to redraw {mean / 1000:5.1f} ms average, "
+            f"{worst / 1000:5.1f} ms worst; {wakeups:4d} wake-ups a minute"
+        )
+    return None
+
+
+def duty_cycle(gpio_wake, minutes=8):
+    """Awake % in each simulated minute of run_power_save, and the awake %
+    the program reported on the serial console
+
+    Three presses come in the first minute, then the machine is left alone:
+    it dims after IDLE_DIM_TIME and blanks after IDLE_OFF_TIME.
+    """
+    machine = new_machine(POWER_SAVE=True)
+    SIM.gpio_wake = gpio_wake
+    SIM.presses = [(t * 1000, t * 1000 + 80000) for t in (7000, 19000, 31000)]
+    printed = run(machine, minutes * 60)
+    measured = []
+    for minute in range(minutes):
+        start, end = minute * 60000000, (minute + 1) * 60000000
+        asleep = sum(max(0, min(b, end) - max(a, start)) for a, b in SIM.naps)
+        measured.append(100 * (1 - asleep / (end - start)))
+    reported = [
+        float(line.split()[1][:-1])
+        for line in printed.splitlines()
+        if line.startswith("Awake ")
+    ]
+    return measured, reported
+
+
+def check_power():
+    """run_power_save duty cycle, with and without button wake from light sleep"""
+    results = {}
+    for gpio_wake in (True, False):
+        measured, reported = duty_cycle(gpio_wake)
+        results[gpio_wake] = (measured, len(SIM.naps) / len(measured))
+        if not reported:
+            return "run_power_save printed no duty cycle reports"
+        if gpio_wake:
+            # The program counts leaving light sleep as asleep; with button
+            # wake that is a handful of wake-ups a minute
+            for minute, (got, awake) in enumerate(zip(reported, measured)):
+                if abs(got - awake) > 0.1:
+                    return f"reported {got}% awake in minute {minute}, measured {awake:.2f}%"
+    (wake, _), (fallback, _) = results[True], results[False]
+    if max(wake) > 1:
+        return f"awake up to {max(wake):.2f}% of a minute with button wake"
+    if wake[-1] != 0:
+        return "the CPU woke while the display was off and nothing was pressed"
+    if wake[-1] >= fallback[-1]:
+        return "the 50ms polling fallback sleeps as much as button wake"
+    print("    awake in each minute (presses in the first, dims in the second, blanks in the sixth)")
+    for gpio_wake, (measured, wakeups) in results.items():
+        name = "button wake" if gpio_wake else "50ms fallback"
+        print(
+            f"    {name:<14}" + "".join(f"{awake:6.2f}%" for awake in measured)
+            + f"  ({wakeups:.0f} wake-ups a minute)"
+        )
+    return None
+
+
+def catalog(count):
+    """count distinct jokes made from the ones in jokes.py"""
+    return [
+        (f"{question} #{n}", answer)
+        for n, (question, answer) in (
+            (n, jokes.JOKES[n % len(jokes.JOKES)]) for n in range(count)
+        )
+    ]
+
+
+def read_all(path, count):
+    """Open a joke file and read back every joke, checking each one
+
+    Returns (bytes held by the open store, growth after reading every joke,
+    peak during the reads), or an error string.
+    """
+    expected = [[jokestore.split_lines(side) for side in joke] for joke in catalog(count)]
+    tracemalloc.start()
+    try:
+        store = jokestore.JokeStore(path)
+        held = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        for n in range(count):
+            for side in (0, 1):
+                if store.lines(n, side) != expected[n][side]:
+                    return f"joke {n} side {side} read back wrong"
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    store.file.close()
+    return held, current - held, peak - held
+
+
+def check_store():
+    """10,000 jokes are read from flash without the heap growing"""
+    with tempfile.TemporaryDirectory() as tmp:
+        results = {}
+        for count in (50, 10000):
+            path = os.path.join(tmp, f"{count}.bin")
+            with open(path, "wb") as f:
+                f.write(build_jokes.build(catalog(count)))
+            result = read_all(path, count)
+            if isinstance(result, str):
+                return result
+            results[count] = (os.path.getsize(path),) + result
+    small, large = results[50][1], results[10000][1]
+    if large > small + 256:
+        return f"an open store of 10,000 jokes holds {large} bytes, {small} for 50"
+    for count, (size, held, growth, peak) in results.items():
+        if growth > 256:
+            return f"the heap grew by {growth} bytes reading {count} jokes"
+        if peak > 1024:
+            return f"reading one joke of {count} took up to {peak} bytes"
+        print(
+            f"    {count:5d} jokes ({size:6d} byte file): store {held} bytes, "
+            f"after reading all {growth:+d}, peak per joke {peak}"
+        )
+
+    tracemalloc.start()
+    in_ram = jokestore.JokeList(catalog(10000))
+    held = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f"    10000 jokes as a JOKES list in RAM: {held} bytes ({len(in_ram)} jokes)")
+    return None
+
+
+CHECKS = {
+    "bus": check_bus,
+    "spi": check_spi,
+    "latency": check_latency,
+    "events": check_events,
+    "power": check_power,
+    "store": check_store,
+    "scroll": check_scroll,
+    "profile": check_profile,
+}
+
+
+def main():
+    names = sys.argv[1:] or list(CHECKS)
+    failed = 0
+    for name in names:
+        print(f"{name}:")
+        result = CHECKS[name]()
+        if result:
+            print(f"  FAIL {result}")
+            failed += 1
+        else:
+            print("  ok")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Joke database for the Joke Machine
+
+Only imported when jokes.bin is missing; run build_jokes.py on a computer
+to convert this list into the flash-backed format used by jokestore.py.
+"""
+
+# Joke database - list of (question, answer) tuples
+JOKES = [
+    ("Why did the cookie go to the doctor?",
+     "Because it felt crumbly!"),
+
+    ("Why do seagulls fly over the ocean?",
+     "Because if they flew over the bay they'd be called bagels"),
+     
+    ("What do you call a bear with no teeth?",
+     "A gummy bear!"),
+
+    ("Why did the banana go to the doctor?",
+     "Because it wasn't peeling well!"),
+
+    ("What do you call cheese that isn't yours?",
+     "Nacho cheese!"),
+
+    ("Why don't eggs tell jokes?",
+     "They'd crack each other up!"),
+
+    ("What do you call a dinosaur that crashes its car?",
+     "Tyrannosaurus WRECKS!"),
+
+    ("Why did the math book look so sad?",
+     "Because it had too many problems!"),
+
+    ("What did the ocean say to the beach?",
+     "Nothing, it just waved!"),
+
+    ("Why don't scientists trust atoms?",
+     "Because they make up everything!"),
+
+    ("What do you call a pig that does karate?",
+     "A pork chop!"),
+
+    ("Why did the bicycle fall over?",
+     "Because it was two tired!"),
+
+    ("What's orange and sounds like a parrot?",
+     "A carrot!"),
+
+    ("Why did the student eat their homework?",
+     "Because the teacher said it was a piece of cake!"),
+
+    ("What do you call a sleeping bull?",
+     "A bulldozer!"),
+
+    ("Why don't skeletons fight each other?",
+     "They don't have the guts!"),
+
+    ("What did one wall say to the other wall?",
+     "I'll meet you at the corner!"),
+
+    ("What do you call a fake noodle?",
+     "An impasta!"),
+
+    ("Why can't you give Elsa a balloon?",
+     "Because she'll let it go!"),
+
+    ("What's a pirate's favorite letter?",
+     "You'd think it's R, but it's the C!"),
+
+    ("Why did the chicken join a band?",
+     "Because it had the drumsticks!"),
+
+    ("What do you call a snowman with a six-pack?",
+     "An abdominal snowman!"),
+
+    ("Why don't oysters share their pearls?",
+     "Because they're shelfish!"),
+
+    ("What did the left eye say to the right eye?",
+     "Between you and me, something smells!"),
+
+    ("Why did the scarecrow win an award?",
+     "Because he was outstanding in his field!"),
+
+    ("What do you call a dinosaur with an extensive vocabulary?",
+     "A thesaurus!"),
+
+    ("What did the zero say to the eight?",
+     "Nice belt!"),
+
+    ("Why was the broom late?",
+     "It over-swept!"),
+
+    ("What do you call a can opener that doesn't work?",
+     "A can't opener!"),
+
+    ("Why did the computer go to the doctor?",
+     "Because it had a virus!"),
+
+    ("What's a tornado's favorite game?",
+     "Twister!"),
+
+    ("Why did the music teacher need a ladder?",
+     "To reach the high notes!"),
+
+    ("What do you call a boomerang that won't come back?",
+     "A stick!"),
+
+    ("Why don't penguins like talking to strangers?",
+     "They find it hard to break the ice!"),
+
+    ("What did the limestone say to the geologist?",
+     "Don't take me for granite!"),
+
+    ("Why did the frog take the bus to work?",
+     "Because his car got toad!"),
+
+    ("What do you call a dancing sheep?",
+     "A baa-llerina!"),
+
+    ("Why did the golfer bring two pairs of pants?",
+     "In case he got a hole in one!"),
+
+    ("What's a computer's favorite snack?",
+     "Microchips!"),
+
+    ("Why did the sun go to school?",
+     "To get a little brighter!"),
+
+    ("What do you call a sleeping dinosaur?",
+     "A dino-snore!"),
+
+    ("Why don't mummies take vacations?",
+     "They're afraid they'll relax and unwind!"),
+
+    ("What did one plate say to the other?",
+     "Dinner's on me!"),
+
+    ("Why was the equal sign so humble?",
+     "Because it knew it wasn't greater or less than!"),
+
+    ("What do you call a belt made of watches?",
+     "A waist of time!"),
+
+    ("Why did the robot go on vacation?",
+     "To recharge its batteries!"),
+
+    ("What's a ghost's favorite fruit?",
+     "Boo-berries!"),
+
+    ("Why did the teacher wear sunglasses?",
+     "Because her students were so bright!"),
+
+    ("What do you call a fish wearing a crown?",
+     "A king fish!"),
+
+    ("What did the ocean say to the shore?",
+     "Nothing, it just saved"),
+]
@@ -0,0 +1,109 @@
+"""
+Joke storage for the Joke Machine
+
+Jokes are kept in a compact file on flash (built on a computer with
+build_jokes.py) and read one record at a time, so RAM use does not grow
+with the size of the catalog.
+
+File layout (all integers little-endian):
+- Header: b"JOKE", version (u8), reserved (u8), joke count (u16)
+- Index:  one u32 absolute file offset per joke
+- Record: for the question, then the answer: line count (u8), followed by
+  each pre-wrapped line as length (u8) + UTF-8 bytes
+"""
+
+import struct
+
+MAGIC = b"JOKE"
+VERSION = 1
+HEADER_SIZE = 8
+INDEX_ENTRY_SIZE = 4
+
+
+def wrap_text(text, max_width=14):
+    """Wrap text to fit display width (approximately 16 chars per line)"""
+    words = text.split()
+    lines = []
+    current_line = ""
+
+    for word in words:
+        if len(current_line) + len(word) + 1 <= max_width:
+            current_line += word + " "
+        else:
+            if current_line:
+                lines.append(current_line.strip())
+            current_line = word + " "
+
+    if current_line:
+        lines.append(current_line.strip())
+
+    return lines
+
+
+def split_lines(text):
+    """Split text at manual line breaks, or word-wrap it if there are none"""
+    if '\n' in text:
+        return text.split('\n')
+    return wrap_text(text)
+
+
+class JokeStore:
+    """Reads jokes on demand from a file written by build_jokes.py"""
+
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        self.header = bytearray(HEADER_SIZE)
+        self.file.readinto(self.header)
+        if self.header[0:4] != MAGIC or self.header[4] != VERSION:
+            self.file.close()
+            raise ValueError("Not a version %d joke file: %s" % (VERSION, path))
+        self.count = struct.unpack_from("<H", self.header, 6)[0]
+        self.index_entry = bytearray(INDEX_ENTRY_SIZE)
+        self.length = bytearray(1)
+
+    def __len__(self):
+        return self.count
+
+    def lines(self, index, side):
+        """Return the pre-wrapped lines of one side (0 = question, 1 = answer)"""
+        if not 0 <= index < self.count:
+            raise IndexError("joke index out of range")
+        f = self.file
+        f.seek(HEADER_SIZE + index * INDEX_ENTRY_SIZE)
+        f.readinto(self.index_entry)
+        f.seek(struct.unpack_from("<I", self.index_entry, 0)[0])
+        if side:
+            # Skip over the question lines
+            f.readinto(self.length)
+            for _ in range(self.length[0]):
+                f.readinto(self.length)
+                f.seek(self.length[0], 1)
+        f.readinto(self.length)
+        lines = []
+        for _ in range(self.length[0]):
+            f.readinto(self.length)
+            lines.append(f.read(self.length[0]).decode())
+        return lines
+
+
+class JokeList:
+    """Same interface as JokeStore for the in-RAM JOKES list"""
+
+    def __init__(self, jokes):
+        self.jokes = jokes
+
+    def __len__(self):
+        return len(self.jokes)
+
+    def lines(self, index, side):
+        return split_lines(self.jokes[index][side])
+
+
+def open_jokes(path):
+    """Open the joke file, falling back to the JOKES list in jokes.py"""
+    try:
+        return JokeStore(path)
+    except OSError:
+        print(f"{path} not found, loading jokes.py into RAM")
+        from jokes import JOKES
+        return JokeList(JOKES)
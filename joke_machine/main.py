@@ -3,15 +3,50 @@ Joke Machine - MicroPython implementation for ESP32-C3
 Displays jokes on 0.96" OLED display with button navigation
 """
 
-from machine import Pin, SoftI2C
+from machine import Pin, SoftI2C, lightsleep, SLEEP
+from micropython import const
 from ssd1306 import SSD1306_I2C
+from jokestore import open_jokes, split_lines
+import framebuf
 import time
 import random
 
+# Render pipeline profiling - compiled out entirely when PROFILE is 0
+PROFILE = const(0)  # 1 = time each render stage, long press dumps the stats
+LONG_PRESS_MS = 1000  # Hold time that counts as a long press
+
+if PROFILE:
+    from perf import StageTimer
+
+STAGE_WRAP = const(0)  # read/wrap the joke text into lines
+STAGE_DRAW = const(1)  # draw a screen into the framebuffer
+STAGE_BLIT = const(2)  # copy a cached screen into the framebuffer
+STAGE_FLUSH = const(3)  # send one frame to the display (sum of its chunks)
+
+try:
+    import asyncio
+except ImportError:
+    import uasyncio as asyncio
+
 # Configuration
 AUTO_MODE = True  # Set to True for auto-cycling, False for button-only mode
 AUTO_DISPLAY_TIME = 5  # Seconds to display each question/answer in auto mode
 RANDOM_MODE = False  # Set to True for random jokes, False for sequential order
+EVENT_MODE = False  # True = button interrupt + asyncio tasks, CPU idles between events
+PARTIAL_REFRESH = True  # Only send changed display regions over I2C (uses 1 KB extra RAM)
+FLUSH_CHUNK_BYTES = 128  # Max display bytes sent per main loop pass (one page)
+FRAME_CACHE_BYTES = 16 * 1024  # RAM budget for cached rendered screens (0 = off)
+JOKE_FILE = "jokes.bin"  # Pre-wrapped joke file built by build_jokes.py
+SCROLL_HOLD_MS = 1500  # Pause before a joke too long for the screen starts scrolling
+SCROLL_STEP_MS = 600  # Time between 8-pixel scroll steps of a long joke
+
+# Power saving (polling loop only, ignored in EVENT_MODE)
+POWER_SAVE = False  # Light-sleep between events and dim/blank the idle display
+IDLE_DIM_TIME = 60  # Seconds without a button press before dimming (0 = never)
+IDLE_OFF_TIME = 300  # Seconds without a button press before display off (0 = never)
+ACTIVE_CONTRAST = 0xFF  # Normal display contrast
+DIM_CONTRAST = 0x08  # Contrast while dimmed
+DUTY_REPORT_TIME = 60  # Seconds between awake duty cycle reports on serial
 
 # Hardware configuration
 I2C_SDA_PIN = 8  # GPIO8 for SDA
@@ -20,164 +55,53 @@ BUTTON_PIN = 10  # GPIO10 for button input
 DISPLAY_WIDTH = 128
 DISPLAY_HEIGHT = 64
 
-# Joke database - list of (question, answer) tuples
-JOKES = [
-    ("Why did the cookie go to the doctor?",
-     "Because it felt crumbly!"),
-
-    ("Why do seagulls fly over the ocean?",
-     "Because if they flew over the bay they'd be called bagels"),
-     
-    ("What do you call a bear with no teeth?",
-     "A gummy bear!"),
-
-    ("Why did the banana go to the doctor?",
-     "Because it wasn't peeling well!"),
-
-    ("What do you call cheese that isn't yours?",
-     "Nacho cheese!"),
-
-    ("Why don't eggs tell jokes?",
-     "They'd crack each other up!"),
-
-    ("What do you call a dinosaur that crashes its car?",
-     "Tyrannosaurus WRECKS!"),
-
-    ("Why did the math book look so sad?",
-     "Because it had too many problems!"),
-
-    ("What did the ocean say to the beach?",
-     "Nothing, it just waved!"),
-
-    ("Why don't scientists trust atoms?",
-     "Because they make up everything!"),
-
-    ("What do you call a pig that does karate?",
-     "A pork chop!"),
-
-    ("Why did the bicycle fall over?",
-     "Because it was two tired!"),
-
-    ("What's orange and sounds like a parrot?",
-     "A carrot!"),
-
-    ("Why did the student eat their homework?",
-     "Because the teacher said it was a piece of cake!"),
-
-    ("What do you call a sleeping bull?",
-     "A bulldozer!"),
-
-    ("Why don't skeletons fight each other?",
-     "They don't have the guts!"),
-
-    ("What did one wall say to the other wall?",
-     "I'll meet you at the corner!"),
-
-    ("What do you call a fake noodle?",
-     "An impasta!"),
-
-    ("Why can't you give Elsa a balloon?",
-     "Because she'll let it go!"),
-
-    ("What's a pirate's favorite letter?",
-     "You'd think it's R, but it's the C!"),
-
-    ("Why did the chicken join a band?",
-     "Because it had the drumsticks!"),
-
-    ("What do you call a snowman with a six-pack?",
-     "An abdominal snowman!"),
-
-    ("Why don't oysters share their pearls?",
-     "Because they're shelfish!"),
-
-    ("What did the left eye say to the right eye?",
-     "Between you and me, something smells!"),
-
-    ("Why did the scarecrow win an award?",
-     "Because he was outstanding in his field!"),
-
-    ("What do you call a dinosaur with an extensive vocabulary?",
-     "A thesaurus!"),
-
-    ("What did the zero say to the eight?",
-     "Nice belt!"),
-
-    ("Why was the broom late?",
-     "It over-swept!"),
-
-    ("What do you call a can opener that doesn't work?",
-     "A can't opener!"),
-
-    ("Why did the computer go to the doctor?",
-     "Because it had a virus!"),
-
-    ("What's a tornado's favorite game?",
-     "Twister!"),
-
-    ("Why did the music teacher need a ladder?",
-     "To reach the high notes!"),
-
-    ("What do you call a boomerang that won't come back?",
-     "A stick!"),
-
-    ("Why don't penguins like talking to strangers?",
-     "They find it hard to break the ice!"),
-
-    ("What did the limestone say to the geologist?",
-     "Don't take me for granite!"),
-
-    ("Why did the frog take the bus to work?",
-     "Because his car got toad!"),
-
-    ("What do you call a dancing sheep?",
-     "A baa-llerina!"),
+class FrameCache:
+    """LRU cache of rendered display frames bounded by a byte budget"""
+
+    def __init__(self, budget):
+        self.budget = budget
+        self.frames = {}
+        self.order = []  # keys, least recently used first
+        self.used = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Return the cached frame for key, or None on a miss"""
+        frame = self.frames.get(key)
+        if frame is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.order.remove(key)
+        self.order.append(key)
+        return frame
+
+    def put(self, key, buffer):
+        """Store a copy of buffer, evicting least recently used frames"""
+        size = len(buffer)
+        if size > self.budget or key in self.frames:
+            return
+        frame = None
+        while self.used + size > self.budget:
+            old_key = self.order.pop(0)
+            old = self.frames.pop(old_key)
+            self.used -= len(old)
+            if len(old) == size:
+                frame = old  # reuse the evicted buffer instead of allocating
+        if frame is None:
+            frame = bytearray(size)
+        frame[:] = buffer
+        self.frames[key] = frame
+        self.order.append(key)
+        self.used += size
 
-    ("Why did the golfer bring two pairs of pants?",
-     "In case he got a hole in one!"),
-
-    ("What's a computer's favorite snack?",
-     "Microchips!"),
-
-    ("Why did the sun go to school?",
-     "To get a little brighter!"),
-
-    ("What do you call a sleeping dinosaur?",
-     "A dino-snore!"),
-
-    ("Why don't mummies take vacations?",
-     "They're afraid they'll relax and unwind!"),
-
-    ("What did one plate say to the other?",
-     "Dinner's on me!"),
-
-    ("Why was the equal sign so humble?",
-     "Because it knew it wasn't greater or less than!"),
-
-    ("What do you call a belt made of watches?",
-     "A waist of time!"),
-
-    ("Why did the robot go on vacation?",
-     "To recharge its batteries!"),
-
-    ("What's a ghost's favorite fruit?",
-     "Boo-berries!"),
-
-    ("Why did the teacher wear sunglasses?",
-     "Because her students were so bright!"),
-
-    ("What do you call a fish wearing a crown?",
-     "A king fish!"),
-
-    ("What did the ocean say to the shore?",
-     "Nothing, it just saved"),
-]
 
 class JokeMachine:
     def __init__(self):
         # Initialize I2C for OLED display
         self.i2c = SoftI2C(scl=Pin(I2C_SCL_PIN), sda=Pin(I2C_SDA_PIN))
-        self.display = SSD1306_I2C(DISPLAY_WIDTH, DISPLAY_HEIGHT, self.i2c)
+        self.display = SSD1306_I2C(DISPLAY_WIDTH, DISPLAY_HEIGHT, self.i2c, partial=PARTIAL_REFRESH)
 
         # Initialize button with pull-up resistor
         self.button = Pin(BUTTON_PIN, Pin.IN, Pin.PULL_UP)
@@ -189,27 +113,43 @@ class JokeMachine:
         self.debounce_time = 0
         self.last_auto_change_time = time.ticks_ms()
 
-    def wrap_text(self, text, max_width=14):
-        """Wrap text to fit display width (approximately 16 chars per line)"""
-        words = text.split()
-        lines = []
-        current_line = ""
-
-        for word in words:
-            if len(current_line) + len(word) + 1 <= max_width:
-                current_line += word + " "
-            else:
-                if current_line:
-                    lines.append(current_line.strip())
-                current_line = word + " "
-
-        if current_line:
-            lines.append(current_line.strip())
-
-        return lines
+        # Power saving state: 0 = active, 1 = dimmed, 2 = display off
+        self.idle_state = 0
+        self.last_activity_time = self.last_auto_change_time
+
+        # Jokes are read from flash one record at a time when jokes.bin exists
+        self.jokes = open_jokes(JOKE_FILE)
+
+        # Hardware scrolling of texts taller than the screen
+        self.scroll_buf = None  # off-screen framebuffer holding all the lines
+        self.scroll_data = None
+        self.banner = None  # copy of the banner pages, rewritten each step
+        self.header_pages = 0
+        self.scroll_top = 0  # scroll_buf page shown at the top of the content area
+        self.scroll_max = 0
+        self.start_page = 0  # display RAM page currently shown on the top row
+        self.start_line_due = False  # start_page is set once its pages are sent
+        self.next_scroll_time = 0
+        self.scroll_ready = None  # asyncio.Event in EVENT_MODE
+
+        if PROFILE:
+            self.timer = StageTimer(("wrap", "draw", "blit", "flush"))
+            self.flush_us = 0
+            self.press_start_time = 0
+            self.long_press_done = True
+
+        # Rendered question/answer screens, keyed by joke index * 2 + side
+        self.frame_cache = FrameCache(FRAME_CACHE_BYTES)
 
     def display_text(self, text, header=None):
         """Display text on OLED with optional header in yellow strip"""
+        self.display_lines(split_lines(text), header)
+
+    def display_lines(self, lines, header=None):
+        """Display pre-wrapped lines on OLED with optional header"""
+        if PROFILE:
+            start_us = time.ticks_us()
+        self.reset_scroll()
         self.display.fill(0)
 
         # If header provided, create a banner in the yellow strip area
@@ -228,50 +168,179 @@ class JokeMachine:
                 self.display.text(char, char_x, 4, 0)  # color 0 = black on white
             start_y_content = 16  # Start content below yellow strip
 
-        # Split text by newlines if present
-        if '\n' in text:
-            lines = text.split('\n')
-        else:
-            lines = self.wrap_text(text)
-
         # Calculate starting Y position for vertical centering (below header)
         line_height = 10
         total_height = len(lines) * line_height
         available_height = DISPLAY_HEIGHT - start_y_content
-        start_y = start_y_content + (available_height - total_height) // 2
 
-        # Display each line
+        if total_height - 2 > available_height:
+            # Too tall: lay the lines out once off-screen and scroll through them
+            self.start_scroll(lines, line_height, start_y_content // 8)
+        else:
+            start_y = start_y_content + (available_height - total_height) // 2
+
+            # Display each line
+            for i, line in enumerate(lines):
+                y_pos = start_y + (i * line_height)
+                self.display.text(line, 0, y_pos)
+
+        if PROFILE:
+            self.timer.record(STAGE_DRAW, start_us)
+
+        # Sent in chunks from the main loop so button polling isn't blocked
+        self.display.show_begin()
+
+    def start_scroll(self, lines, line_height, header_pages):
+        """Render lines into a tall off-screen buffer and show its top"""
+        pages = (len(lines) * line_height + 7) // 8
+        self.scroll_data = bytearray(pages * DISPLAY_WIDTH)
+        self.scroll_buf = framebuf.FrameBuffer(
+            self.scroll_data, DISPLAY_WIDTH, pages * 8, framebuf.MONO_VLSB
+        )
         for i, line in enumerate(lines):
-            y_pos = start_y + (i * line_height)
-            self.display.text(line, 0, y_pos)
-
-        self.display.show()
+            self.scroll_buf.text(line, 0, i * line_height)
+
+        self.header_pages = header_pages
+        self.banner = bytes(self.display.buffer[: header_pages * DISPLAY_WIDTH])
+        content_pages = DISPLAY_HEIGHT // 8 - header_pages
+        self.display.buffer[header_pages * DISPLAY_WIDTH :] = self.scroll_data[
+            : content_pages * DISPLAY_WIDTH
+        ]
+        self.scroll_top = 0
+        self.scroll_max = pages - content_pages
+        self.next_scroll_time = time.ticks_add(time.ticks_ms(), SCROLL_HOLD_MS)
+        if self.scroll_ready is not None:
+            self.scroll_ready.set()
+
+    def scroll_step(self):
+        """Scroll the content area up by one page using the display start line
+
+        The display RAM is used as a ring: moving the start line down one page
+        scrolls everything up, so only the banner pages and the newly exposed
+        bottom page are rewritten instead of the whole content area. They go
+        out in chunks like any other frame, and the start line moves once the
+        last chunk is sent.
+        """
+        width = DISPLAY_WIDTH
+        ram_pages = DISPLAY_HEIGHT // 8
+        buf = self.display.buffer
+        old_start = self.start_page
+        self.start_page = (old_start + 1) % ram_pages
+        self.scroll_top += 1
+
+        # The banner moves down one RAM page to stay on the top rows
+        pages = 0
+        for j in range(self.header_pages):
+            ram = (self.start_page + j) % ram_pages
+            buf[ram * width : (ram + 1) * width] = self.banner[j * width : (j + 1) * width]
+            pages |= 1 << ram
+        # The RAM page that scrolled off the top becomes the new bottom line
+        src = (self.scroll_top + ram_pages - self.header_pages - 1) * width
+        buf[old_start * width : (old_start + 1) * width] = self.scroll_data[src : src + width]
+        pages |= 1 << old_start
+
+        # Only those pages go out, with or without partial refresh
+        self.display.show_begin(pages=pages)
+        self.start_line_due = True
+
+    def reset_scroll(self):
+        """Stop scrolling and return the display RAM to its normal layout"""
+        self.scroll_buf = None
+        self.scroll_data = None
+        self.banner = None
+        self.start_line_due = False
+        if self.start_page:
+            # The shadow buffer mirrors RAM, so the next diff still works
+            self.start_page = 0
+            self.display.set_start_line(0)
+
+    def handle_scroll(self):
+        """Scroll a long joke by one step when the next step is due"""
+        if self.scroll_buf is None or self.scroll_top >= self.scroll_max:
+            return
+        current_time = time.ticks_ms()
+        if time.ticks_diff(current_time, self.next_scroll_time) >= 0:
+            self.scroll_step()
+            self.next_scroll_time = time.ticks_add(current_time, SCROLL_STEP_MS)
+
+    def show_screen(self, side, header):
+        """Display one side (0 = question, 1 = answer) of the current joke"""
+        key = self.current_joke_index * 2 + side
+        if PROFILE:
+            start_us = time.ticks_us()
+        frame = self.frame_cache.get(key)
+        if frame is not None:
+            self.reset_scroll()
+            self.display.buffer[:] = frame
+            if PROFILE:
+                self.timer.record(STAGE_BLIT, start_us)
+            self.display.show_begin()
+            return
+        lines = self.jokes.lines(self.current_joke_index, side)
+        if PROFILE:
+            self.timer.record(STAGE_WRAP, start_us)
+        self.display_lines(lines, header=header)
+        if self.scroll_buf is None:
+            self.frame_cache.put(key, self.display.buffer)
 
     def show_question(self):
         """Display the current joke question"""
-        question, _ = JOKES[self.current_joke_index]
-        self.display_text(question, header="Question?")
+        self.show_screen(0, "Question?")
         self.showing_answer = False
 
     def show_answer(self):
         """Display the current joke answer"""
-        _, answer = JOKES[self.current_joke_index]
-        self.display_text(answer, header="Answer")
+        self.show_screen(1, "Answer")
         self.showing_answer = True
 
     def next_joke(self):
         """Move to the next joke (sequential or random based on config)"""
         if RANDOM_MODE:
             # Pick a random joke (avoid showing the same joke twice in a row)
-            new_index = random.randint(0, len(JOKES) - 1)
-            while new_index == self.current_joke_index and len(JOKES) > 1:
-                new_index = random.randint(0, len(JOKES) - 1)
+            new_index = random.randint(0, len(self.jokes) - 1)
+            while new_index == self.current_joke_index and len(self.jokes) > 1:
+                new_index = random.randint(0, len(self.jokes) - 1)
             self.current_joke_index = new_index
         else:
             # Sequential mode - wrap around
-            self.current_joke_index = (self.current_joke_index + 1) % len(JOKES)
+            self.current_joke_index = (self.current_joke_index + 1) % len(self.jokes)
         self.show_question()
 
+    def flush_display(self):
+        """Send the next chunk of a pending frame; True while more remains"""
+        if PROFILE and self.display.flush_page < self.display.pages:
+            # Only time a flush in progress, not the idle calls between frames
+            start_us = time.ticks_us()
+            pending = self.display.show_step(FLUSH_CHUNK_BYTES)
+            self.flush_us += time.ticks_diff(time.ticks_us(), start_us)
+            if not pending:
+                self.timer.add(STAGE_FLUSH, self.flush_us)
+                self.flush_us = 0
+        else:
+            pending = self.display.show_step(FLUSH_CHUNK_BYTES)
+        if not pending and self.start_line_due:
+            self.start_line_due = False
+            self.display.set_start_line(self.start_page * 8)
+        return pending
+
+    def check_long_press(self, button_state, current_time):
+        """Dump the stage timings once the button has been held long enough"""
+        if button_state != 0:
+            self.long_press_done = False
+            self.press_start_time = current_time
+        elif not self.long_press_done and time.ticks_diff(current_time, self.press_start_time) >= LONG_PRESS_MS:
+            self.long_press_done = True
+            self.timer.dump()
+
+    def advance(self):
+        """Reveal the answer, or move on to the next joke if it is showing"""
+        if self.showing_answer:
+            # If showing answer, go to next joke
+            self.next_joke()
+        else:
+            # If showing question, reveal answer
+            self.show_answer()
+
     def handle_button_press(self):
         """Handle button press with debouncing"""
         current_time = time.ticks_ms()
@@ -285,13 +354,13 @@ class JokeMachine:
                 self.debounce_time = current_time
                 # Reset auto timer when button is pressed
                 self.last_auto_change_time = current_time
+                self.last_activity_time = current_time
+                # A press on a dimmed or blank display only wakes it up
+                if not self.wake_display():
+                    self.advance()
 
-                if self.showing_answer:
-                    # If showing answer, go to next joke
-                    self.next_joke()
-                else:
-                    # If showing question, reveal answer
-                    self.show_answer()
+        if PROFILE:
+            self.check_long_press(button_state, current_time)
 
         self.last_button_state = button_state
 
@@ -305,13 +374,170 @@ class JokeMachine:
 
         if elapsed >= auto_interval_ms:
             self.last_auto_change_time = current_time
+            self.advance()
+
+    def wake_display(self):
+        """Restore an idle display; returns True if it was dimmed or off"""
+        if self.idle_state == 0:
+            return False
+        if self.idle_state == 2:
+            self.display.poweron()
+        self.display.contrast(ACTIVE_CONTRAST)
+        self.idle_state = 0
+        return True
+
+    def update_idle_display(self, current_time):
+        """Dim the display, then turn it off, as the idle time grows"""
+        idle = time.ticks_diff(current_time, self.last_activity_time)
+        if self.idle_state < 2 and IDLE_OFF_TIME and idle >= IDLE_OFF_TIME * 1000:
+            self.display.poweroff()
+            self.idle_state = 2
+            print("Idle - display off")
+        elif self.idle_state == 0 and IDLE_DIM_TIME and idle >= IDLE_DIM_TIME * 1000:
+            self.display.contrast(DIM_CONTRAST)
+            self.idle_state = 1
+            print("Idle - display dimmed")
+
+    def next_wake_ms(self, current_time):
+        """Milliseconds until the next auto-cycle or idle deadline, or None"""
+        deadlines = []
+        if AUTO_MODE and self.idle_state < 2:
+            deadlines.append(time.ticks_add(self.last_auto_change_time, AUTO_DISPLAY_TIME * 1000))
+        if self.scroll_buf is not None and self.scroll_top < self.scroll_max:
+            deadlines.append(self.next_scroll_time)
+        if self.idle_state == 0 and IDLE_DIM_TIME:
+            deadlines.append(time.ticks_add(self.last_activity_time, IDLE_DIM_TIME * 1000))
+        if self.idle_state < 2 and IDLE_OFF_TIME:
+            deadlines.append(time.ticks_add(self.last_activity_time, IDLE_OFF_TIME * 1000))
+        if not deadlines:
+            return None
+        return max(0, min(time.ticks_diff(d, current_time) for d in deadlines))
+
+    def run_power_save(self):
+        """Polling loop that light-sleeps until the next deadline or a press"""
+        try:
+            # Wake from light sleep when the button pulls the pin low
+            self.button.irq(trigger=Pin.WAKE_LOW, wake=SLEEP)
+            wake_on_button = True
+        except (ValueError, TypeError):
+            # No GPIO wake on this port: sleep in short slices and poll
+            print("Button wake unavailable, polling every 50ms")
+            wake_on_button = False
 
-            if self.showing_answer:
-                # If showing answer, go to next joke
-                self.next_joke()
-            else:
-                # If showing question, reveal answer
-                self.show_answer()
+        report_start = time.ticks_ms()
+        asleep_ms = 0
+
+        while True:
+            self.handle_button_press()
+            if AUTO_MODE and self.idle_state < 2:
+                self.handle_auto_mode()
+            self.handle_scroll()
+            if self.flush_display():
+                continue
+
+            current_time = time.ticks_ms()
+            self.update_idle_display(current_time)
+
+            window = time.ticks_diff(current_time, report_start)
+            if window >= DUTY_REPORT_TIME * 1000:
+                awake = 100 * (window - asleep_ms) / window
+                print(f"Awake {awake:.1f}% of the last {window // 1000}s")
+                report_start = current_time
+                asleep_ms = 0
+
+            if self.button.value() == 0:
+                # Still held: the wake level would fire at once, so wait for release
+                time.sleep_ms(10)
+                continue
+
+            wait = self.next_wake_ms(current_time)
+            if not wake_on_button and (wait is None or wait > 50):
+                wait = 50
+            if wait is None:
+                lightsleep()  # only the button can wake us
+            elif wait > 0:
+                lightsleep(wait)
+            asleep_ms += time.ticks_diff(time.ticks_ms(), current_time)
+
+    def on_button_irq(self, pin):
+        """Button interrupt handler - just wakes the button task"""
+        self.button_flag.set()
+
+    async def button_task(self):
+        """Handle presses signalled by the button interrupt"""
+        while True:
+            await self.button_flag.wait()
+            current_time = time.ticks_ms()
+            # Contact bounce raises extra interrupts; ignore them for 200ms
+            if time.ticks_diff(current_time, self.debounce_time) <= 200:
+                continue
+            # Wait for the level to settle, then confirm it is still pressed
+            await asyncio.sleep_ms(5)
+            if self.button.value() != 0:
+                continue
+            self.debounce_time = current_time
+            # Reset auto timer when button is pressed
+            self.last_auto_change_time = current_time
+            self.advance()
+            self.redraw.set()
+            if PROFILE:
+                # Held past LONG_PRESS_MS: dump the stage timings
+                while self.button.value() == 0:
+                    await asyncio.sleep_ms(50)
+                if time.ticks_diff(time.ticks_ms(), current_time) >= LONG_PRESS_MS:
+                    self.timer.dump()
+
+    async def auto_task(self):
+        """Sleep until the next auto-cycle deadline, then advance"""
+        auto_interval_ms = AUTO_DISPLAY_TIME * 1000
+        while True:
+            elapsed = time.ticks_diff(time.ticks_ms(), self.last_auto_change_time)
+            if elapsed < auto_interval_ms:
+                # A button press may have pushed the deadline back meanwhile
+                await asyncio.sleep_ms(auto_interval_ms - elapsed)
+                continue
+            self.last_auto_change_time = time.ticks_ms()
+            self.advance()
+            self.redraw.set()
+
+    async def scroll_task(self):
+        """Step long jokes through the screen, sleeping while none is shown"""
+        while True:
+            if self.scroll_buf is None or self.scroll_top >= self.scroll_max:
+                await self.scroll_ready.wait()
+                self.scroll_ready.clear()
+                continue
+            wait = time.ticks_diff(self.next_scroll_time, time.ticks_ms())
+            if wait > 0:
+                await asyncio.sleep_ms(wait)
+            self.handle_scroll()
+            self.redraw.set()
+
+    async def flush_task(self):
+        """Send pending frames in chunks, yielding to other tasks in between"""
+        while True:
+            await self.redraw.wait()
+            self.redraw.clear()
+            while self.flush_display():
+                await asyncio.sleep_ms(0)
+
+    async def run_events(self):
+        """Event-driven main loop: the CPU idles until a press or deadline"""
+        self.button_flag = asyncio.ThreadSafeFlag()
+        self.redraw = asyncio.Event()
+        self.redraw.set()  # flush the initial question
+        self.scroll_ready = asyncio.Event()
+        self.scroll_ready.set()
+        self.button.irq(trigger=Pin.IRQ_FALLING, handler=self.on_button_irq)
+
+        tasks = [
+            asyncio.create_task(self.button_task()),
+            asyncio.create_task(self.flush_task()),
+            asyncio.create_task(self.scroll_task()),
+        ]
+        if AUTO_MODE:
+            tasks.append(asyncio.create_task(self.auto_task()))
+        await asyncio.gather(*tasks)
 
     def run(self):
         """Main loop"""
@@ -321,10 +547,17 @@ class JokeMachine:
         mode_str = "AUTO" if AUTO_MODE else "BUTTON"
         order_str = "RANDOM" if RANDOM_MODE else "SEQUENTIAL"
         print(f"Joke Machine started in {mode_str} mode!")
-        print(f"Loaded {len(JOKES)} jokes ({order_str} order)")
+        print(f"Loaded {len(self.jokes)} jokes ({order_str} order)")
         if AUTO_MODE:
             print(f"Auto-cycling every {AUTO_DISPLAY_TIME} seconds")
 
+        if EVENT_MODE:
+            asyncio.run(self.run_events())
+            return
+        if POWER_SAVE:
+            self.run_power_save()
+            return
+
         while True:
             # Always check for button press (works in both modes)
             self.handle_button_press()
@@ -333,7 +566,12 @@ class JokeMachine:
             if AUTO_MODE:
                 self.handle_auto_mode()
 
-            time.sleep(0.01)  # Small delay to prevent busy-waiting
+            # Step a joke that is too long for the screen
+            self.handle_scroll()
+
+            # Send the next chunk of a pending frame; only idle once it's out
+            if not self.flush_display():
+                time.sleep(0.01)  # Small delay to prevent busy-waiting
 
 
 # Main entry point
@@ -0,0 +1,46 @@
+"""
+Stage timing for the Joke Machine render pipeline
+
+Each stage records its durations (from time.ticks_us) into its own
+preallocated ring buffer, so recording a sample never allocates memory.
+dump() prints min/avg/p95/max per stage over the samples in the buffers.
+"""
+
+from array import array
+import time
+
+
+class StageTimer:
+    def __init__(self, names, size=64):
+        self.names = names
+        self.size = size
+        self.samples = [array("I", bytes(4 * size)) for _ in names]
+        self.counts = array("I", bytes(4 * len(names)))
+
+    def record(self, stage, start_us):
+        """Record the time since start_us (a time.ticks_us value) for a stage"""
+        n = self.counts[stage]
+        self.samples[stage][n % self.size] = time.ticks_diff(time.ticks_us(), start_us)
+        self.counts[stage] = n + 1
+
+    def add(self, stage, duration_us):
+        """Record an already measured duration for a stage"""
+        n = self.counts[stage]
+        self.samples[stage][n % self.size] = duration_us
+        self.counts[stage] = n + 1
+
+    def dump(self):
+        """Print min/avg/p95/max in microseconds for every stage"""
+        print("Stage timings (us, last %d samples per stage):" % self.size)
+        print("  stage       n      min      avg      p95      max")
+        for stage, name in enumerate(self.names):
+            n = min(self.counts[stage], self.size)
+            if not n:
+                print("  %-8s %4d        -        -        -        -" % (name, 0))
+                continue
+            values = sorted(self.samples[stage][:n])
+            p95 = values[min(n - 1, (n * 95) // 100)]
+            print(
+                "  %-8s %4d %8d %8d %8d %8d"
+                % (name, n, values[0], sum(values) // n, p95, values[-1])
+            )
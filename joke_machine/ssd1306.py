@@ -25,17 +25,32 @@ SET_CHARGE_PUMP = const(0x8D)
 
 
 class SSD1306(framebuf.FrameBuffer):
-    def __init__(self, width, height, external_vcc):
+    def __init__(self, width, height, external_vcc, partial=False):
         self.width = width
         self.height = height
         self.external_vcc = external_vcc
         self.pages = self.height // 8
         self.buffer = bytearray(self.pages * self.width)
         super().__init__(self.buffer, self.width, self.height, framebuf.MONO_VLSB)
+        # partial refresh: shadow copy of display RAM and per-page dirty spans
+        self.shadow = bytearray(len(self.buffer)) if partial else None
+        # one view per page of each buffer, so comparing pages and sending
+        # whole pages allocates nothing
+        self.page_views = self.views(self.buffer)
+        self.shadow_views = self.views(self.shadow) if partial else None
+        self.dirty_lo = bytearray(self.pages)
+        self.dirty_hi = bytearray(self.pages)
+        self.flush_page = self.pages  # next page of a chunked flush, pages = idle
+        self.window_cmds = bytearray(6)
+        self.pair_cmds = bytearray(2)
         self.init_display()
 
+    def views(self, buf):
+        mv = memoryview(buf)
+        return [mv[page * self.width : (page + 1) * self.width] for page in range(self.pages)]
+
     def init_display(self):
-        for cmd in (
+        self.write_cmds(bytes((
             SET_DISP | 0x00,  # off
             # address setting
             SET_MEM_ADDR,
@@ -65,11 +80,10 @@ class SSD1306(framebuf.FrameBuffer):
             # charge pump
             SET_CHARGE_PUMP,
             0x10 if self.external_vcc else 0x14,
-            SET_DISP | 0x01,
-        ):  # on
-            self.write_cmd(cmd)
+            SET_DISP | 0x01,  # on
+        )))
         self.fill(0)
-        self.show()
+        self.show(full=True)
 
     def poweroff(self):
         self.write_cmd(SET_DISP | 0x00)
@@ -78,49 +92,167 @@ class SSD1306(framebuf.FrameBuffer):
         self.write_cmd(SET_DISP | 0x01)
 
     def contrast(self, contrast):
-        self.write_cmd(SET_CONTRAST)
-        self.write_cmd(contrast)
+        self.pair_cmds[0] = SET_CONTRAST
+        self.pair_cmds[1] = contrast
+        self.write_cmds(self.pair_cmds)
 
     def invert(self, invert):
         self.write_cmd(SET_NORM_INV | (invert & 1))
 
-    def show(self):
-        x0 = 0
-        x1 = self.width - 1
+    def set_start_line(self, line):
+        # Display RAM row shown on the top row; moving it scrolls the whole
+        # display without resending any pixel data.
+        self.write_cmd(SET_DISP_START_LINE | (line % self.height))
+
+    def show(self, full=False):
+        if self.shadow is None or full or self.find_dirty() * 4 > len(self.buffer) * 3:
+            # full refresh: one window covering the whole display
+            self.write_window(0, self.pages - 1, 0, self.width - 1)
+            self.write_data(self.buffer)
+            if self.shadow is not None:
+                self.shadow[:] = self.buffer
+            self.flush_page = self.pages
+            return
+        # partial refresh: one window per page covering only the changed columns
+        self.flush_page = 0
+        self.show_step()
+
+    def show_begin(self, full=False, pages=0):
+        # Start a chunked flush of the current framebuffer contents; call
+        # show_step() until it returns False to send it. Starting a new flush
+        # while one is in progress is fine, the dirty regions are recomputed.
+        # pages is a bit mask of whole pages to send instead (bit n = page n),
+        # for callers that know exactly what changed.
+        if pages:
+            for page in range(self.pages):
+                if pages >> page & 1:
+                    self.dirty_lo[page] = 0
+                    self.dirty_hi[page] = self.width - 1
+                else:
+                    self.dirty_lo[page] = 0xFF
+                    self.dirty_hi[page] = 0
+        elif self.shadow is None or full:
+            for page in range(self.pages):
+                self.dirty_lo[page] = 0
+                self.dirty_hi[page] = self.width - 1
+        else:
+            self.find_dirty()
+        self.flush_page = 0
+
+    def show_step(self, max_bytes=0):
+        # Send up to max_bytes (0 = no limit) of the pending flush and return
+        # True while more remains to be sent.
+        budget = max_bytes if max_bytes > 0 else len(self.buffer)
+        while self.flush_page < self.pages:
+            page = self.flush_page
+            x0 = self.dirty_lo[page]
+            x1 = self.dirty_hi[page]
+            if x0 > x1:
+                self.flush_page += 1
+                continue
+            if budget <= 0:
+                return True
+            if x1 - x0 >= budget:
+                x1 = x0 + budget - 1
+            self.write_window(page, page, x0, x1)
+            if x0 == 0 and x1 == self.width - 1:
+                chunk = self.page_views[page]
+            else:
+                chunk = self.page_views[page][x0 : x1 + 1]  # a view, not a copy
+            self.write_data(chunk)
+            if self.shadow is not None:
+                start = page * self.width
+                self.shadow[start + x0 : start + x1 + 1] = chunk
+            self.dirty_lo[page] = x1 + 1
+            budget -= x1 - x0 + 1
+        return False
+
+    def find_dirty(self):
+        # Compare the framebuffer against the shadow copy and record the
+        # changed column span of every page. Returns the number of bytes
+        # the partial refresh would send.
+        buf = self.buffer
+        shadow = self.shadow
+        total = 0
+        for page in range(self.pages):
+            start = page * self.width
+            end = start + self.width
+            if self.page_views[page] == self.shadow_views[page]:
+                self.dirty_lo[page] = 0xFF
+                self.dirty_hi[page] = 0
+                continue
+            lo = start
+            while buf[lo] == shadow[lo]:
+                lo += 1
+            hi = end - 1
+            while buf[hi] == shadow[hi]:
+                hi -= 1
+            self.dirty_lo[page] = lo - start
+            self.dirty_hi[page] = hi - start
+            total += hi - lo + 1
+        return total
+
+    def write_window(self, page0, page1, x0, x1):
         if self.width == 64:
             # displays with width of 64 pixels are shifted by 32
-            x0 += 32
-            x1 += 32
-        self.write_cmd(SET_COL_ADDR)
-        self.write_cmd(x0)
-        self.write_cmd(x1)
-        self.write_cmd(SET_PAGE_ADDR)
-        self.write_cmd(0)
-        self.write_cmd(self.pages - 1)
-        self.write_data(self.buffer)
+            col_offset = 32
+        else:
+            col_offset = 0
+        cmds = self.window_cmds
+        cmds[0] = SET_COL_ADDR
+        cmds[1] = x0 + col_offset
+        cmds[2] = x1 + col_offset
+        cmds[3] = SET_PAGE_ADDR
+        cmds[4] = page0
+        cmds[5] = page1
+        self.write_cmds(cmds)
 
 
 class SSD1306_I2C(SSD1306):
-    def __init__(self, width, height, i2c, addr=0x3C, external_vcc=False):
+    def __init__(self, width, height, i2c, addr=0x3C, external_vcc=False, partial=False):
         self.i2c = i2c
         self.addr = addr
         self.temp = bytearray(2)
         self.write_list = [b"\x40", None]  # Co=0, D/C#=1
-        super().__init__(width, height, external_vcc)
+        self.cmd_list = [b"\x00", None]  # Co=0, D/C#=0
+        super().__init__(width, height, external_vcc, partial)
 
     def write_cmd(self, cmd):
         self.temp[0] = 0x80  # Co=1, D/C#=0
         self.temp[1] = cmd
         self.i2c.writeto(self.addr, self.temp)
 
+    def write_cmds(self, cmds):
+        # a single control byte with Co=0 makes every following byte a command
+        self.cmd_list[1] = cmds
+        self.i2c.writevto(self.addr, self.cmd_list)
+
     def write_data(self, buf):
         self.write_list[1] = buf
         self.i2c.writevto(self.addr, self.write_list)
 
 
 class SSD1306_SPI(SSD1306):
-    def __init__(self, width, height, spi, dc, res, cs, external_vcc=False):
-        self.rate = 10 * 1024 * 1024
+    def __init__(
+        self,
+        width,
+        height,
+        spi,
+        dc,
+        res,
+        cs,
+        external_vcc=False,
+        partial=False,
+        baudrate=10 * 1024 * 1024,
+        shared_bus=False,
+    ):
+        # The SSD1306 is specified for a 10 MHz SPI clock, but most modules
+        # run reliably well above that; pass a higher baudrate to raise the
+        # sustained frame rate. Set shared_bus when other devices reconfigure
+        # the same SPI peripheral so it is re-initialised before each transfer.
+        self.rate = baudrate
+        self.shared_bus = shared_bus
+        self.cmd_buf = bytearray(1)
         dc.init(dc.OUT, value=0)
         res.init(res.OUT, value=0)
         cs.init(cs.OUT, value=1)
@@ -128,6 +260,7 @@ class SSD1306_SPI(SSD1306):
         self.dc = dc
         self.res = res
         self.cs = cs
+        spi.init(baudrate=self.rate, polarity=0, phase=0)
         import time
 
         self.res(1)
@@ -135,18 +268,24 @@ class SSD1306_SPI(SSD1306):
         self.res(0)
         time.sleep_ms(10)
         self.res(1)
-        super().__init__(width, height, external_vcc)
+        super().__init__(width, height, external_vcc, partial)
 
     def write_cmd(self, cmd):
-        self.spi.init(baudrate=self.rate, polarity=0, phase=0)
+        self.cmd_buf[0] = cmd
+        self.write_cmds(self.cmd_buf)
+
+    def write_cmds(self, cmds):
+        if self.shared_bus:
+            self.spi.init(baudrate=self.rate, polarity=0, phase=0)
         self.cs(1)
         self.dc(0)
         self.cs(0)
-        self.spi.write(bytearray([cmd]))
+        self.spi.write(cmds)
         self.cs(1)
 
     def write_data(self, buf):
-        self.spi.init(baudrate=self.rate, polarity=0, phase=0)
+        if self.shared_bus:
+            self.spi.init(baudrate=self.rate, polarity=0, phase=0)
         self.cs(1)
         self.dc(1)
         self.cs(0)
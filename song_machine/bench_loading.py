@@ -0,0 +1,182 @@
+"""
+Song loading benchmark - run on a computer, not on the RP2040
+
+Compares loading the built-in songs:
+- monolithic: every song's note lists built before the first note, as when
+  all songs lived in code.py, and kept for as long as the program runs
+- lazy: each song's module imported by load_song_module when the song comes
+  up and released after it has played
+
+For each it measures, with tracemalloc over one pass through the playlist:
+- the time from startup to the first note: code.py's gc.collect(), then
+  importing, packing and compiling the first song. A full collection walks
+  CPython's whole heap and takes longer than importing a song, so its time
+  is printed as well and the board's own "First note" line is the one to
+  go by
+- the peak memory, which includes compiling a song module's source as
+  CircuitPython does for .py files (so bytecode caching is turned off)
+- the memory held while a song plays, the most that is allocated once a
+  song is compiled and ready
+
+It checks that lazy loading uses less memory and really releases every
+song: its module leaves sys.modules, the Song is garbage collected and,
+apart from a few entries in CPython's import caches, the memory allocated
+before the pass is all that is left after it. The simulator can't show
+this, as its gc.mem_free() always returns 0.
+
+The board prints the same kind of numbers ("Heap free while playing",
+"First note ... ms after start") on the serial console.
+
+Usage:
+    python bench_loading.py [repeats]
+"""
+
+import gc
+import sys
+import time
+import tracemalloc
+import weakref
+
+sys.dont_write_bytecode = True
+
+from player import Song, load_song_module, pack_melody
+
+# The built-in playlist of code.py, in order
+PLAYLIST = ("mario", "happy_bounce", "tetris", "imperial_march", "hedwigs_theme", "pigstep")
+
+# Bytes CPython's import system may keep after importing the songs
+IMPORT_CACHES = 2048
+
+
+def forget_songs():
+    """Remove the song modules from sys.modules so they are imported again"""
+    for name in PLAYLIST:
+        sys.modules.pop("songs." + name, None)
+        if "songs" in sys.modules and hasattr(sys.modules["songs"], name):
+            delattr(sys.modules["songs"], name)
+
+
+def load_all():
+    """The monolithic layout: every song built up front and kept"""
+    songs = []
+    for name in PLAYLIST:
+        __import__("songs." + name)
+        module = sys.modules["songs." + name]
+        voices = [pack_melody(module.MELODY)]
+        if hasattr(module, "BASS"):
+            voices.append(pack_melody(module.BASS))
+        songs.append(Song(tuple(voices), module.BPM, module.TICKS_PER_BEAT))
+    return songs
+
+
+def first_note_us(layout, repeats):
+    """Mean microseconds until the first song is compiled and ready to play"""
+    total = 0
+    for _ in range(repeats):
+        forget_songs()
+        gc.collect()
+        start = time.perf_counter_ns()
+        gc.collect()
+        if layout == "monolithic":
+            songs = load_all()
+            songs[0].compile()
+        else:
+            load_song_module(PLAYLIST[0]).compile()
+        total += time.perf_counter_ns() - start
+        songs = None
+    return total / repeats / 1000
+
+
+def collect_us(repeats):
+    """Mean microseconds of one gc.collect()"""
+    start = time.perf_counter_ns()
+    for _ in range(repeats):
+        gc.collect()
+    return (time.perf_counter_ns() - start) / repeats / 1000
+
+
+def playing():
+    """Bytes allocated now, while a compiled song is ready to play"""
+    return tracemalloc.get_traced_memory()[0]
+
+
+def play_monolithic(held):
+    """One pass through the playlist; returns the songs, which stay loaded"""
+    songs = load_all()
+    for song in songs:
+        voices = song.compile()
+        held.append(playing())
+        voices = None
+    return songs
+
+
+def play_lazy(held):
+    """One pass through the playlist as Player.run does it; returns the names
+    of songs that were not released"""
+    kept = []
+    for name in PLAYLIST:
+        song = load_song_module(name)
+        voices = song.compile()
+        held.append(playing())
+        voices = None
+        released = weakref.ref(song)
+        song = None
+        gc.collect()
+        if released() is not None or "songs." + name in sys.modules:
+            kept.append(name)
+    return kept
+
+
+def measure(play):
+    """(result of play, peak bytes, most bytes held while playing, bytes
+    still allocated afterwards)"""
+    forget_songs()
+    gc.collect()
+    held = []
+    tracemalloc.start()
+    result = play(held)
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, peak, max(held), current
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    # Import the shared modules once, as code.py does before the first song
+    import notes  # noqa: F401
+    import songs  # noqa: F401
+
+    # One unmeasured pass of each fills the import system's caches
+    forget_songs()
+    play_monolithic([])
+    forget_songs()
+    play_lazy([])
+
+    print(f"bytes, first note in us ({repeats} repeats)")
+    print("              first note       peak    playing  kept after")
+    songs_kept, mono_peak, mono_held, mono_kept = measure(play_monolithic)
+    mono_us = first_note_us("monolithic", repeats)
+    print(f"  monolithic {mono_us:13.0f} {mono_peak:10} {mono_held:10} {mono_kept:11}")
+    songs_kept = None
+    not_released, lazy_peak, lazy_held, lazy_kept = measure(play_lazy)
+    lazy_us = first_note_us("lazy", repeats)
+    print(f"  lazy       {lazy_us:13.0f} {lazy_peak:10} {lazy_held:10} {lazy_kept:11}")
+    print(f"  (one gc.collect() takes {collect_us(repeats):.0f} us here; lazy loading makes two)")
+
+    failures = []
+    if not_released:
+        failures.append(f"songs not released after playing: {', '.join(not_released)}")
+    if lazy_kept > IMPORT_CACHES:
+        failures.append(f"{lazy_kept} bytes still allocated after the playlist")
+    if lazy_peak >= mono_peak or lazy_held >= mono_held:
+        failures.append("lazy loading does not use less memory")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Per-note benchmark - run on a computer, not on the RP2040
+
+Compares the CPU time per note of preparing the built-in songs:
+- before: songs written as (Hz, seconds) tuples, converted note by note with
+  a float logarithm (frequency to MIDI note) and float milliseconds
+- after: songs written as (note, ticks) tuples and compiled by Song.compile
+  with integer math only, including transposition
+
+The board prints the same measurement ("Compiled N notes in X us") each
+time a song starts, which is the number that matters on the RP2040.
+
+Usage:
+    python bench_notes.py [repeats]
+"""
+
+import math
+import os
+import sys
+import time
+
+from player import NOTE_FREQS, REST, load_song_module, packed_notes
+
+
+def frequency_to_midi(frequency):
+    """The float conversion songs needed before they were written in notes"""
+    if frequency == 0:
+        return REST
+    return int(69 + 12 * math.log(frequency / 440) / math.log(2) + 0.5)
+
+
+def pack_seconds(melody, packed):
+    """Pack (Hz, seconds) tuples the way songs were loaded before"""
+    for frequency, duration in melody:
+        packed.append(frequency_to_midi(frequency))
+        packed.append(int(duration * 1000 + 0.5))
+
+
+def per_note_us(function, notes, repeats):
+    start = time.perf_counter_ns()
+    for _ in range(repeats):
+        function()
+    return (time.perf_counter_ns() - start) / 1000 / repeats / notes
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    names = sorted(
+        name[:-3]
+        for name in os.listdir("songs")
+        if name.endswith(".py") and name != "__init__.py"
+    )
+    print(f"us per note ({repeats} repeats)   before    after  transposed")
+    for name in names:
+        song = load_song_module(name)
+        notes = sum(len(voice) for voice in song.voices) // 2
+        # The same song in the old (Hz, seconds) form
+        old_voices = [
+            [(NOTE_FREQS[note], ms / 1000) for note, ms in packed_notes(voice)]
+            for voice in song.compile()
+        ]
+
+        def before():
+            packed = []
+            for voice in old_voices:
+                pack_seconds(voice, packed)
+
+        before_us = per_note_us(before, notes, repeats)
+        after_us = per_note_us(lambda: song.compile(), notes, repeats)
+        transposed_us = per_note_us(lambda: song.compile(150, 5), notes, repeats)
+        print(f"  {name:<28} {before_us:8.3f} {after_us:8.3f} {transposed_us:8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Song file parser check - run on a computer, not on the RP2040
+
+Writes RTTTL and MIDI files to a temporary folder and streams them through
+songfiles.song_notes, checking:
+- the notes and durations that come out, including tempo changes
+- Type-1 files: the tempo track is followed while the first track with
+  notes is played (a drum-only track is skipped)
+- Type-2 files and files without notes are rejected with a clear message
+- peak memory while streaming a large file (100,000 notes) is no more than
+  for a small one, so songs of any length fit on the board (the fixed limit
+  allows for CPython's file objects and frames; the board needs far less)
+
+Usage:
+    python check_songfiles.py
+"""
+
+import os
+import sys
+import tempfile
+import tracemalloc
+
+from songfiles import song_notes
+
+DIVISION = 480  # ticks per quarter note
+SMALL = 1000
+LARGE = 100000
+PEAK_LIMIT = 16384  # bytes
+
+
+def varlen(value):
+    out = [value & 0x7F]
+    value >>= 7
+    while value:
+        out.insert(0, (value & 0x7F) | 0x80)
+        value >>= 7
+    return bytes(out)
+
+
+def tempo_event(delta, tempo):
+    return varlen(delta) + b"\xff\x51\x03" + tempo.to_bytes(3, "big")
+
+
+def end_of_track():
+    return b"\x00\xff\x2f\x00"
+
+
+def chunk(chunk_id, data):
+    return chunk_id + len(data).to_bytes(4, "big") + data
+
+
+def write_midi(path, midi_format, tracks):
+    header = midi_format.to_bytes(2, "big") + len(tracks).to_bytes(2, "big")
+    header += DIVISION.to_bytes(2, "big")
+    with open(path, "wb") as f:
+        f.write(chunk(b"MThd", header))
+        for events in tracks:
+            f.write(chunk(b"MTrk", b"".join(events) + end_of_track()))
+
+
+def note_events(count, channel=0, tempo_at=None):
+    """Eighth notes (240 ticks) back to back, using running status for the
+    note-offs (note-on with velocity 0); tempo doubles at note tempo_at"""
+    for i in range(count):
+        if i == tempo_at:
+            yield tempo_event(0, 250000)
+        note = 60 + i % 12
+        yield bytes((0x00, 0x90 | channel, note, 100))
+        yield varlen(240) + bytes((note, 0))
+
+
+def expected_ms(count, tempo_at=None):
+    for i in range(count):
+        yield 60 + i % 12, 250 if tempo_at is None or i < tempo_at else 125
+
+
+def compare(path, expected):
+    """Stream a file and compare it with the expected pairs without
+    keeping either in memory; returns an error or None"""
+    count = 0
+    expected = iter(expected)
+    for pair in song_notes(path):
+        want = next(expected, None)
+        if pair != want:
+            return f"{os.path.basename(path)}: note {count} is {pair}, expected {want}"
+        count += 1
+    if next(expected, None) is not None:
+        return f"{os.path.basename(path)}: only {count} notes"
+    return None
+
+
+def stream_peak(path):
+    """Peak bytes allocated while streaming a file"""
+    tracemalloc.start()
+    for _ in song_notes(path):
+        pass
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def write_rtttl(path, count):
+    with open(path, "w") as f:
+        f.write("big:d=8,o=5,b=120:")
+        f.write(",".join("c,e,g,p"[i % 4 * 2] for i in range(count)))
+
+
+def main():
+    failures = []
+    with tempfile.TemporaryDirectory() as folder:
+        def path(name):
+            return os.path.join(folder, name)
+
+        # Type 0: one track with notes and a tempo change
+        for count in (SMALL, LARGE):
+            write_midi(path(f"type0_{count}.mid"), 0, [note_events(count, tempo_at=count // 2)])
+        # Type 1: tempo map, drums, then the melody
+        for count in (SMALL, LARGE):
+            tempo_track = [b"\x00\xff\x03\x05Tempo", tempo_event(240 * (count // 2), 250000)]
+            drums = list(note_events(4, channel=9))
+            write_midi(path(f"type1_{count}.mid"), 1, [tempo_track, drums, note_events(count)])
+        write_midi(path("type2.mid"), 2, [note_events(4)])
+        write_midi(path("drums.mid"), 1, [[tempo_event(0, 500000)], note_events(4, channel=9)])
+        for count in (SMALL, LARGE):
+            write_rtttl(path(f"rtttl_{count}.rtttl"), count)
+
+        for count in (SMALL, LARGE):
+            for name in (f"type0_{count}.mid", f"type1_{count}.mid"):
+                size = os.path.getsize(path(name))
+                print(f"{name}: {size} bytes")
+                failures.append(compare(path(name), expected_ms(count, tempo_at=count // 2)))
+
+        for name in ("type2.mid", "drums.mid"):
+            try:
+                for _ in song_notes(path(name)):
+                    pass
+                failures.append(f"{name}: was not rejected")
+            except ValueError as e:
+                print(f"{name}: {e}")
+
+        print(f"peak bytes while streaming   {SMALL:>7} notes {LARGE:>7} notes")
+        for kind, extension in (("type0", "mid"), ("type1", "mid"), ("rtttl", "rtttl")):
+            small = stream_peak(path(f"{kind}_{SMALL}.{extension}"))
+            large = stream_peak(path(f"{kind}_{LARGE}.{extension}"))
+            print(f"  {kind:<26} {small:13} {large:13}")
+            if large > PEAK_LIMIT or large > small + 256:
+                failures.append(f"{kind}: peak {large} bytes for {LARGE} notes (limit {PEAK_LIMIT})")
+
+    failures = [f for f in failures if f]
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
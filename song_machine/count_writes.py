@@ -0,0 +1,119 @@
+"""
+PWM write counter - run on a computer, not on the RP2040
+
+Plays every built-in song in songs/ into fake PWMOut objects (no timing,
+no hardware) and counts the frequency and duty_cycle register writes, once
+writing both registers for every note like the original player did, and
+once replaying the compile_writes event list the player uses now.
+
+Usage:
+    python count_writes.py [--two-voice]
+"""
+
+import os
+import sys
+
+from player import (
+    ALL_CHANNELS,
+    DUTY_ON,
+    NOTE_FREQS,
+    REST,
+    Player,
+    compile_timeline,
+    compile_writes,
+    load_song_module,
+)
+
+ARTICULATION_GAP = 10
+BUZZERS = 2
+
+
+class FakePWM:
+    """Stands in for pwmio.PWMOut and counts register writes"""
+
+    def __init__(self):
+        self.frequency_writes = 0
+        self.duty_writes = 0
+        self._frequency = 0
+        self._duty_cycle = 0
+
+    @property
+    def frequency(self):
+        return self._frequency
+
+    @frequency.setter
+    def frequency(self, value):
+        self.frequency_writes += 1
+        self._frequency = value
+
+    @property
+    def duty_cycle(self):
+        return self._duty_cycle
+
+    @duty_cycle.setter
+    def duty_cycle(self, value):
+        self.duty_writes += 1
+        self._duty_cycle = value
+
+
+def count_naive(timeline):
+    """Writes made by setting both registers on every note of the timeline"""
+    buzzers = [FakePWM() for _ in range(BUZZERS)]
+    for i in range(1, len(timeline), 2):
+        mask = timeline[i] >> 8
+        note = timeline[i] & 0xFF
+        for channel, buzzer in enumerate(buzzers):
+            if mask & (1 << channel):
+                if note == REST:
+                    buzzer.duty_cycle = 0
+                else:
+                    buzzer.frequency = NOTE_FREQS[note]
+                    buzzer.duty_cycle = DUTY_ON
+    for buzzer in buzzers:
+        buzzer.duty_cycle = 0
+    return buzzers
+
+
+def count_compiled(events):
+    """Writes made by the player replaying a compile_writes event list"""
+    buzzers = [FakePWM() for _ in range(BUZZERS)]
+    player = Player(buzzers)
+    for i in range(1, len(events), 2):
+        if events[i]:
+            player.apply(events[i])
+    player.set_tone(ALL_CHANNELS, REST)
+    return buzzers
+
+
+def totals(buzzers):
+    frequency = sum(b.frequency_writes for b in buzzers)
+    duty = sum(b.duty_writes for b in buzzers)
+    return frequency, duty
+
+
+def main():
+    two_voice = "--two-voice" in sys.argv[1:]
+    names = sorted(
+        name[:-3]
+        for name in os.listdir("songs")
+        if name.endswith(".py") and name != "__init__.py"
+    )
+    print("                       before (freq+duty)   after (freq+duty)")
+    all_before = all_after = 0
+    for name in names:
+        voices = load_song_module(name).compile(count=2 if two_voice else 1)
+        timeline = compile_timeline(voices, ARTICULATION_GAP)
+        events = compile_writes(timeline, BUZZERS)
+        before = totals(count_naive(timeline))
+        after = totals(count_compiled(events))
+        all_before += sum(before)
+        all_after += sum(after)
+        print(
+            f"  {name:<16} {sum(before):6d} ({before[0]:4d}+{before[1]:4d})"
+            f"   {sum(after):6d} ({after[0]:4d}+{after[1]:4d})"
+        )
+    print(f"  {'total':<16} {all_before:6d}               {all_after:6d}")
+
+
+if __name__ == "__main__":
+    main()
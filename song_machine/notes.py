@@ -0,0 +1,51 @@
+"""
+Song Machine - Notes
+Note numbers and durations shared by the song modules in songs/
+"""
+
+# Notes are MIDI note numbers (middle C = 60), so transposing a song is
+# just adding semitones. The player looks up their frequencies in Hz.
+NOTE_C3 = 48
+NOTE_D3 = 50
+NOTE_E3 = 52
+NOTE_A3 = 57
+NOTE_C4 = 60
+NOTE_D4 = 62
+NOTE_E4 = 64
+NOTE_F4 = 65
+NOTE_G4 = 67
+NOTE_A4 = 69
+NOTE_B4 = 71
+NOTE_C5 = 72
+NOTE_D5 = 74
+NOTE_E5 = 76
+NOTE_F5 = 77
+NOTE_G5 = 79
+NOTE_A5 = 81
+NOTE_B5 = 83
+NOTE_C6 = 84
+NOTE_D6 = 86
+NOTE_E6 = 88
+NOTE_F6 = 89
+NOTE_G6 = 91
+NOTE_A6 = 93
+NOTE_REST = 0
+
+# Durations are in ticks, TICKS_PER_BEAT to a beat. Each song sets its BPM,
+# and the player converts ticks to milliseconds when the song is loaded.
+TICKS_PER_BEAT = 60
+
+# Durations for Mario and the Imperial March (BPM = 200)
+EIGHTH = 30
+QUARTER = 60
+QUARTER_DOT = 90
+HALF = 120
+HALF_DOT = 180
+
+# Durations for the fast songs (BPM = 300). These keep the original lively
+# feel: the eighths and sixteenths are a little longer than an exact
+# half and quarter of a beat.
+FAST_SIXTEENTH = 24
+FAST_EIGHTH = 36
+FAST_QUARTER = 60
+FAST_HALF = 120
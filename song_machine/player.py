@@ -0,0 +1,613 @@
+"""
+Song Machine - Non-blocking player
+Plays packed melodies on passive buzzers as a CircuitPython asyncio task,
+so other tasks (buttons, LEDs, ...) keep running while music plays.
+
+Packed song format: an array('H') of (note, duration) pairs, where note is
+a MIDI note number (0 = rest) looked up in NOTE_FREQS when played. Each note
+costs 4 bytes instead of a tuple and its number objects. Built-in songs are
+kept in beat ticks and compiled to milliseconds (and transposed) when they
+are loaded, so playback only does integer math.
+
+A song has one or two voices. Before playing, its voices are merged into a
+single time-sorted timeline so one scheduler switches both buzzers on time,
+and the timeline is reduced to the PWM register writes it actually needs.
+Songs stored as files are streamed note by note instead (see songfiles.py).
+
+WavetablePlayer is an alternative backend that plays rendered samples
+(see wavetable.py) through audiopwmio instead of square waves through pwmio.
+"""
+
+import array
+import gc
+import sys
+import time
+
+import asyncio
+from songfiles import song_notes
+
+REST = 0
+DUTY_ON = 32768  # 50% duty cycle
+ALL_CHANNELS = 0xFF
+
+# Register writes in a compiled event (see compile_writes)
+WRITE_FREQ = 0x100
+WRITE_DUTY = 0x200
+
+
+def midi_to_frequency(note):
+    """Equal-tempered frequency (Hz, rounded) of a MIDI note number"""
+    return int(440 * 2 ** ((note - 69) / 12) + 0.5)
+
+
+def transpose_note(note, semitones):
+    """Shift a note by semitones, keeping rests and staying in MIDI range"""
+    if note == REST:
+        return REST
+    return min(max(note + semitones, 1), 127)
+
+
+def pack_melody(melody):
+    """Convert a list of (note, duration) tuples to the packed format"""
+    packed = array.array("H")
+    for note, duration in melody:
+        packed.append(note)
+        packed.append(duration)
+    return packed
+
+
+NOTE_FREQS = array.array("H", [0] + [midi_to_frequency(n) for n in range(1, 128)])
+
+
+class Song:
+    """A built-in song: packed (note, ticks) voices and its tempo
+
+    compile() converts ticks to milliseconds and transposes the notes in one
+    pass with integer math. Note ends are computed from the running tick
+    count, so rounding never accumulates. A tempo or pitch change only
+    recompiles the song that is playing.
+    """
+
+    def __init__(self, voices, bpm, ticks_per_beat):
+        self.voices = voices
+        self.bpm = bpm
+        self.ticks_per_beat = ticks_per_beat
+
+    def compile(self, tempo=100, transpose=0, count=2):
+        """Packed (note, ms) voices at tempo percent of BPM, shifted by transpose
+
+        count limits how many voices are compiled.
+        """
+        scale = self.bpm * tempo * self.ticks_per_beat
+        compiled = []
+        for voice in self.voices[:count]:
+            packed = array.array("H", bytes(2 * len(voice)))
+            ticks = 0
+            ms = 0
+            for i in range(0, len(voice), 2):
+                ticks += voice[i + 1]
+                end = ticks * 6000000 // scale  # 60000 ms per minute * 100 %
+                note = voice[i]
+                if note and transpose:
+                    note = min(max(note + transpose, 1), 127)
+                packed[i] = note
+                packed[i + 1] = end - ms
+                ms = end
+            compiled.append(packed)
+        return tuple(compiled)
+
+
+def load_song_module(name):
+    """Import songs/<name>.py as a Song and release the module
+
+    Song modules set BPM and define MELODY and optionally BASS as lists of
+    (note, ticks) tuples. Only the packed arrays are kept.
+    """
+    module_name = "songs." + name
+    __import__(module_name)
+    module = sys.modules[module_name]
+    voices = [pack_melody(module.MELODY)]
+    if hasattr(module, "BASS"):
+        voices.append(pack_melody(module.BASS))
+    song = Song(tuple(voices), module.BPM, module.TICKS_PER_BEAT)
+    # Drop every reference to the module so its lists can be collected
+    del sys.modules[module_name]
+    try:
+        delattr(sys.modules["songs"], name)
+    except (AttributeError, KeyError):
+        pass
+    module = None
+    gc.collect()
+    return song
+
+
+def packed_notes(melody):
+    """Iterate over the (note, ms) pairs of a packed voice"""
+    for i in range(0, len(melody), 2):
+        yield melody[i], melody[i + 1]
+
+
+def voice_events(melody, mask, gap):
+    """Note-on/off events of one packed voice and the voice length in ms"""
+    events = array.array("L")
+    t = 0
+    for i in range(0, len(melody), 2):
+        note = melody[i]
+        duration = melody[i + 1]
+        events.append(t)
+        events.append(mask << 8 | note)
+        if note and gap and duration > gap:
+            # Release slightly early so repeated notes are heard separately
+            events.append(t + duration - gap)
+            events.append(mask << 8 | REST)
+        t += duration
+    return events, t
+
+
+def compile_timeline(voices, gap):
+    """Merge the packed voices of a song into one time-sorted timeline
+
+    Returns an array('L') of (time_ms, channel_mask << 8 | note) pairs, where
+    bit n of channel_mask selects buzzer n, ending with a (song_length, 0)
+    marker. A single voice is sent to every buzzer; with two voices the first
+    plays on buzzer 0 and the second on buzzer 1.
+    """
+    if len(voices) == 1:
+        timeline, end = voice_events(voices[0], ALL_CHANNELS, gap)
+    else:
+        a, end_a = voice_events(voices[0], 1, gap)
+        b, end_b = voice_events(voices[1], 2, gap)
+        end = max(end_a, end_b)
+        timeline = array.array("L")
+        i = j = 0
+        while i < len(a) or j < len(b):
+            if j >= len(b) or (i < len(a) and a[i] <= b[j]):
+                timeline.append(a[i])
+                timeline.append(a[i + 1])
+                i += 2
+            else:
+                timeline.append(b[j])
+                timeline.append(b[j + 1])
+                j += 2
+    timeline.append(end)
+    timeline.append(0)
+    return timeline
+
+
+def compile_writes(timeline, channels):
+    """Reduce a timeline to the PWM register writes it needs
+
+    Returns an array('L') of (time_ms, channel_mask << 16 | writes | note)
+    pairs, where writes is WRITE_FREQ and/or WRITE_DUTY, ending with the
+    same (song_length, 0) marker. Each channel's frequency is only written
+    when it changes (a repeated note just turns the duty cycle back on), and
+    a rest on a channel that is already silent is dropped. Channels needing
+    the same writes at the same time share one event. A note that needs no
+    write at all (a repeated note with no articulation gap) still gets an
+    event with no writes, so the player reports every note start.
+    """
+    frequencies = [-1] * channels  # -1 = unknown at the start of the song
+    sounding = [False] * channels
+    flags = [0] * channels
+    events = array.array("L")
+    for i in range(0, len(timeline) - 2, 2):
+        word = timeline[i + 1]
+        mask = word >> 8
+        note = word & 0xFF
+        frequency = NOTE_FREQS[note]
+        for channel in range(channels):
+            writes = 0
+            if mask & (1 << channel):
+                if note:
+                    if frequencies[channel] != frequency:
+                        writes |= WRITE_FREQ
+                        frequencies[channel] = frequency
+                    if not sounding[channel]:
+                        writes |= WRITE_DUTY
+                        sounding[channel] = True
+                elif sounding[channel]:
+                    writes |= WRITE_DUTY
+                    sounding[channel] = False
+            flags[channel] = writes
+        for writes in (WRITE_FREQ | WRITE_DUTY, WRITE_FREQ, WRITE_DUTY, 0):
+            group = 0
+            for channel in range(channels):
+                if flags[channel] == writes and (writes or note and mask & (1 << channel)):
+                    group |= 1 << channel
+            if group:
+                events.append(timeline[i])
+                events.append(group << 16 | writes | note)
+
+    # Silence anything still sounding when the song ends
+    end = timeline[len(timeline) - 2]
+    group = 0
+    for channel in range(channels):
+        if sounding[channel]:
+            group |= 1 << channel
+    if group:
+        events.append(end)
+        events.append(group << 16 | WRITE_DUTY | REST)
+    events.append(end)
+    events.append(0)
+    return events
+
+
+class Player:
+    """Plays songs on a set of PWMOut buzzers
+
+    Every event is an absolute deadline measured from the start of the song,
+    so time spent writing PWM registers or running other tasks is absorbed
+    instead of accumulating. pause(), resume(), skip() and stop() may be
+    called from any other task and take effect within control_latency
+    seconds; time spent paused does not count against the song. Between
+    songs, pause() holds the gap, skip() ends it and skips the next song and
+    stop() ends the playlist before the next song starts.
+    set_tempo() and set_transpose() apply from the next note.
+    """
+
+    def __init__(
+        self,
+        buzzers,
+        articulation_gap=10,
+        control_latency=0.05,
+        two_voice=False,
+        on_note=None,
+    ):
+        self.buzzers = buzzers
+        self.articulation_gap = articulation_gap  # ms of silence ending each note
+        self.control_latency_ms = int(control_latency * 1000)
+        self.two_voice = two_voice  # False = play only the melody, on every buzzer
+        self.on_note = on_note  # called as on_note(channel_mask, note) per note start
+        self.frequencies = [REST] * len(buzzers)  # tone of each buzzer, for restore()
+        self.pwm_frequencies = [REST] * len(buzzers)  # last frequency written
+        self.start_ns = 0
+        self.paused = False
+        self.paused_ns = 0  # when pause() was called
+        self.skipping = False
+        self.stopped = False
+        self.resumed = asyncio.Event()
+        self.tempo = 100  # percent of each song's BPM
+        self.transpose = 0  # semitones
+        self.retune = False
+
+    def pause(self):
+        """Silence the buzzers and hold the current song position"""
+        if not self.paused:
+            self.paused = True
+            self.paused_ns = time.monotonic_ns()
+
+    def resume(self):
+        """Continue a paused song where it left off"""
+        if self.paused:
+            # Shift the song start so paused time doesn't count, from the
+            # pause() call (or the song start, if it came up while paused)
+            self.start_ns += time.monotonic_ns() - max(self.paused_ns, self.start_ns)
+            self.paused = False
+        self.resumed.set()
+
+    def skip(self):
+        """End the current song and move on to the next one"""
+        self.skipping = True
+        self.resume()
+
+    def stop(self):
+        """End the current song and the playlist"""
+        self.stopped = True
+        self.resume()
+
+    def set_tempo(self, percent):
+        """Play at percent of each song's own tempo"""
+        if percent <= 0:
+            raise ValueError(f"tempo must be above 0 percent, not {percent}")
+        self.tempo = percent
+        self.retune = True
+
+    def set_transpose(self, semitones):
+        """Shift every note up (or down, if negative) by semitones"""
+        self.transpose = semitones
+        self.retune = True
+
+    def set_tone(self, mask, frequency):
+        """Start a tone on the buzzers selected by mask, or silence them for REST
+
+        Registers that already hold the right value are not written again.
+        """
+        for channel, buzzer in enumerate(self.buzzers):
+            if mask & (1 << channel):
+                if frequency == REST:
+                    if self.frequencies[channel] != REST:
+                        buzzer.duty_cycle = 0  # Silence
+                else:
+                    if self.pwm_frequencies[channel] != frequency:
+                        buzzer.frequency = frequency
+                        self.pwm_frequencies[channel] = frequency
+                    if self.frequencies[channel] == REST:
+                        buzzer.duty_cycle = DUTY_ON
+                self.frequencies[channel] = frequency
+
+    def apply(self, event):
+        """Perform the register writes of one compile_writes event"""
+        mask = event >> 16
+        note = event & 0xFF
+        frequency = NOTE_FREQS[note]
+        for channel, buzzer in enumerate(self.buzzers):
+            if mask & (1 << channel):
+                if event & WRITE_FREQ:
+                    buzzer.frequency = frequency
+                    self.pwm_frequencies[channel] = frequency
+                if event & WRITE_DUTY:
+                    buzzer.duty_cycle = DUTY_ON if note else 0
+                self.frequencies[channel] = frequency
+
+    def silence(self):
+        for buzzer in self.buzzers:
+            buzzer.duty_cycle = 0
+
+    def restore(self):
+        for channel, frequency in enumerate(self.frequencies):
+            if frequency != REST:
+                self.buzzers[channel].duty_cycle = DUTY_ON
+
+    async def wait_until(self, offset_ms):
+        """Sleep until offset_ms into the song; False if skipped or stopped"""
+        while True:
+            if self.paused:
+                self.silence()
+                self.resumed.clear()
+                await self.resumed.wait()
+                if not (self.skipping or self.stopped):
+                    self.restore()
+            if self.skipping or self.stopped:
+                return False
+            remaining = self.start_ns + offset_ms * 1000000 - time.monotonic_ns()
+            # Sleeps only resolve whole ms: round to the nearest one, so a
+            # deadline off the ms grid is met within half a ms either way
+            # instead of always up to a whole ms late
+            wait_ms = (remaining + 500000) // 1000000
+            if wait_ms <= 0:
+                return True
+            await asyncio.sleep_ms(min(wait_ms, self.control_latency_ms))
+
+    def seek(self, events, position):
+        """Set the buzzers to what events has them play at position ms
+
+        Returns the index of the first event after position. Used after a
+        tempo or pitch change: the articulation gap does not scale with the
+        tempo, so the event that just came due can land on either side of
+        position in the new list and can't simply be replayed. Notes this
+        starts are reported to on_note.
+        """
+        notes = [REST] * len(self.buzzers)
+        i = 0
+        while i < len(events) - 2 and events[i] <= position:
+            event = events[i + 1]
+            for channel in range(len(notes)):
+                if event >> 16 & (1 << channel):
+                    notes[channel] = event & 0xFF
+            i += 2
+        started = 0
+        for channel, note in enumerate(notes):
+            if NOTE_FREQS[note] != self.frequencies[channel]:
+                self.set_tone(1 << channel, NOTE_FREQS[note])
+                if note:
+                    started |= 1 << channel
+        # Report each started note once, with all the buzzers playing it
+        for channel, note in enumerate(notes):
+            if started & (1 << channel) and self.on_note:
+                mask = 0
+                for other in range(channel, len(notes)):
+                    if started & (1 << other) and notes[other] == note:
+                        mask |= 1 << other
+                started &= ~mask
+                self.on_note(mask, note)
+        return i
+
+    def compile(self, song):
+        """Compile a Song at the current tempo and pitch into register writes"""
+        voices = song.compile(self.tempo, self.transpose, 2 if self.two_voice else 1)
+        return compile_writes(
+            compile_timeline(voices, self.articulation_gap),
+            len(self.buzzers),
+        )
+
+    async def play(self, events, song=None):
+        """Play the output of compile_writes; returns False if skipped or stopped
+
+        If song is given, a tempo or pitch change recompiles it and playback
+        continues from the same point in the music.
+        """
+        self.retune = False
+        self.start_ns = time.monotonic_ns()
+        tempo = self.tempo
+        resync = False
+        completed = True
+        i = 0
+        while i < len(events):
+            if not await self.wait_until(events[i]):
+                completed = False
+                break
+            if self.retune and song:
+                self.retune = False
+                # Same place in the music, in milliseconds at the new tempo
+                position = events[i] * tempo // self.tempo
+                tempo = self.tempo
+                events = None
+                events = self.compile(song)
+                self.start_ns = time.monotonic_ns() - position * 1000000
+                i = self.seek(events, position)
+                # The new event list assumes it started from silence
+                resync = True
+                continue
+            event = events[i + 1]
+            if event:
+                note = event & 0xFF
+                if resync:
+                    self.set_tone(event >> 16, NOTE_FREQS[note])
+                else:
+                    self.apply(event)
+                if note and self.on_note:
+                    self.on_note(event >> 16, note)
+            i += 2
+        self.set_tone(ALL_CHANNELS, REST)
+        return completed
+
+    async def play_song(self, song):
+        """Play a Song; returns False if skipped or stopped"""
+        start = time.monotonic_ns()
+        events = self.compile(song)
+        notes = sum(len(voice) for voice in song.voices) // 2
+        print(f"Compiled {notes} notes in {(time.monotonic_ns() - start) // 1000} us")
+        return await self.play(events, song)
+
+    def adjust(self, notes):
+        """Apply the current tempo and pitch to (note, ms) pairs as they are read"""
+        try:
+            for note, duration in notes:
+                yield transpose_note(note, self.transpose), duration * 100 // self.tempo
+        finally:
+            notes.close()
+
+    async def play_notes(self, notes):
+        """Play (note, ms) pairs from an iterator, such as a song file parser
+
+        Notes are fetched one at a time, so a song of any length plays in
+        constant memory. Every buzzer plays the single voice.
+        """
+        self.start_ns = time.monotonic_ns()
+        offset = 0
+        gap = self.articulation_gap
+        completed = False
+        try:
+            for note, duration in notes:
+                if not await self.wait_until(offset):
+                    break
+                self.set_tone(ALL_CHANNELS, NOTE_FREQS[note])
+                if note and self.on_note:
+                    self.on_note(ALL_CHANNELS, note)
+                if note and gap and duration > gap:
+                    # Release slightly early so repeated notes are heard separately
+                    if not await self.wait_until(offset + duration - gap):
+                        break
+                    self.set_tone(ALL_CHANNELS, REST)
+                offset += duration
+            else:
+                completed = await self.wait_until(offset)
+        finally:
+            # Close the song file even if playback was cut short
+            notes.close()
+        self.set_tone(ALL_CHANNELS, REST)
+        return completed
+
+    async def run(self, songs, song_gap=2.0):
+        """Play a list of songs in a loop until stopped
+
+        Each song is (name, source) where source is a Song, the name of a
+        module in the songs package (loaded just for that song), or the path
+        of a song file (streamed while it plays).
+        """
+        self.stopped = False
+        self.skipping = False
+        while not self.stopped:
+            for song_name, source in songs:
+                if self.stopped:
+                    break
+                print(f"Now Playing: {song_name}")
+                print("-" * 40)
+
+                if self.skipping:
+                    # skip() came during the pause before this song: move
+                    # straight on to the next one
+                    self.skipping = False
+                    print(f"» {song_name} skipped\n")
+                    continue
+
+                try:
+                    if isinstance(source, str) and "/" in source:
+                        completed = await self.play_notes(self.adjust(song_notes(source)))
+                    else:
+                        song = source
+                        if isinstance(source, str):
+                            song = load_song_module(source)
+                            print(f"Heap free while playing: {gc.mem_free()} bytes")
+                        completed = await self.play_song(song)
+                except (ImportError, OSError, ValueError) as e:
+                    print(f"✗ Can't play {song_name}: {e}\n")
+                    continue
+                self.skipping = False
+                if completed:
+                    print(f"✓ {song_name} complete\n")
+                else:
+                    print(f"» {song_name} skipped\n")
+                song = None
+                gc.collect()
+                if self.stopped:
+                    break
+
+                # Pause between songs, on a deadline like the notes, so
+                # pause() holds it and skip() or stop() ends it. A skip
+                # carries over to the next song, which is not played.
+                self.start_ns = time.monotonic_ns()
+                await self.wait_until(int(song_gap * 1000))
+
+
+class WavetablePlayer(Player):
+    """Plays songs as rendered samples through an audio output
+
+    audio is an audiopwmio.PWMAudioOut and synth a wavetable.Synth that wraps
+    its buffers in audiocore.RawSample. DMA feeds each sample to the pin, so
+    the CPU only wakes to start the next note, and the next note is rendered
+    (or fetched from the synth's cache) while the current one is playing.
+    Only the melody is played.
+    """
+
+    def __init__(self, audio, synth, articulation_gap=10, control_latency=0.05, on_note=None):
+        super().__init__(
+            (),
+            articulation_gap=articulation_gap,
+            control_latency=control_latency,
+            on_note=on_note,
+        )
+        self.audio = audio
+        self.synth = synth
+
+    def silence(self):
+        if self.audio.playing:
+            self.audio.pause()
+
+    def restore(self):
+        if self.audio.paused:
+            self.audio.resume()
+
+    async def play_song(self, song):
+        melody = song.compile(count=1)[0]
+        return await self.play_notes(self.adjust(packed_notes(melody)))
+
+    async def play_notes(self, notes):
+        """Play (note, ms) pairs from an iterator as rendered samples"""
+        self.start_ns = time.monotonic_ns()
+        offset = 0
+        gap = self.articulation_gap
+        completed = False
+        try:
+            for note, duration in notes:
+                sample = None
+                if note:
+                    if gap and duration > gap:
+                        # The sample ends early so repeated notes are heard separately
+                        duration_on = duration - gap
+                    else:
+                        duration_on = duration
+                    sample = self.synth.note(NOTE_FREQS[note], duration_on)
+                if not await self.wait_until(offset):
+                    break
+                if sample is not None:
+                    self.audio.play(sample)
+                    if self.on_note:
+                        self.on_note(ALL_CHANNELS, note)
+                offset += duration
+            else:
+                completed = await self.wait_until(offset)
+        finally:
+            notes.close()
+        self.audio.stop()
+        return completed
@@ -0,0 +1,106 @@
+"""
+WAV renderer - run on a computer, not on the RP2040
+
+Renders the built-in songs in songs/ with the same wavetable.Synth buffers
+that WavetablePlayer plays, laid out on the song's timeline, and writes one
+8-bit mono WAV file per song. With --compare, the new renders are checked
+against WAV files saved earlier instead, so a change to wavetable.py or a
+song can be compared sample for sample.
+
+Usage:
+    python render_wav.py [--out DIR] [--compare DIR] [song ...]
+"""
+
+import os
+import sys
+import wave
+
+from player import NOTE_FREQS, load_song_module, packed_notes
+from wavetable import SAMPLE_RATE, Synth
+
+ARTICULATION_GAP = 10
+
+
+def render_song(synth, melody, gap=ARTICULATION_GAP):
+    """Samples of a packed melody as unsigned 8-bit WAV frames"""
+    frames = bytearray()
+    for note, duration in packed_notes(melody):
+        count = duration * synth.sample_rate // 1000
+        start = len(frames)
+        if note:
+            duration_on = duration - gap if gap and duration > gap else duration
+            for value in synth.note(NOTE_FREQS[note], duration_on):
+                frames.append(value + 128)
+        # The rest of the note's slot is silence
+        frames.extend(b"\x80" * (count - (len(frames) - start)))
+    return frames
+
+
+def write_wav(path, frames):
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(1)
+        f.setframerate(SAMPLE_RATE)
+        f.writeframes(frames)
+
+
+def read_wav(path):
+    with wave.open(path, "rb") as f:
+        return f.readframes(f.getnframes())
+
+
+def compare(frames, path):
+    """Describe how frames differ from a saved WAV file, or None if identical"""
+    try:
+        saved = read_wav(path)
+    except FileNotFoundError:
+        return "no saved render"
+    for i in range(min(len(frames), len(saved))):
+        if frames[i] != saved[i]:
+            return f"differs from {i * 1000 // SAMPLE_RATE} ms"
+    if len(frames) != len(saved):
+        return f"length {len(frames)} samples, saved {len(saved)}"
+    return None
+
+
+def main():
+    args = sys.argv[1:]
+    out_dir = "renders"
+    compare_dir = None
+    names = []
+    while args:
+        arg = args.pop(0)
+        if arg == "--out":
+            out_dir = args.pop(0)
+        elif arg == "--compare":
+            compare_dir = args.pop(0)
+        else:
+            names.append(arg)
+    if not names:
+        names = sorted(
+            name[:-3]
+            for name in os.listdir("songs")
+            if name.endswith(".py") and name != "__init__.py"
+        )
+
+    synth = Synth()
+    failed = 0
+    for name in names:
+        melody = load_song_module(name).compile(count=1)[0]
+        frames = render_song(synth, melody)
+        if compare_dir:
+            result = compare(frames, os.path.join(compare_dir, name + ".wav"))
+            print(f"  {name:<16} {result or 'identical'}")
+            failed += result is not None
+        else:
+            os.makedirs(out_dir, exist_ok=True)
+            path = os.path.join(out_dir, name + ".wav")
+            write_wav(path, frames)
+            print(f"  {name:<16} {len(frames) / SAMPLE_RATE:6.2f} s -> {path}")
+    print(f"Synth cache: {synth.hits} hits, {synth.misses} misses")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,815 @@
+"""
+Song Machine simulator - run on a computer, not on the RP2040
+
+Runs code.py unchanged against fake board, pwmio and time modules and a
+small asyncio stand-in driven by a virtual clock, so the whole playlist
+plays in a fraction of a second. Every frequency and duty_cycle write is
+recorded with its virtual timestamp. For each song, the note onsets
+(time, pin, frequency) and total duration are compared with the golden
+files in golden/, and the recording can be rendered to WAV files.
+
+Every PWM register write and every printed line also costs time on the
+virtual clock (WRITE_US, PRINT_US). The playlist is played once without
+those costs, which is the ideal schedule, and once with them; the onsets
+of the two runs are compared to check that the costs don't add up to
+drift.
+
+Usage:
+    python simulate.py [--two-voice] [--controls | --retune | --on-note] [--update] [--wav DIR]
+                       [--verbose]
+
+    --two-voice  play with player.two_voice set (golden files in golden/two_voice/
+                 for the songs it changes, golden/ for the others)
+    --controls   instead, pause, skip and stop from another task (see CONTROLS)
+                 and check the effect on the music against the ideal run
+    --retune     instead, change the tempo or pitch in the middle of a song
+                 (see RETUNES) and check every note against ideal runs at the
+                 old and new settings
+    --on-note    instead, check that on_note is called once for every note,
+                 with the articulation gap of code.py and with none
+    --update     write the golden files instead of comparing against them
+    --wav DIR    write one WAV file per song to DIR
+    --verbose    show the program's console output
+"""
+
+import gc as real_gc
+import heapq
+import io
+import json
+import os
+import sys
+import time
+import types
+import wave
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+GOLDEN_DIR = os.path.join(HERE, "golden")
+TOLERANCE_MS = 1
+ARTICULATION_GAP = 10  # as in code.py
+WAV_RATE = 22050
+
+# Player calls made by a task running next to the player in --controls
+# mode: (song number, ms after the song starts, method, *arguments). The
+# pause starts in the middle of a note, between the player's wake-ups.
+CONTROLS = (
+    (1, 1033, "pause"),
+    (1, 1733, "resume"),
+    (2, 1500, "skip"),
+    (3, 500, "stop"),
+)
+
+# Calls made in the pauses between songs, in a second --controls run:
+# (song number, ms after the song ends, method). They skip song 2, hold
+# the pause after song 3 for a second and stop before song 5.
+GAP_CONTROLS = (
+    (1, 1000, "skip"),
+    (3, 500, "pause"),
+    (3, 1500, "resume"),
+    (4, 1000, "stop"),
+)
+
+# Tempo and pitch changes in --retune mode, each made in a run of its own.
+# Mario's change at 1000 ms falls during E5 (900-1050 ms): at double tempo
+# its release (1040 ms) maps to 515 ms, before the new position (520 ms).
+RETUNES = (
+    (1, 1000, "set_tempo", 200),
+    (3, 2000, "set_tempo", 60),
+    (2, 1500, "set_transpose", 5),
+)
+
+# Simulated cost of one PWM register write (writing frequency reconfigures
+# the PWM slice) and of printing one line to the USB serial console
+WRITE_US = 40
+PRINT_US = 300
+
+
+class Simulation:
+    """Virtual clock, PWM write trace and song boundaries of one run"""
+
+    def __init__(self, costs=True):
+        self.ns = 0
+        self.trace = []  # (ns, pin, "frequency" or "duty_cycle", value)
+        # {"name", "start_ns", "play_ns", "end_ns", "trace_start", "trace_end"}
+        self.songs = []
+        self.playlist_length = None
+        self.player = None
+        self.gap_ms = 0  # SONG_GAP of code.py
+        self.playlist = []  # (title, source) of code.py
+        self.notes = []  # (ns, channel mask, note) of each on_note call
+        self.calls = []  # (ns, method) of the CONTROLS calls made
+        self.write_ns = WRITE_US * 1000 if costs else 0
+        self.print_ns = PRINT_US * 1000 if costs else 0
+
+    def write(self, pin, attribute, value):
+        """Record a PWM register write and charge its cost"""
+        if self.songs and "play_ns" not in self.songs[-1]:
+            # First write of a song: onsets count from the player's start
+            self.songs[-1]["play_ns"] = self.player.start_ns
+        self.trace.append((self.ns, pin, attribute, value))
+        self.ns += self.write_ns
+
+
+SIM = Simulation()
+
+
+# Fake time -------------------------------------------------------------------
+
+def monotonic_ns():
+    return SIM.ns
+
+
+def monotonic():
+    return SIM.ns / 1000000000
+
+
+def fake_sleep(seconds):
+    SIM.ns += round(seconds * 1000000000)
+
+
+# Fake pwmio ------------------------------------------------------------------
+
+class PWMOut:
+    def __init__(self, pin, *, duty_cycle=0, frequency=500, variable_frequency=False):
+        self.pin = pin
+        self._duty_cycle = duty_cycle
+        self._frequency = frequency
+
+    @property
+    def frequency(self):
+        return self._frequency
+
+    @frequency.setter
+    def frequency(self, value):
+        SIM.write(self.pin, "frequency", value)
+        self._frequency = value
+
+    @property
+    def duty_cycle(self):
+        return self._duty_cycle
+
+    @duty_cycle.setter
+    def duty_cycle(self, value):
+        SIM.write(self.pin, "duty_cycle", value)
+        self._duty_cycle = value
+
+    def deinit(self):
+        pass
+
+
+# Virtual-time asyncio ----------------------------------------------------------
+
+class Request:
+    """Yielded by a task to the loop: ("sleep", wake_ns) or ("event", Event)"""
+
+    def __init__(self, kind, arg):
+        self.kind = kind
+        self.arg = arg
+
+    def __await__(self):
+        yield self
+
+
+class Event:
+    def __init__(self):
+        self.flag = False
+        self.waiters = []
+
+    def set(self):
+        self.flag = True
+        LOOP.ready.extend(self.waiters)
+        self.waiters = []
+
+    def clear(self):
+        self.flag = False
+
+    def is_set(self):
+        return self.flag
+
+    async def wait(self):
+        if not self.flag:
+            await Request("event", self)
+
+
+class Task:
+    def __init__(self, coro):
+        self.coro = coro
+        self.done = Event()
+        self.result = None
+
+
+class Loop:
+    """Runs tasks in order, jumping the clock to the next sleeping task"""
+
+    def __init__(self):
+        self.ready = []
+        self.sleeping = []  # heap of (wake_ns, sequence, task)
+        self.sequence = 0
+
+    def spawn(self, coro):
+        task = Task(coro)
+        self.ready.append(task)
+        return task
+
+    def step(self, task):
+        try:
+            request = task.coro.send(None)
+        except StopIteration as e:
+            task.result = e.value
+            task.done.set()
+            return
+        if request.kind == "sleep":
+            heapq.heappush(self.sleeping, (request.arg, self.sequence, task))
+            self.sequence += 1
+        else:
+            request.arg.waiters.append(task)
+
+    def run(self, coro):
+        main = self.spawn(coro)
+        while not main.done.flag:
+            while self.ready:
+                self.step(self.ready.pop(0))
+            if main.done.flag:
+                break
+            if not self.sleeping:
+                raise RuntimeError("All tasks are waiting, nothing can wake them")
+            wake_ns, _, task = heapq.heappop(self.sleeping)
+            SIM.ns = max(SIM.ns, wake_ns)
+            self.ready.append(task)
+        return main.result
+
+
+LOOP = Loop()
+
+
+async def sleep_ms(ms):
+    await Request("sleep", SIM.ns + max(0, ms) * 1000000)
+
+
+async def sleep(seconds):
+    await Request("sleep", SIM.ns + max(0, round(seconds * 1000000000)))
+
+
+async def gather(*coros):
+    tasks = [LOOP.spawn(coro) for coro in coros]
+    for task in tasks:
+        await task.done.wait()
+    return [task.result for task in tasks]
+
+
+def create_task(coro):
+    return LOOP.spawn(coro)
+
+
+def run(coro):
+    return LOOP.run(coro)
+
+
+# Console -----------------------------------------------------------------------
+
+class Console(io.TextIOBase):
+    """Captures the program's output and marks where each song starts and ends"""
+
+    def __init__(self, echo):
+        self.echo = echo
+        self.line = ""
+
+    def write(self, text):
+        if self.echo:
+            sys.__stdout__.write(text)
+        self.line += text
+        while "\n" in self.line:
+            line, self.line = self.line.split("\n", 1)
+            self.handle(line)
+        return len(text)
+
+    def handle(self, line):
+        if line.startswith("Now Playing: "):
+            SIM.songs.append(
+                {
+                    "name": line[len("Now Playing: "):],
+                    "start_ns": SIM.ns,
+                    "trace": SIM.trace,
+                    "trace_start": len(SIM.trace),
+                }
+            )
+        elif line[:2] in ("✓ ", "» ", "✗ ") and SIM.songs and "end_ns" not in SIM.songs[-1]:
+            song = SIM.songs[-1]
+            song["end_ns"] = SIM.ns
+            song["trace_end"] = len(SIM.trace)
+            song["result"] = line
+            if len(SIM.songs) == SIM.playlist_length:
+                # One pass through the playlist is enough
+                SIM.player.stop()
+        SIM.ns += SIM.print_ns
+
+
+# Running code.py ---------------------------------------------------------------
+
+def fake_modules():
+    board = types.ModuleType("board")
+    for n in range(30):
+        setattr(board, f"GP{n}", f"GP{n}")
+    pwmio = types.ModuleType("pwmio")
+    pwmio.PWMOut = PWMOut
+    fake_time = types.ModuleType("time")
+    fake_time.monotonic_ns = monotonic_ns
+    fake_time.monotonic = monotonic
+    fake_time.sleep = fake_sleep
+    fake_gc = types.ModuleType("gc")
+    fake_gc.collect = real_gc.collect
+    fake_gc.mem_free = lambda: 0
+    fake_asyncio = types.ModuleType("asyncio")
+    fake_asyncio.Event = Event
+    fake_asyncio.sleep = sleep
+    fake_asyncio.sleep_ms = sleep_ms
+    fake_asyncio.gather = gather
+    fake_asyncio.create_task = create_task
+    fake_asyncio.run = run
+    return {
+        "board": board,
+        "pwmio": pwmio,
+        "time": fake_time,
+        "gc": fake_gc,
+        "asyncio": fake_asyncio,
+    }
+
+
+async def controls(calls):
+    """Make calls on the player at their times (see CONTROLS)"""
+    for number, ms, method, *arguments in calls:
+        while len(SIM.songs) < number:
+            await sleep_ms(10)
+        due = SIM.songs[number - 1]["start_ns"] + ms * 1000000
+        await sleep((due - SIM.ns) / 1000000000)
+        SIM.calls.append((SIM.ns, method))
+        getattr(SIM.player, method)(*arguments)
+
+
+def on_note(mask, note):
+    SIM.notes.append((SIM.ns, mask, note))
+
+
+def run_program(
+    two_voice=False,
+    verbose=False,
+    costs=True,
+    calls=(),
+    tempo=100,
+    transpose=0,
+    gap=None,
+):
+    """Run code.py for one pass through its playlist; returns its songs
+
+    calls (see CONTROLS) are made from a task running next to the player.
+    tempo and transpose are set on the player before the first song. With
+    gap, the player's articulation gap is replaced and its on_note calls
+    are recorded in SIM.notes.
+    """
+    global SIM
+    SIM = Simulation(costs)
+    path = os.path.join(HERE, "code.py")
+    with open(path) as f:
+        source = f.read()
+    namespace = {"__name__": "__main__", "__file__": path}
+
+    def start(coro):
+        # Called as asyncio.run(main()) once code.py has set everything up
+        SIM.player = namespace["player"]
+        SIM.gap_ms = int(namespace["SONG_GAP"] * 1000)
+        SIM.playlist = namespace["songs"]
+        if gap is not None:
+            SIM.player.articulation_gap = gap
+            SIM.player.on_note = on_note
+        SIM.playlist_length = len(namespace["songs"])
+        SIM.player.two_voice = two_voice
+        SIM.player.tempo = tempo
+        SIM.player.transpose = transpose
+        if calls:
+            return run(gather(coro, controls(calls)))
+        return run(coro)
+
+    modules = fake_modules()
+    modules["asyncio"].run = start
+    saved = {name: sys.modules.get(name) for name in modules}
+    sys.modules.update(modules)
+    sys.path.insert(0, HERE)
+    for name in ("player", "songfiles", "wavetable"):
+        sys.modules.pop(name, None)
+    stdout = sys.stdout
+    sys.stdout = Console(verbose)
+    try:
+        exec(compile(source, path, "exec"), namespace)
+    finally:
+        sys.stdout = stdout
+        sys.path.remove(HERE)
+        for name, module in saved.items():
+            if module is None:
+                sys.modules.pop(name, None)
+            else:
+                sys.modules[name] = module
+    return SIM.songs
+
+
+# Analysis ----------------------------------------------------------------------
+
+def song_start_ns(song):
+    """When the player started the song (its onsets count from here)"""
+    return song.get("play_ns", song["start_ns"])
+
+
+def song_events(song):
+    """Trace entries of a song as (ms since song start, pin, attribute, value)"""
+    for ns, pin, attribute, value in song["trace"][song["trace_start"]:song["trace_end"]]:
+        yield (ns - song_start_ns(song)) / 1000000, pin, attribute, value
+
+
+def onsets(song):
+    """[ms, pin, frequency] whenever a pin starts sounding or changes pitch"""
+    result = []
+    frequency = {}
+    sounding = {}
+    for ms, pin, attribute, value in song_events(song):
+        was = (sounding.get(pin, False), frequency.get(pin))
+        if attribute == "frequency":
+            frequency[pin] = value
+        else:
+            sounding[pin] = value > 0
+        now = (sounding.get(pin, False), frequency.get(pin))
+        if now[0] and now != was:
+            result.append([ms, pin, now[1]])
+    return result
+
+
+def intervals(song):
+    """(start ms, end ms, pin, frequency) of every sounding stretch"""
+    result = []
+    frequency = {}
+    sounding = {}
+    started = {}
+    for ms, pin, attribute, value in song_events(song):
+        was = (sounding.get(pin, False), frequency.get(pin))
+        if attribute == "frequency":
+            frequency[pin] = value
+        else:
+            sounding[pin] = value > 0
+        now = (sounding.get(pin, False), frequency.get(pin))
+        if now == was:
+            continue
+        if was[0]:
+            result.append((started.pop(pin), ms, pin, was[1]))
+        if now[0]:
+            started[pin] = ms
+    return result
+
+
+def duration_ms(song):
+    return round((song["end_ns"] - song_start_ns(song)) / 1000000)
+
+
+def slug(name):
+    chars = [c.lower() if c.isalnum() else "_" for c in name]
+    return "_".join(part for part in "".join(chars).split("_") if part)
+
+
+def golden_path(song, two_voice):
+    """The golden file of a song. Two-voice playback has its own file only
+    for songs it changes; the others share the single-voice one"""
+    path = os.path.join(GOLDEN_DIR, slug(song["name"]) + ".json")
+    if two_voice:
+        own = os.path.join(GOLDEN_DIR, "two_voice", os.path.basename(path))
+        if os.path.exists(own):
+            return own
+    return path
+
+
+def golden_text(song):
+    lines = [json.dumps([round(ms), pin, frequency]) for ms, pin, frequency in onsets(song)]
+    return (
+        '{\n  "song": %s,\n' % json.dumps(song["name"])
+        + '  "duration_ms": %d,\n' % duration_ms(song)
+        + '  "onsets": [\n    ' + ",\n    ".join(lines) + "\n  ]\n}\n"
+    )
+
+
+def write_golden(song, two_voice):
+    """Write a song's golden file and describe what was done. A two-voice
+    file is only kept when it differs from the single-voice one"""
+    text = golden_text(song)
+    path = os.path.join(GOLDEN_DIR, slug(song["name"]) + ".json")
+    if two_voice:
+        try:
+            with open(path) as f:
+                shared = f.read() == text
+        except FileNotFoundError:
+            shared = False
+        own = os.path.join(GOLDEN_DIR, "two_voice", os.path.basename(path))
+        if shared:
+            if os.path.exists(own):
+                os.remove(own)
+            return "same as the single-voice golden file"
+        path = own
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(text)
+    return "golden file written"
+
+
+def check_golden(path, song):
+    """Describe the first difference from the golden file, or None"""
+    try:
+        with open(path) as f:
+            golden = json.load(f)
+    except FileNotFoundError:
+        return "no golden file (run with --update)"
+    if abs(duration_ms(song) - golden["duration_ms"]) > TOLERANCE_MS:
+        return f"duration {duration_ms(song)} ms, expected {golden['duration_ms']} ms"
+    actual = onsets(song)
+    for i, (got, expected) in enumerate(zip(actual, golden["onsets"])):
+        if (
+            abs(got[0] - expected[0]) > TOLERANCE_MS
+            or got[1] != expected[1]
+            or got[2] != expected[2]
+        ):
+            return f"onset {i}: {got}, expected {expected}"
+    if len(actual) != len(golden["onsets"]):
+        return f"{len(actual)} onsets, expected {len(golden['onsets'])}"
+    return None
+
+
+def drift(ideal, actual):
+    """How far from the ideal schedule a song played, in ms
+
+    Returns (largest onset error either way, lateness of the song's end), or
+    None if the two runs played different notes.
+    """
+    expected = onsets(ideal)
+    got = onsets(actual)
+    if [onset[1:] for onset in expected] != [onset[1:] for onset in got]:
+        return None
+    late = max((abs(g[0] - e[0]) for g, e in zip(got, expected)), default=0)
+    end = (actual["end_ns"] - song_start_ns(actual) - ideal["end_ns"] + song_start_ns(ideal)) / 1000000
+    return late, end
+
+
+def check_controls(ideal, songs):
+    """Describe how the CONTROLS calls went wrong, or None
+
+    Before a pause the song plays as in the ideal run and afterwards
+    exactly the paused time later. Skip and stop end the song within the
+    player's control latency with the buzzers silent, and stop ends the
+    playlist.
+    """
+    latency_ms = SIM.player.control_latency_ms
+    calls = {method: ns for ns, method in SIM.calls}
+    if len(songs) != 3 or "end_ns" not in songs[-1]:
+        return f"{len(songs)} songs started, expected 3 with the last one stopped"
+
+    paused = songs[0]
+    pause_ms = (calls["pause"] - song_start_ns(paused)) / 1000000
+    resume_ms = (calls["resume"] - song_start_ns(paused)) / 1000000
+    shift = resume_ms - pause_ms
+    expected = [
+        [ms if ms < pause_ms else ms + shift, pin, frequency]
+        for ms, pin, frequency in onsets(ideal[paused["name"]])
+    ]
+    # The notes held at the pause sound again when it resumes
+    got = [onset for onset in onsets(paused) if onset[0] != resume_ms]
+    if got != expected:
+        for i, (g, e) in enumerate(zip(got, expected)):
+            if g != e:
+                return f"{paused['name']}: onset {i} at {g}, expected {e}"
+        return f"{paused['name']}: {len(got)} onsets, expected {len(expected)}"
+    end_shift = (paused["end_ns"] - ideal[paused["name"]]["end_ns"]) / 1000000
+    if end_shift != shift:
+        return f"{paused['name']}: a {shift:g} ms pause moved its end by {end_shift:g} ms"
+    for start, end, pin, frequency in intervals(paused):
+        if start < resume_ms and end > pause_ms + latency_ms:
+            return f"{paused['name']}: {pin} sounded at {end:g} ms, paused at {pause_ms:g} ms"
+    print(
+        f"  {paused['name']:<32} paused {pause_ms:g}-{resume_ms:g} ms: "
+        f"{len(got)} onsets as planned, end {end_shift:+g} ms"
+    )
+
+    for song, method in ((songs[1], "skip"), (songs[2], "stop")):
+        taken = (song["end_ns"] - calls[method]) / 1000000
+        at = (calls[method] - song_start_ns(song)) / 1000000
+        if taken > latency_ms:
+            return f"{song['name']}: ended {taken:g} ms after {method}()"
+        if any(end > at + latency_ms for _, end, _, _ in intervals(song)):
+            return f"{song['name']}: still sounding {latency_ms} ms after {method}()"
+        print(f"  {song['name']:<32} {method}() at {at:g} ms: silent and ended {taken:g} ms later")
+    return None
+
+
+def check_gap_controls(ideal, two_voice):
+    """Describe how the GAP_CONTROLS calls went wrong, or None
+
+    A skip between songs ends the gap and skips the next song without
+    playing a note or waiting after it, a pause holds the gap for as long
+    as it lasts, and a stop ends the playlist before the next song is
+    announced.
+    """
+    order = list(ideal)  # song names in playlist order
+    # Song n ends duration_ms after it starts, in a run without costs
+    calls = [
+        (number, duration_ms(ideal[order[number - 1]]) + ms, method)
+        for number, ms, method in GAP_CONTROLS
+    ]
+    songs = run_program(two_voice, costs=False, calls=calls)
+    gap_ms = SIM.gap_ms
+    if len(songs) != 4:
+        return f"{len(songs)} songs started with stop() in the pause after song 4, expected 4"
+    skipped = songs[1]
+    if not skipped["result"].startswith("» ") or skipped["trace_end"] != skipped["trace_start"]:
+        return f"{skipped['name']}: played after skip() in the pause before it ({skipped['result']})"
+    for number, expected in ((1, 1000), (2, 0), (3, gap_ms + 1000)):
+        got = (songs[number]["start_ns"] - songs[number - 1]["end_ns"]) / 1000000
+        if abs(got - expected) > TOLERANCE_MS:
+            return f"pause after song {number} lasted {got:g} ms, expected {expected} ms"
+    print(f"  skip() in the pause before {skipped['name']}: skipped without a note or a pause")
+    print(f"  pause() for 1000 ms after {songs[2]['name']}: next song {gap_ms + 1000} ms later")
+    print(f"  stop() in the pause after {songs[3]['name']}: playlist ended")
+    return None
+
+
+def check_note_callbacks(two_voice):
+    """Describe how on_note calls went wrong, or None
+
+    With the articulation gap of code.py and with none (when a repeated
+    note needs no register write at all), every note of every song must be
+    reported once, on its buzzers and at its time.
+    """
+    from player import compile_timeline, load_song_module
+
+    for gap in (ARTICULATION_GAP, 0):
+        songs = run_program(two_voice, costs=False, gap=gap)
+        for song, (title, source) in zip(songs, SIM.playlist):
+            voices = load_song_module(source).compile(count=2 if two_voice else 1)
+            timeline = compile_timeline(voices, gap)
+            buzzers = (1 << len(SIM.player.buzzers)) - 1
+            expected = [
+                (timeline[i], timeline[i + 1] >> 8 & buzzers, timeline[i + 1] & 0xFF)
+                for i in range(0, len(timeline) - 2, 2)
+                if timeline[i + 1] & 0xFF
+            ]
+            start = song_start_ns(song)
+            got = [
+                (round((ns - start) / 1000000), mask, note)
+                for ns, mask, note in SIM.notes
+                if start <= ns <= song["end_ns"]
+            ]
+            name = f"{title} (gap {gap} ms)"
+            for g, e in zip(got, expected):
+                if g[1:] != e[1:] or abs(g[0] - e[0]) > TOLERANCE_MS:
+                    return f"{name}: on_note{g[1:]} at {g[0]} ms, expected on_note{e[1:]} at {e[0]} ms"
+            if len(got) != len(expected):
+                return f"{name}: on_note called {len(got)} times for {len(expected)} notes"
+            print(f"  {name:<44} on_note called for all {len(got)} notes")
+    return None
+
+
+def near(a, b):
+    """Two intervals match within TOLERANCE_MS"""
+    return (
+        abs(a[0] - b[0]) <= TOLERANCE_MS
+        and abs(a[1] - b[1]) <= TOLERANCE_MS
+        and a[2:] == b[2:]
+    )
+
+
+def check_retunes(ideal, two_voice):
+    """Describe how a RETUNES change went wrong, or None
+
+    The player applies a change at its next event (at t0 ms) and carries
+    on from the same point in the music, position ms into the song at the
+    new settings. Every note must sound as in the ideal run up to t0 and
+    as in an ideal run at the new settings from position on, moved to t0:
+    a note ends where its release falls at the new tempo, and none rings
+    through a rest.
+    """
+    for number, ms, method, value in RETUNES:
+        songs = run_program(two_voice, costs=False, calls=[(number, ms, method, value)])
+        song = songs[number - 1]
+        call_ms = (SIM.calls[0][0] - song_start_ns(song)) / 1000000
+        tempo = value if method == "set_tempo" else 100
+        transpose = value if method == "set_transpose" else 0
+        before = ideal[song["name"]]
+        after = {
+            s["name"]: s
+            for s in run_program(two_voice, costs=False, tempo=tempo, transpose=transpose)
+        }[song["name"]]
+
+        t0 = min(t for t, _, _, _ in song_events(before) if t >= call_ms)
+        position = int(t0) * 100 // tempo
+        shift = t0 - position
+        expected = [(s, min(e, t0), pin, f) for s, e, pin, f in intervals(before) if s < t0]
+        for start, end, pin, frequency in intervals(after):
+            if end <= position:
+                continue
+            start = max(start, position) + shift
+            held = [x for x in expected if x[1] == t0 == start and x[2:] == (pin, frequency)]
+            if held:
+                # The same note, still sounding at t0
+                expected.remove(held[0])
+                start = held[0][0]
+            expected.append((start, end + shift, pin, frequency))
+        expected.sort()
+        got = intervals(song)
+        name = f"{song['name']} {method}({value}) at {call_ms:g} ms"
+        for g, e in zip(got, expected):
+            if not near(g, e):
+                return f"{name}: {g[2]} played {g[3]} Hz {g[0]:g}-{g[1]:g} ms, expected {e}"
+        if len(got) != len(expected):
+            return f"{name}: {len(got)} notes, expected {len(expected)}"
+        end_ms = duration_ms(after) + shift
+        if abs(duration_ms(song) - end_ms) > TOLERANCE_MS:
+            return f"{name}: ended at {duration_ms(song)} ms, expected {end_ms:g} ms"
+        print(f"  {name:<52} {len(got)} notes as planned, applied at {t0:g} ms")
+    return None
+
+
+def write_wav(path, song):
+    """Render the square waves of a song (all pins mixed) to an 8-bit WAV file"""
+    count = duration_ms(song) * WAV_RATE // 1000
+    mix = [0] * count
+    for start, end, pin, frequency in intervals(song):
+        first = int(start * WAV_RATE / 1000)
+        last = min(int(end * WAV_RATE / 1000), count)
+        for i in range(first, last):
+            mix[i] += 40 if (i * frequency * 2 // WAV_RATE) % 2 == 0 else -40
+    frames = bytes(min(255, max(0, 128 + value)) for value in mix)
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(1)
+        f.setframerate(WAV_RATE)
+        f.writeframes(frames)
+
+
+def main():
+    args = sys.argv[1:]
+    two_voice = "--two-voice" in args
+    update = "--update" in args
+    verbose = "--verbose" in args
+    wav_dir = args[args.index("--wav") + 1] if "--wav" in args else None
+
+    ideal = {song["name"]: song for song in run_program(two_voice, costs=False)}
+    if "--controls" in args or "--retune" in args or "--on-note" in args:
+        if "--controls" in args:
+            result = check_controls(ideal, run_program(two_voice, verbose, False, CONTROLS))
+            result = result or check_gap_controls(ideal, two_voice)
+        elif "--on-note" in args:
+            result = check_note_callbacks(two_voice)
+        else:
+            result = check_retunes(ideal, two_voice)
+        if result:
+            print(f"FAIL {result}")
+            sys.exit(1)
+        return
+    wall_start = time.perf_counter()
+    songs = run_program(two_voice, verbose)
+    wall = time.perf_counter() - wall_start
+
+    failed = 0
+    worst_onset = 0
+    worst_end = 0
+    total_drift = 0
+    for song in songs:
+        if "end_ns" not in song:
+            continue
+        if update:
+            result = write_golden(ideal[song["name"]], two_voice)
+        else:
+            result = check_golden(golden_path(song, two_voice), song)
+            failed += result is not None
+            result = result or "ok"
+        late_end = drift(ideal[song["name"]], song)
+        if late_end is None:
+            if result == "ok":
+                failed += 1
+            result += ", plays different notes when writes and prints take time"
+        else:
+            worst_onset = max(worst_onset, late_end[0])
+            worst_end = max(worst_end, abs(late_end[1]))
+            total_drift += late_end[1]
+        if wav_dir:
+            os.makedirs(wav_dir, exist_ok=True)
+            write_wav(os.path.join(wav_dir, slug(song["name"]) + ".wav"), song)
+        print(f"  {song['name']:<32} {duration_ms(song):6d} ms  {result}")
+
+    print(f"Simulated {SIM.ns / 1000000000:.1f} s of playback in {wall:.2f} s")
+    print(
+        f"With {WRITE_US} us per PWM write and {PRINT_US} us per printed line: onsets at most "
+        f"{worst_onset:.3f} ms off, song ends at most {worst_end:.3f} ms off "
+        f"({total_drift:+.3f} ms over the playlist)"
+    )
+    drifted = worst_onset > TOLERANCE_MS or worst_end > TOLERANCE_MS
+    if drifted:
+        print(f"Write and print costs put notes more than {TOLERANCE_MS} ms off schedule")
+    if failed:
+        print(f"{failed} song(s) differ from the golden files")
+    if failed or drifted:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
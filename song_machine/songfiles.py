@@ -0,0 +1,353 @@
+"""
+Song Machine - Song files
+Streaming parsers for RTTTL (.rtttl / .txt) and Type-0 and Type-1 MIDI
+(.mid) files stored on CIRCUITPY. Songs are read a few bytes at a time and
+produced one (note, milliseconds) pair at a time, where note is a MIDI note
+number and 0 is a rest, so memory use does not depend on the length of the
+file.
+"""
+
+import os
+
+REST = 0
+CHUNK_SIZE = 64
+RTTTL_EXTENSIONS = (".rtttl", ".txt")
+MIDI_EXTENSIONS = (".mid", ".midi")
+
+# Status of the tempo changes produced by midi_events
+TEMPO = 0x51
+
+# Semitones above C for RTTTL note letters
+RTTTL_SEMITONES = {"c": 0, "d": 2, "e": 4, "f": 5, "g": 7, "a": 9, "b": 11}
+
+
+class ByteReader:
+    """Reads a file through a small fixed buffer"""
+
+    def __init__(self, f):
+        self.f = f
+        self.buf = bytearray(CHUNK_SIZE)
+        self.start = 0  # file offset of buf[0]
+        self.length = 0
+        self.pos = 0
+
+    def tell(self):
+        return self.start + self.pos
+
+    def seek(self, offset):
+        self.f.seek(offset)
+        self.start = offset
+        self.length = 0
+        self.pos = 0
+
+    def byte(self):
+        """Next byte of the file, or -1 at the end"""
+        if self.pos >= self.length:
+            self.start += self.length
+            self.length = self.f.readinto(self.buf) or 0
+            self.pos = 0
+            if not self.length:
+                return -1
+        value = self.buf[self.pos]
+        self.pos += 1
+        return value
+
+    def read_int(self, size):
+        """Big-endian unsigned integer of size bytes"""
+        value = 0
+        for _ in range(size):
+            value = (value << 8) | self.byte()
+        return value
+
+    def read_varlen(self):
+        """MIDI variable-length quantity"""
+        value = 0
+        while True:
+            b = self.byte()
+            if b < 0:
+                return value
+            value = (value << 7) | (b & 0x7F)
+            if not b & 0x80:
+                return value
+
+    def skip(self, count):
+        for _ in range(count):
+            self.byte()
+
+    def token(self, separator):
+        """Text up to the next separator byte (stripped), or None at the end"""
+        chars = []
+        while True:
+            b = self.byte()
+            if b < 0:
+                return "".join(chars).strip() if chars else None
+            if b == separator:
+                return "".join(chars).strip()
+            chars.append(chr(b))
+
+
+def rtttl_notes(path):
+    """Stream (note, ms) pairs from an RTTTL file
+
+    RTTTL looks like "Name:d=4,o=5,b=120:8e6,8e6,p,8e6,...". Durations are
+    fractions of a whole note, b is the tempo in quarter notes per minute.
+    """
+    with open(path, "rb") as f:
+        reader = ByteReader(f)
+        reader.token(ord(":"))  # song name
+        defaults = reader.token(ord(":")) or ""
+        duration = 4
+        octave = 6
+        bpm = 63
+        for setting in defaults.split(","):
+            if "=" not in setting:
+                continue
+            key, value = setting.split("=", 1)
+            key = key.strip()
+            if key == "d":
+                duration = int(value)
+            elif key == "o":
+                octave = int(value)
+            elif key == "b":
+                bpm = int(value)
+        whole_note_ms = 240000 // bpm
+
+        while True:
+            token = reader.token(ord(","))
+            if token is None:
+                return
+            token = token.lower()
+            if not token:
+                continue
+
+            # Optional duration prefix
+            i = 0
+            while i < len(token) and token[i].isdigit():
+                i += 1
+            note_duration = int(token[:i]) if i else duration
+            letter = token[i] if i < len(token) else "p"
+            i += 1
+            semitone = RTTTL_SEMITONES.get(letter)
+            if i < len(token) and token[i] == "#":
+                if semitone is not None:
+                    semitone += 1
+                i += 1
+            # Dot may come before or after the octave
+            dotted = False
+            if i < len(token) and token[i] == ".":
+                dotted = True
+                i += 1
+            note_octave = octave
+            if i < len(token) and token[i].isdigit():
+                note_octave = int(token[i])
+                i += 1
+            if i < len(token) and token[i] == ".":
+                dotted = True
+
+            ms = whole_note_ms // note_duration
+            if dotted:
+                ms += ms // 2
+            if semitone is None:
+                yield REST, ms
+            else:
+                yield 12 * (note_octave + 1) + semitone, ms
+
+
+def midi_tracks(reader):
+    """Yield the file offset of each track's events (after its MTrk header)"""
+    while True:
+        chunk_id = reader.read_int(4)
+        chunk_length = reader.read_int(4)
+        if chunk_length < 0:  # end of the file
+            return
+        start = reader.tell()
+        if chunk_id == 0x4D54726B:  # "MTrk"
+            yield start
+        reader.seek(start + chunk_length)
+
+
+def midi_events(reader):
+    """Yield (delta ticks, status, data, velocity) for each event of a track
+
+    status is the channel message status byte for note-on/off, TEMPO (with
+    the new microseconds per quarter note as data) for a tempo change, and
+    0 for everything else, which only moves time on. Ends at the end of
+    the track.
+    """
+    status = 0
+    while True:
+        delta = reader.read_varlen()
+        b = reader.byte()
+        if b < 0:
+            return
+        if b == 0xFF:
+            # Meta event: only tempo and end of track matter
+            meta_type = reader.byte()
+            length = reader.read_varlen()
+            if meta_type == 0x2F:
+                yield delta, 0, 0, 0
+                return
+            if meta_type == 0x51 and length == 3:
+                yield delta, TEMPO, reader.read_int(3), 0
+            else:
+                reader.skip(length)
+                yield delta, 0, 0, 0
+            continue
+        if b in (0xF0, 0xF7):
+            reader.skip(reader.read_varlen())  # SysEx
+            yield delta, 0, 0, 0
+            continue
+        if b & 0x80:
+            status = b
+            data = reader.byte()
+        else:
+            data = b  # running status
+        kind = status & 0xF0
+        if kind in (0x80, 0x90):
+            yield delta, status, data, reader.byte()
+            continue
+        if kind in (0xA0, 0xB0, 0xE0):
+            reader.byte()  # second data byte
+        yield delta, 0, 0, 0
+
+
+def has_notes(events):
+    """True if a track has a note-on outside the drum channel (10)"""
+    for _, status, _, velocity in events:
+        if status & 0xF0 == 0x90 and status & 0x0F != 9 and velocity:
+            return True
+    return False
+
+
+def tempo_changes(events):
+    """Yield (tick, tempo) for the tempo changes of a track"""
+    tick = 0
+    for delta, status, data, _ in events:
+        tick += delta
+        if status == TEMPO:
+            yield tick, data
+
+
+def midi_notes(path):
+    """Stream (note, ms) pairs from a Type-0 or Type-1 MIDI file
+
+    A Type-0 file has one track. In a Type-1 file the first track that has
+    notes (outside the drum channel) is played, timed by the tempo changes
+    of the first track, which are read alongside it through a second file
+    handle. The track is reduced to a single voice: the most recent note-on
+    sounds until its note-off. Drums (channel 10) are ignored. Times are
+    computed in microseconds from the last tempo change, so rounding to
+    whole milliseconds never drifts.
+    """
+    with open(path, "rb") as f:
+        reader = ByteReader(f)
+        if reader.read_int(4) != 0x4D546864:  # "MThd"
+            raise ValueError(f"{path} is not a MIDI file")
+        header_length = reader.read_int(4)
+        midi_format = reader.read_int(2)
+        reader.read_int(2)  # track count
+        division = reader.read_int(2)
+        reader.skip(header_length - 6)
+        if midi_format not in (0, 1) or division & 0x8000:
+            raise ValueError(f"{path}: only Type-0 and Type-1 MIDI with tick timing is supported")
+
+        tempo_track = None
+        notes_track = None
+        for start in midi_tracks(reader):
+            if tempo_track is None:
+                tempo_track = start
+            if has_notes(midi_events(reader)):
+                notes_track = start
+                break
+            if midi_format == 0:
+                break
+        if notes_track is None:
+            raise ValueError(f"{path}: no notes to play")
+
+        if notes_track == tempo_track:
+            reader.seek(notes_track)
+            for pair in single_voice(midi_events(reader), (), division):
+                yield pair
+            return
+        # The tempo track is read at its own position in the same file
+        with open(path, "rb") as tempo_file:
+            tempo_reader = ByteReader(tempo_file)
+            tempo_reader.seek(tempo_track)
+            reader.seek(notes_track)
+            tempos = tempo_changes(midi_events(tempo_reader))
+            for pair in single_voice(midi_events(reader), tempos, division):
+                yield pair
+
+
+def single_voice(events, tempos, division):
+    """Reduce a track's note events to (note, ms) pairs
+
+    tempos yields (tick, tempo) changes from another track; tempo changes
+    in the track itself apply as well.
+    """
+    tempo = 500000  # microseconds per quarter note (120 BPM)
+    tempo_tick = 0  # tick and time of the last tempo change
+    tempo_us = 0
+    tempos = iter(tempos)
+    next_tempo = next(tempos, None)
+    tick = 0
+    emitted_ms = 0
+    current = REST
+    for delta, status, data, velocity in events:
+        tick += delta
+        while next_tempo is not None and next_tempo[0] <= tick:
+            tempo_us += (next_tempo[0] - tempo_tick) * tempo // division
+            tempo_tick, tempo = next_tempo
+            next_tempo = next(tempos, None)
+        if status == TEMPO:
+            tempo_us += (tick - tempo_tick) * tempo // division
+            tempo_tick = tick
+            tempo = data
+            continue
+
+        new = current
+        kind = status & 0xF0
+        if kind in (0x80, 0x90) and (status & 0x0F) != 9:
+            if kind == 0x90 and velocity:
+                new = data
+            elif data == current:
+                new = REST
+        if new != current:
+            ms = (tempo_us + (tick - tempo_tick) * tempo // division) // 1000 - emitted_ms
+            if ms > 0:
+                yield current, ms
+                emitted_ms += ms
+            current = new
+
+    ms = (tempo_us + (tick - tempo_tick) * tempo // division) // 1000 - emitted_ms
+    if ms > 0:
+        yield current, ms
+
+
+def has_extension(name, extensions):
+    name = name.lower()
+    for extension in extensions:
+        if name.endswith(extension):
+            return True
+    return False
+
+
+def song_notes(path):
+    """Stream (note, ms) pairs from an RTTTL or MIDI file"""
+    if has_extension(path, MIDI_EXTENSIONS):
+        return midi_notes(path)
+    return rtttl_notes(path)
+
+
+def scan_songs(directory):
+    """Return (title, path) for every song file in directory, sorted by name"""
+    try:
+        names = sorted(os.listdir(directory))
+    except OSError:
+        return []
+    playlist = []
+    for name in names:
+        if has_extension(name, RTTTL_EXTENSIONS) or has_extension(name, MIDI_EXTENSIONS):
+            title = name[: name.rfind(".")].replace("_", " ")
+            playlist.append((title, directory + "/" + name))
+    return playlist
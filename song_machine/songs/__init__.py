@@ -0,0 +1 @@
+# Built-in songs, one module per song, imported by the player when needed
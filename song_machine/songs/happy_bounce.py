@@ -0,0 +1,57 @@
+"""
+Happy Bounce - Original upbeat melody
+Loaded by the player only while this song is playing
+"""
+
+from notes import *
+
+BPM = 300
+
+# Happy Bounce - Original upbeat melody with high frequencies
+# Fast tempo, high pitched, cheerful and energetic
+MELODY = [
+    # Pattern 1: Ascending happy melody
+    (NOTE_C6, FAST_EIGHTH),
+    (NOTE_E6, FAST_EIGHTH),
+    (NOTE_G6, FAST_EIGHTH),
+    (NOTE_E6, FAST_EIGHTH),
+    (NOTE_C6, FAST_EIGHTH),
+    (NOTE_E6, FAST_EIGHTH),
+    (NOTE_G6, FAST_QUARTER),
+    (NOTE_REST, FAST_EIGHTH),
+
+    # Pattern 2: Bouncy rhythm
+    (NOTE_A6, FAST_EIGHTH),
+    (NOTE_A6, FAST_EIGHTH),
+    (NOTE_G6, FAST_EIGHTH),
+    (NOTE_E6, FAST_EIGHTH),
+    (NOTE_C6, FAST_EIGHTH),
+    (NOTE_REST, FAST_EIGHTH),
+    (NOTE_D6, FAST_EIGHTH),
+    (NOTE_F6, FAST_QUARTER),
+
+    # Pattern 3: Quick ascending run
+    (NOTE_E6, FAST_SIXTEENTH),
+    (NOTE_F6, FAST_SIXTEENTH),
+    (NOTE_G6, FAST_SIXTEENTH),
+    (NOTE_A6, FAST_SIXTEENTH),
+    (NOTE_G6, FAST_EIGHTH),
+    (NOTE_E6, FAST_EIGHTH),
+    (NOTE_C6, FAST_EIGHTH),
+    (NOTE_E6, FAST_EIGHTH),
+    (NOTE_D6, FAST_QUARTER),
+    (NOTE_REST, FAST_EIGHTH),
+
+    # Pattern 4: High energy finale
+    (NOTE_G6, FAST_EIGHTH),
+    (NOTE_G6, FAST_EIGHTH),
+    (NOTE_A6, FAST_EIGHTH),
+    (NOTE_G6, FAST_EIGHTH),
+    (NOTE_F6, FAST_EIGHTH),
+    (NOTE_E6, FAST_EIGHTH),
+    (NOTE_D6, FAST_EIGHTH),
+    (NOTE_C6, FAST_EIGHTH),
+    (NOTE_E6, FAST_EIGHTH),
+    (NOTE_G6, FAST_QUARTER),
+    (NOTE_C6, FAST_HALF),
+]
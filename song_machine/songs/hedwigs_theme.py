@@ -0,0 +1,50 @@
+"""
+Hedwig's Theme (Harry Potter)
+Loaded by the player only while this song is playing
+"""
+
+from notes import *
+
+BPM = 300
+
+# Hedwig's Theme (Harry Potter) - Magical and mysterious
+MELODY = [
+    # Opening motif
+    (NOTE_B4, FAST_EIGHTH),
+    (NOTE_E5, FAST_QUARTER),
+    (NOTE_G5, FAST_EIGHTH),
+    (NOTE_F5, FAST_EIGHTH),
+    (NOTE_E5, FAST_QUARTER),
+    (NOTE_B5, FAST_HALF),
+    (NOTE_A5, FAST_HALF),
+    (NOTE_REST, FAST_EIGHTH),
+
+    # Second phrase
+    (NOTE_E5, FAST_HALF),
+    (NOTE_G5, FAST_EIGHTH),
+    (NOTE_F5, FAST_EIGHTH),
+    (NOTE_D5, FAST_QUARTER),
+    (NOTE_F5, FAST_HALF),
+    (NOTE_B4, FAST_HALF),
+    (NOTE_REST, FAST_EIGHTH),
+
+    # Third phrase
+    (NOTE_B4, FAST_EIGHTH),
+    (NOTE_E5, FAST_QUARTER),
+    (NOTE_G5, FAST_EIGHTH),
+    (NOTE_F5, FAST_EIGHTH),
+    (NOTE_E5, FAST_QUARTER),
+    (NOTE_B5, FAST_HALF),
+    (NOTE_D6, FAST_HALF),
+    (NOTE_REST, FAST_EIGHTH),
+
+    # Descending finale
+    (NOTE_C6, FAST_QUARTER),
+    (NOTE_B5, FAST_EIGHTH),
+    (NOTE_A5, FAST_EIGHTH),
+    (NOTE_B5, FAST_HALF),
+    (NOTE_G5, FAST_EIGHTH),
+    (NOTE_E5, FAST_HALF),
+    (NOTE_B4, FAST_QUARTER),
+    (NOTE_E5, FAST_HALF),
+]
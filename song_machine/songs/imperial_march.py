@@ -0,0 +1,47 @@
+"""
+Star Wars Imperial March
+Loaded by the player only while this song is playing
+"""
+
+from notes import *
+
+BPM = 200
+
+# Star Wars Imperial March - Powerful and iconic
+MELODY = [
+    # "Dum dum dum, dum-da-dum, dum-da-dum"
+    (NOTE_G4, QUARTER),
+    (NOTE_G4, QUARTER),
+    (NOTE_G4, QUARTER),
+    (NOTE_E4, QUARTER_DOT),
+    (NOTE_B4, EIGHTH),
+    (NOTE_G4, QUARTER),
+    (NOTE_E4, QUARTER_DOT),
+    (NOTE_B4, EIGHTH),
+    (NOTE_G4, HALF),
+    (NOTE_REST, QUARTER),
+
+    # Second phrase
+    (NOTE_D5, QUARTER),
+    (NOTE_D5, QUARTER),
+    (NOTE_D5, QUARTER),
+    (NOTE_E5, QUARTER_DOT),
+    (NOTE_B4, EIGHTH),
+    (NOTE_G4, QUARTER),
+    (NOTE_E4, QUARTER_DOT),
+    (NOTE_B4, EIGHTH),
+    (NOTE_G4, HALF),
+    (NOTE_REST, QUARTER),
+
+    # Bridge
+    (NOTE_G5, QUARTER),
+    (NOTE_G4, QUARTER_DOT),
+    (NOTE_G4, EIGHTH),
+    (NOTE_G5, QUARTER),
+    (NOTE_F5, QUARTER_DOT),
+    (NOTE_E5, EIGHTH),
+    (NOTE_D5, EIGHTH),
+    (NOTE_C5, EIGHTH),
+    (NOTE_B4, QUARTER),
+    (NOTE_REST, EIGHTH),
+]
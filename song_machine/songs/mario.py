@@ -0,0 +1,64 @@
+"""
+Super Mario Bros Main Theme - Opening section
+Loaded by the player only while this song is playing
+"""
+
+from notes import *
+
+BPM = 200
+
+# Super Mario Bros Main Theme - Opening section
+MELODY = [
+    # Intro: "E E _ E _ C E _ G _ _ _"
+    (NOTE_E5, EIGHTH),
+    (NOTE_E5, EIGHTH),
+    (NOTE_REST, EIGHTH),
+    (NOTE_E5, EIGHTH),
+    (NOTE_REST, EIGHTH),
+    (NOTE_C5, EIGHTH),
+    (NOTE_E5, EIGHTH),
+    (NOTE_REST, EIGHTH),
+    (NOTE_G5, EIGHTH),
+    (NOTE_REST, EIGHTH),
+    (NOTE_REST, EIGHTH),
+    (NOTE_REST, EIGHTH),
+    (NOTE_G4, EIGHTH),
+    (NOTE_REST, EIGHTH),
+    (NOTE_REST, EIGHTH),
+    (NOTE_REST, EIGHTH),
+
+    # Verse
+    (NOTE_C5, EIGHTH),
+    (NOTE_REST, EIGHTH),
+    (NOTE_REST, EIGHTH),
+    (NOTE_G4, EIGHTH),
+    (NOTE_REST, EIGHTH),
+    (NOTE_REST, EIGHTH),
+    (NOTE_E4, EIGHTH),
+    (NOTE_REST, EIGHTH),
+    (NOTE_REST, EIGHTH),
+    (NOTE_A4, EIGHTH),
+    (NOTE_REST, EIGHTH),
+    (NOTE_B4, EIGHTH),
+    (NOTE_REST, EIGHTH),
+    (NOTE_A4, EIGHTH),
+    (NOTE_A4, EIGHTH),
+    (NOTE_REST, EIGHTH),
+
+    (NOTE_G4, EIGHTH),
+    (NOTE_E5, EIGHTH),
+    (NOTE_G5, EIGHTH),
+    (NOTE_A5, EIGHTH),
+    (NOTE_REST, EIGHTH),
+    (NOTE_F5, EIGHTH),
+    (NOTE_G5, EIGHTH),
+    (NOTE_REST, EIGHTH),
+    (NOTE_E5, EIGHTH),
+    (NOTE_REST, EIGHTH),
+    (NOTE_C5, EIGHTH),
+    (NOTE_D5, EIGHTH),
+    (NOTE_B4, EIGHTH),
+    (NOTE_REST, EIGHTH),
+    (NOTE_REST, EIGHTH),
+    (NOTE_REST, EIGHTH),
+]
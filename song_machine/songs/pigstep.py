@@ -0,0 +1,70 @@
+"""
+Minecraft Pigstep
+Loaded by the player only while this song is playing
+"""
+
+from notes import *
+
+BPM = 300
+
+# Minecraft Pigstep - Funky Nether track
+MELODY = [
+    # Intro - Funky bass-like pattern
+    (NOTE_D4, FAST_EIGHTH),
+    (NOTE_D4, FAST_EIGHTH),
+    (NOTE_D5, FAST_EIGHTH),
+    (NOTE_D4, FAST_EIGHTH),
+    (NOTE_REST, FAST_EIGHTH),
+    (NOTE_D4, FAST_EIGHTH),
+    (NOTE_C5, FAST_EIGHTH),
+    (NOTE_D4, FAST_EIGHTH),
+
+    # Main melody - syncopated rhythm
+    (NOTE_D5, FAST_QUARTER),
+    (NOTE_F5, FAST_EIGHTH),
+    (NOTE_D5, FAST_EIGHTH),
+    (NOTE_C5, FAST_EIGHTH),
+    (NOTE_A4, FAST_EIGHTH),
+    (NOTE_REST, FAST_EIGHTH),
+    (NOTE_D5, FAST_EIGHTH),
+    (NOTE_F5, FAST_QUARTER),
+    (NOTE_G5, FAST_EIGHTH),
+    (NOTE_F5, FAST_EIGHTH),
+    (NOTE_D5, FAST_QUARTER),
+    (NOTE_REST, FAST_EIGHTH),
+
+    # Funky middle section
+    (NOTE_A4, FAST_EIGHTH),
+    (NOTE_A4, FAST_EIGHTH),
+    (NOTE_D5, FAST_EIGHTH),
+    (NOTE_F5, FAST_EIGHTH),
+    (NOTE_G5, FAST_EIGHTH),
+    (NOTE_F5, FAST_EIGHTH),
+    (NOTE_D5, FAST_EIGHTH),
+    (NOTE_C5, FAST_EIGHTH),
+    (NOTE_D5, FAST_QUARTER),
+    (NOTE_REST, FAST_EIGHTH),
+    (NOTE_A4, FAST_EIGHTH),
+
+    # High section
+    (NOTE_D6, FAST_EIGHTH),
+    (NOTE_D6, FAST_EIGHTH),
+    (NOTE_C6, FAST_EIGHTH),
+    (NOTE_A5, FAST_EIGHTH),
+    (NOTE_F5, FAST_QUARTER),
+    (NOTE_D5, FAST_EIGHTH),
+    (NOTE_F5, FAST_EIGHTH),
+    (NOTE_G5, FAST_QUARTER),
+    (NOTE_REST, FAST_EIGHTH),
+
+    # Closing phrase
+    (NOTE_D5, FAST_EIGHTH),
+    (NOTE_F5, FAST_EIGHTH),
+    (NOTE_D5, FAST_EIGHTH),
+    (NOTE_C5, FAST_EIGHTH),
+    (NOTE_D5, FAST_EIGHTH),
+    (NOTE_A4, FAST_QUARTER),
+    (NOTE_REST, FAST_QUARTER),
+    (NOTE_D4, FAST_EIGHTH),
+    (NOTE_D5, FAST_QUARTER),
+]
@@ -0,0 +1,108 @@
+"""
+Tetris Theme (Korobeiniki) - melody and bass line
+Loaded by the player only while this song is playing
+"""
+
+from notes import *
+
+BPM = 300
+
+# Tetris Theme (Korobeiniki) - Fast Russian folk melody
+MELODY = [
+    # Main melody line 1
+    (NOTE_E5, FAST_QUARTER),
+    (NOTE_B4, FAST_EIGHTH),
+    (NOTE_C5, FAST_EIGHTH),
+    (NOTE_D5, FAST_QUARTER),
+    (NOTE_C5, FAST_EIGHTH),
+    (NOTE_B4, FAST_EIGHTH),
+    (NOTE_A4, FAST_QUARTER),
+    (NOTE_A4, FAST_EIGHTH),
+    (NOTE_C5, FAST_EIGHTH),
+    (NOTE_E5, FAST_QUARTER),
+    (NOTE_D5, FAST_EIGHTH),
+    (NOTE_C5, FAST_EIGHTH),
+    (NOTE_B4, FAST_QUARTER),
+    (NOTE_B4, FAST_EIGHTH),
+    (NOTE_C5, FAST_EIGHTH),
+    (NOTE_D5, FAST_QUARTER),
+    (NOTE_E5, FAST_QUARTER),
+    (NOTE_C5, FAST_QUARTER),
+    (NOTE_A4, FAST_QUARTER),
+    (NOTE_A4, FAST_QUARTER),
+    (NOTE_REST, FAST_EIGHTH),
+
+    # Melody line 2
+    (NOTE_D5, FAST_QUARTER),
+    (NOTE_F5, FAST_EIGHTH),
+    (NOTE_A5, FAST_QUARTER),
+    (NOTE_G5, FAST_EIGHTH),
+    (NOTE_F5, FAST_EIGHTH),
+    (NOTE_E5, FAST_QUARTER),
+    (NOTE_E5, FAST_EIGHTH),
+    (NOTE_C5, FAST_EIGHTH),
+    (NOTE_E5, FAST_QUARTER),
+    (NOTE_D5, FAST_EIGHTH),
+    (NOTE_C5, FAST_EIGHTH),
+    (NOTE_B4, FAST_QUARTER),
+    (NOTE_B4, FAST_EIGHTH),
+    (NOTE_C5, FAST_EIGHTH),
+    (NOTE_D5, FAST_QUARTER),
+    (NOTE_E5, FAST_QUARTER),
+    (NOTE_C5, FAST_QUARTER),
+    (NOTE_A4, FAST_QUARTER),
+    (NOTE_A4, FAST_QUARTER),
+]
+
+# Tetris bass line - root/octave pattern following the melody's rhythm
+BASS = [
+    # E major
+    (NOTE_E3, FAST_QUARTER),
+    (NOTE_E4, FAST_EIGHTH),
+    (NOTE_E3, FAST_EIGHTH),
+    (NOTE_E3, FAST_QUARTER),
+    (NOTE_E4, FAST_EIGHTH),
+    (NOTE_E3, FAST_EIGHTH),
+    # A minor
+    (NOTE_A3, FAST_QUARTER),
+    (NOTE_A4, FAST_EIGHTH),
+    (NOTE_A3, FAST_EIGHTH),
+    (NOTE_A3, FAST_QUARTER),
+    (NOTE_A4, FAST_EIGHTH),
+    (NOTE_A3, FAST_EIGHTH),
+    # E major
+    (NOTE_E3, FAST_QUARTER),
+    (NOTE_E4, FAST_EIGHTH),
+    (NOTE_E3, FAST_EIGHTH),
+    (NOTE_E3, FAST_QUARTER),
+    (NOTE_E4, FAST_QUARTER),
+    # A minor
+    (NOTE_A3, FAST_QUARTER),
+    (NOTE_A4, FAST_QUARTER),
+    (NOTE_A3, FAST_QUARTER),
+    (NOTE_REST, FAST_EIGHTH),
+
+    # D minor
+    (NOTE_D3, FAST_QUARTER),
+    (NOTE_D4, FAST_EIGHTH),
+    (NOTE_D3, FAST_QUARTER),
+    (NOTE_D4, FAST_EIGHTH),
+    (NOTE_D3, FAST_EIGHTH),
+    # C major
+    (NOTE_C3, FAST_QUARTER),
+    (NOTE_C4, FAST_EIGHTH),
+    (NOTE_C3, FAST_EIGHTH),
+    (NOTE_C3, FAST_QUARTER),
+    (NOTE_C4, FAST_EIGHTH),
+    (NOTE_C3, FAST_EIGHTH),
+    # E major
+    (NOTE_E3, FAST_QUARTER),
+    (NOTE_E4, FAST_EIGHTH),
+    (NOTE_E3, FAST_EIGHTH),
+    (NOTE_E3, FAST_QUARTER),
+    (NOTE_E4, FAST_QUARTER),
+    # A minor
+    (NOTE_A3, FAST_QUARTER),
+    (NOTE_A4, FAST_QUARTER),
+    (NOTE_A3, FAST_QUARTER),
+]
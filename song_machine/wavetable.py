@@ -0,0 +1,128 @@
+"""
+Song Machine - Wavetable synthesis
+Renders notes into signed 8-bit sample buffers for audiopwmio playback:
+one cycle of a waveform is stepped through with a fixed-point phase
+accumulator and shaped by an attack/decay/sustain/release envelope.
+
+Pure Python with no hardware imports, so render_wav.py produces exactly the
+same buffers on a computer as the board plays.
+"""
+
+import array
+import math
+
+SAMPLE_RATE = 11025
+TABLE_SIZE = 256  # must be a power of two
+SHAPE = "square"
+
+# Envelope: attack, decay and release in ms, sustain level 0-255
+ATTACK_MS = 5
+DECAY_MS = 40
+SUSTAIN = 160
+RELEASE_MS = 20
+
+PEAK = 255
+CACHE_BYTES = 32768
+
+
+def make_table(shape=SHAPE):
+    """One cycle of a waveform as TABLE_SIZE signed samples"""
+    table = array.array("b", bytes(TABLE_SIZE))
+    for i in range(TABLE_SIZE):
+        if shape == "sine":
+            value = math.sin(2 * math.pi * i / TABLE_SIZE)
+        elif shape == "triangle":
+            value = 1 - 4 * abs(i / TABLE_SIZE - 0.5)
+        elif shape == "square":
+            value = 1 if i < TABLE_SIZE // 2 else -1
+        else:
+            raise ValueError(f"Unknown wave shape: {shape}")
+        table[i] = int(value * 127)
+    return table
+
+
+class Synth:
+    """Renders (frequency, ms) notes to sample buffers, with an LRU cache
+
+    Songs repeat the same few notes, so rendered notes are kept up to a
+    byte budget. wrap, if given, is applied to each new buffer before it is
+    cached (e.g. to make an audiocore.RawSample), so the wrapper is created
+    once per cached note rather than every time it plays.
+    """
+
+    def __init__(
+        self,
+        shape=SHAPE,
+        sample_rate=SAMPLE_RATE,
+        envelope=(ATTACK_MS, DECAY_MS, SUSTAIN, RELEASE_MS),
+        cache_bytes=CACHE_BYTES,
+        wrap=None,
+    ):
+        self.table = make_table(shape)
+        self.sample_rate = sample_rate
+        self.envelope = envelope
+        self.budget = cache_bytes
+        self.wrap = wrap
+        self.samples = {}
+        self.order = []  # keys, least recently used first
+        self.used = 0
+        self.hits = 0
+        self.misses = 0
+
+    def note(self, frequency, ms):
+        """Rendered (and wrapped) sample for a note, from the cache if possible"""
+        key = (frequency, ms)
+        sample = self.samples.get(key)
+        if sample is not None:
+            self.hits += 1
+            self.order.remove(key)
+            self.order.append(key)
+            return sample
+        self.misses += 1
+        buffer = self.render(frequency, ms)
+        sample = self.wrap(buffer) if self.wrap else buffer
+        size = len(buffer)
+        if size <= self.budget:
+            while self.used + size > self.budget:
+                old_key = self.order.pop(0)
+                self.samples.pop(old_key)
+                self.used -= old_key[1] * self.sample_rate // 1000
+            self.samples[key] = sample
+            self.order.append(key)
+            self.used += size
+        return sample
+
+    def render(self, frequency, ms):
+        """Render ms milliseconds of a tone into a new array('b')"""
+        rate = self.sample_rate
+        count = ms * rate // 1000
+        buffer = array.array("b", bytes(count))
+        attack_ms, decay_ms, sustain, release_ms = self.envelope
+        attack = min(attack_ms * rate // 1000, count)
+        release = min(release_ms * rate // 1000, count - attack)
+        decay = min(decay_ms * rate // 1000, count - attack - release)
+        # The release starts where the stage before it ended: at the sustain
+        # level, or at PEAK when the note is too short for decay and sustain
+        release_level = sustain if count - attack - release else PEAK
+        # (start, end, level at start, level at end) of each envelope stage
+        stages = (
+            (0, attack, 0, PEAK),
+            (attack, attack + decay, PEAK, sustain),
+            (attack + decay, count - release, sustain, sustain),
+            (count - release, count, release_level, 0),
+        )
+
+        table = self.table
+        phase_mask = (TABLE_SIZE << 16) - 1  # phase is 16.16 fixed point
+        step = (frequency * TABLE_SIZE << 16) // rate
+        phase = 0
+        for start, end, level0, level1 in stages:
+            length = end - start
+            if length <= 0:
+                continue
+            slope = level1 - level0
+            for i in range(start, end):
+                level = level0 + slope * (i - start) // length
+                buffer[i] = table[phase >> 16] * level >> 8
+                phase = (phase + step) & phase_mask
+        return buffer
@@ -0,0 +1,301 @@
+"""
+Traffic light checks - run on a computer, not on the RP2040
+
+Runs the phase logic in traffic.py against a fake millisecond clock and
+checks its behaviour. Prints one line per check and exits with status 1 if
+any check fails.
+
+Usage:
+    python check.py [check ...]
+"""
+
+import random
+import sys
+import time
+
+from fades import LEVELS, MAX_DUTY, Fader
+from traffic import DEFAULT_PLAN, Network, TrafficLight, green_wave, make_plan
+
+CYCLES = 10000
+POLL_MS = 10
+
+
+def check_timing():
+    """Phases start exactly on schedule over many cycles, with jittery ticks"""
+    rng = random.Random(1)
+    changes = []  # (phase name, start ms as scheduled, ms when it was shown)
+    clock = [0]
+
+    def on_change(name, started):
+        changes.append((name, started, clock[0]))
+
+    light = TrafficLight(DEFAULT_PLAN, 0, lambda mask: None, on_change)
+    cycle_ms = sum(row[2] for row in DEFAULT_PLAN)
+    end = CYCLES * cycle_ms
+    while clock[0] <= end:
+        wait = light.tick(clock[0])
+        # Tick somewhere before the deadline, or late by up to one poll
+        # interval plus 3 ms of scheduling jitter
+        if rng.randrange(2):
+            clock[0] += rng.randrange(1, wait + 1)
+        else:
+            clock[0] += wait + rng.randrange(POLL_MS + 4)
+
+    expected = 0
+    worst_lag = 0
+    for i, (name, started, shown) in enumerate(changes):
+        row = DEFAULT_PLAN[i % len(DEFAULT_PLAN)]
+        if name != row[0]:
+            return f"phase {i} is {name}, expected {row[0]}"
+        if started != expected:
+            return f"phase {i} ({name}) starts at {started} ms, expected {expected} ms"
+        worst_lag = max(worst_lag, shown - started)
+        expected += row[2]
+    if len(changes) < CYCLES * len(DEFAULT_PLAN):
+        return f"only {len(changes)} phase changes in {CYCLES} cycles"
+    if worst_lag > POLL_MS + 3:
+        return f"a phase was shown {worst_lag} ms late"
+    print(f"    {len(changes)} phases, all on schedule, shown at most {worst_lag} ms late")
+    return None
+
+
+def check_network():
+    """A network matches one TrafficLight per intersection, started at its offset"""
+    offsets = green_wave(50, 730)
+    network = Network(DEFAULT_PLAN, offsets, 0, lambda state: None)
+    masks = [0] * len(offsets)
+    lights = []
+    for i, offset in enumerate(offsets):
+        # The network starts each plan offset ms into its cycle
+        start = offset % network.cycle_ms - network.cycle_ms
+
+        def output(mask, i=i):
+            masks[i] = mask
+
+        lights.append(TrafficLight(DEFAULT_PLAN, start, output))
+    now = 0
+    for _ in range(20000):
+        for light in lights:
+            light.tick(now)
+        for i in range(len(offsets)):
+            if network.mask(i) != masks[i]:
+                return f"intersection {i} shows {network.mask(i)} at {now} ms, expected {masks[i]}"
+        now += network.tick(now)
+        network.tick(now)
+    return None
+
+
+def check_intersections(count=1000, travel_ms=100, cycles=5):
+    """Scheduler cost per tick for a large network, ticked every POLL_MS"""
+    writes = [0]
+
+    def output(state):
+        writes[0] += 1
+
+    network = Network(DEFAULT_PLAN, green_wave(count, travel_ms), 0, output)
+    end = cycles * network.cycle_ms
+    ticks = 0
+    worst = 0
+    start = time.perf_counter_ns()
+    now = 0
+    while now < end:
+        t = time.perf_counter_ns()
+        network.tick(now)
+        worst = max(worst, time.perf_counter_ns() - t)
+        ticks += 1
+        now += POLL_MS
+    total = time.perf_counter_ns() - start
+    changes = cycles * count * len(DEFAULT_PLAN)
+    print(
+        f"    {count} intersections, {ticks} ticks, {changes} phase changes, "
+        f"{writes[0]} batched writes"
+    )
+    print(
+        f"    {total / ticks / 1000:.1f} us per tick on average, "
+        f"{worst / 1000:.1f} us worst, {total / changes / 1000:.2f} us per phase change"
+    )
+    if writes[0] > ticks:
+        return "more than one output write per tick"
+    return None
+
+
+def check_requests(events=20000):
+    """Random pedestrian and vehicle requests are all served within the bound"""
+    rng = random.Random(2)
+    plan = make_plan(
+        5000, 2000, 5000, min_green_ms=2000, max_green_ms=10000, extend_ms=1500, min_red_ms=2000
+    )
+    pending = {"RED": [], "GREEN": []}  # request times not yet served
+    worst = {"RED": 0, "GREEN": 0}
+    served = [0]
+    errors = []
+    clock = [0]
+    started = [0]  # when the phase being served started
+
+    def on_change(name, at_ms):
+        started[0] = at_ms
+
+    def on_service(name, latency):
+        # Requests for a phase are served together; the oldest waited longest
+        requested = pending[name]
+        if not requested:
+            errors.append(f"{name} served at {started[0]} ms without a request")
+            return
+        if latency != started[0] - requested[0]:
+            errors.append(f"{name} reported {latency} ms, waited {started[0] - requested[0]} ms")
+        worst[name] = max(worst[name], latency)
+        served[0] += len(requested)
+        requested.clear()
+
+    light = TrafficLight(plan, 0, lambda mask: None, on_change, on_service=on_service)
+    # Requests are captured between ticks, up to POLL_MS before the poll
+    # that hands them to the light
+    for _ in range(events):
+        clock[0] += rng.randrange(1, 4000)
+        name = "RED" if rng.randrange(3) else "GREEN"
+        age = rng.randrange(POLL_MS + 1)
+        light.tick(clock[0])
+        pending[name].append(clock[0] - age)
+        # An extended green serves its request straight away
+        started[0] = clock[0]
+        light.request(name, clock[0], age)
+    light.tick(clock[0] + 2 * light.latency_bound("RED"))
+
+    if errors:
+        return errors[0]
+    unserved = len(pending["RED"]) + len(pending["GREEN"])
+    if unserved:
+        return f"{unserved} requests never served"
+    for name, kind in (("RED", "pedestrian"), ("GREEN", "vehicle")):
+        bound = light.latency_bound(name) + POLL_MS
+        print(f"    {kind}: worst latency {worst[name]} ms (bound {bound} ms)")
+        if worst[name] > bound:
+            return f"a {kind} request waited {worst[name]} ms, bound is {bound} ms"
+    print(f"    {served[0]} of {events} requests served")
+    return None
+
+
+def expected_fade(steps, rising, brightness, gamma=2.2):
+    """Duty at each step of a fade, worked out directly in floats"""
+    duties = []
+    for k in range(steps + 1):
+        x = k / steps
+        level = round(LEVELS * x * x * (3 - 2 * x))
+        if not rising:
+            level = LEVELS - level
+        duties.append(int(brightness * MAX_DUTY * (level / LEVELS) ** gamma + 0.5))
+    return duties
+
+
+def check_fades(cycles=20):
+    """Every transition fades with the right duty sequence and step timing"""
+    fade_in_ms, fade_out_ms, step_ms, brightness = 100, 200, 10, 0.5
+
+    class Channel:
+        def __init__(self, name):
+            self.name = name
+            self.writes = []  # (ms, duty)
+            self._duty_cycle = 0
+
+        @property
+        def duty_cycle(self):
+            return self._duty_cycle
+
+        @duty_cycle.setter
+        def duty_cycle(self, value):
+            self.writes.append((clock[0], value))
+            self._duty_cycle = value
+
+    clock = [0]
+    channels = [Channel(row[0]) for row in DEFAULT_PLAN[::-1]]  # red, yellow, green
+    fader = Fader([channels], fade_in_ms, fade_out_ms, step_ms, brightness)
+    state = bytearray(1)
+    changes = []
+
+    def output(mask):
+        state[0] = mask
+        fader.write(state)
+
+    def on_change(name, started):
+        changes.append((name, started))
+
+    light = TrafficLight(DEFAULT_PLAN, 0, output, on_change)
+    cycle_ms = sum(row[2] for row in DEFAULT_PLAN)
+    steps = 0
+    start = time.perf_counter_ns()
+    while clock[0] < cycles * cycle_ms:
+        wait = light.tick(clock[0])
+        step = fader.step(clock[0])
+        if step is not None:
+            steps += 1
+            wait = min(wait, step)
+        clock[0] += wait
+    per_step = (time.perf_counter_ns() - start) / steps / 1000
+
+    rise = expected_fade(fade_in_ms // step_ms, True, brightness)
+    fall = expected_fade(fade_out_ms // step_ms, False, brightness)
+    for channel in channels:
+        # Split the writes into fades, one per phase change that turns the
+        # light on or off
+        fades = []
+        for ms, duty in channel.writes[1:]:
+            if fades and ms - fades[-1][-1][0] == step_ms:
+                fades[-1].append((ms, duty))
+            else:
+                fades.append([(ms, duty)])
+        switches = []
+        lit = False
+        for name, t in changes:
+            if (name == channel.name) != lit:
+                lit = not lit
+                switches.append(t)
+        if len(fades) != len(switches):
+            return f"{channel.name}: {len(fades)} fades for {len(switches)} changes"
+        for fade in fades:
+            began = fade[0][0] - step_ms
+            if began not in switches:
+                return f"{channel.name}: fade at {fade[0][0]} ms does not follow a phase change"
+            expected = rise if fade[-1][1] else fall
+            times = [began + k * step_ms for k in range(1, len(expected))]
+            duties = expected[1:]
+            # A level that does not change between steps is not written again
+            wanted = [(t, d) for t, d, last in zip(times, duties, expected) if d != last]
+            if fade != wanted:
+                return f"{channel.name}: fade at {began} ms is {fade}, expected {wanted}"
+    if max(duty for channel in channels for _, duty in channel.writes) != rise[-1]:
+        return "full brightness is not scaled by the brightness setting"
+    print(
+        f"    {len(changes)} phase changes, {steps} fade steps every {step_ms} ms, "
+        f"{per_step:.2f} us per step"
+    )
+    print(f"    fade in: {rise}")
+    print(f"    fade out: {fall}")
+    return None
+
+
+CHECKS = {
+    "timing": check_timing,
+    "network": check_network,
+    "intersections": check_intersections,
+    "requests": check_requests,
+    "fades": check_fades,
+}
+
+
+def main():
+    names = sys.argv[1:] or list(CHECKS)
+    failed = 0
+    for name in names:
+        print(f"{name}:")
+        result = CHECKS[name]()
+        if result:
+            print(f"  FAIL {result}")
+            failed += 1
+        else:
+            print("  ok")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,27 +1,73 @@
 """
 Traffic Light - CircuitPython
 Simple traffic light controller using red, yellow, and green LEDs.
+The phase sequence is a table in traffic.py, stepped by deadlines so the
+main loop never blocks for a whole phase. Several coordinated
+intersections can run from one board (see INTERSECTIONS). Pedestrian
+buttons and vehicle detectors can cut green short or extend it.
 
 Wiring:
 - Red LED    -> GP6 -> 220Ω resistor -> LED -> GND
 - Yellow LED -> GP7 -> 220Ω resistor -> LED -> GND
 - Green LED  -> GP8 -> 220Ω resistor -> LED -> GND
+- Pedestrian buttons (optional) -> PEDESTRIAN_PINS -> button -> GND
+- Vehicle detectors (optional)  -> VEHICLE_PINS, one rising edge per vehicle
 """
 
 import time
 import board
-import digitalio
+
+from traffic import Network, TrafficLight, green_wave, make_plan
 
 # Configuration - Timing in seconds
 GREEN_DURATION = 5.0   # How long green light stays on
 YELLOW_DURATION = 2.0  # How long yellow light stays on
 RED_DURATION = 5.0     # How long red light stays on
 
+# Requests - a pedestrian button asks for red, cutting green to MIN_GREEN;
+# each vehicle holds green GREEN_EXTENSION longer, up to MAX_GREEN. Red is
+# cut to MIN_RED for a waiting vehicle. Single intersection only.
+PEDESTRIAN_PINS = ()  # e.g. (board.GP14,)
+VEHICLE_PINS = ()     # e.g. (board.GP15,)
+MIN_GREEN = 2.0
+MAX_GREEN = 10.0
+GREEN_EXTENSION = 1.5
+MIN_RED = 2.0
+
+# Longest sleep (ms) between ticks, so the loop can do other work
+POLL_MS = 10
+
 # Pin Configuration
 RED_PIN = board.GP6
 YELLOW_PIN = board.GP7
 GREEN_PIN = board.GP8
 
+# Intersections - with more than one, each runs the same plan starting
+# TRAVEL_MS after the one before, so traffic meets a "green wave"
+INTERSECTIONS = 1
+TRAVEL_MS = 3000
+
+# LED output, written as one batch per update:
+#   "port"  - consecutive pins from RED_PIN set all at once (up to 4
+#             intersections from GP6, as GP23-GP25 are not on the header;
+#             intersection n uses RED_PIN + 4n to + 4n + 2)
+#   "shift" - a chain of 74HC595 shift registers, 2 intersections per chip
+#   "pins"  - RED_PIN, YELLOW_PIN and GREEN_PIN set one by one (1 intersection)
+#   "pwm"   - RED_PIN, YELLOW_PIN and GREEN_PIN dimmed with PWM, fading on
+#             and off like incandescent lamps (1 intersection)
+OUTPUT = "port"
+
+# PWM output (OUTPUT = "pwm")
+BRIGHTNESS = 1.0   # 0.0 to 1.0, e.g. 0.2 at night
+FADE_IN_MS = 100   # how long a light takes to come on
+FADE_OUT_MS = 200  # how long a light takes to go out
+FADE_STEP_MS = 10  # time between brightness steps
+
+# 74HC595 chain (OUTPUT = "shift"): SPI1 clock and data, plus a latch pin
+SHIFT_CLOCK_PIN = board.GP10  # -> SRCLK (pin 11)
+SHIFT_DATA_PIN = board.GP11   # -> SER (pin 14)
+SHIFT_LATCH_PIN = board.GP9   # -> RCLK (pin 12)
+
 print("=" * 50)
 print("Traffic Light Controller")
 print("=" * 50)
@@ -30,75 +76,156 @@ print("=" * 50)
 try:
     print("\nInitializing LEDs...")
 
-    red_led = digitalio.DigitalInOut(RED_PIN)
-    red_led.direction = digitalio.Direction.OUTPUT
+    if OUTPUT in ("pins", "pwm") and INTERSECTIONS > 1:
+        raise ValueError(
+            f'OUTPUT = "{OUTPUT}" drives 1 intersection; use "port" or "shift" for {INTERSECTIONS}'
+        )
+
+    if OUTPUT == "shift":
+        from outputs import ShiftRegisterOutput
+
+        output = ShiftRegisterOutput(
+            SHIFT_CLOCK_PIN, SHIFT_DATA_PIN, SHIFT_LATCH_PIN, INTERSECTIONS
+        )
+    elif OUTPUT == "port":
+        from outputs import PortOutput
 
-    yellow_led = digitalio.DigitalInOut(YELLOW_PIN)
-    yellow_led.direction = digitalio.Direction.OUTPUT
+        output = PortOutput(RED_PIN, INTERSECTIONS)
+    elif OUTPUT == "pwm":
+        from outputs import PWMOutput
 
-    green_led = digitalio.DigitalInOut(GREEN_PIN)
-    green_led.direction = digitalio.Direction.OUTPUT
+        output = PWMOutput(
+            [(RED_PIN, YELLOW_PIN, GREEN_PIN)], BRIGHTNESS, FADE_IN_MS, FADE_OUT_MS, FADE_STEP_MS
+        )
+    else:
+        from outputs import PinOutput
+
+        output = PinOutput([(RED_PIN, YELLOW_PIN, GREEN_PIN)])
 
     # Turn all LEDs off initially
-    red_led.value = False
-    yellow_led.value = False
-    green_led.value = False
+    state = bytearray((INTERSECTIONS + 1) // 2)
+    output.write(state)
 
-    print("✓ LEDs initialized")
-    print(f"  Red:    GP{RED_PIN}")
-    print(f"  Yellow: GP{YELLOW_PIN}")
-    print(f"  Green:  GP{GREEN_PIN}")
+    print(f"✓ LEDs initialized ({OUTPUT} output, {INTERSECTIONS} intersection(s))")
+    print(f"  Red:    {RED_PIN}")
+    print(f"  Yellow: {YELLOW_PIN}")
+    print(f"  Green:  {GREEN_PIN}")
 
 except Exception as e:
     print(f"✗ Error initializing LEDs: {e}")
     raise
 
+# Initialize request inputs
+inputs = None
+if INTERSECTIONS == 1 and (PEDESTRIAN_PINS or VEHICLE_PINS):
+    try:
+        from inputs import RequestInputs
+
+        inputs = RequestInputs(PEDESTRIAN_PINS, VEHICLE_PINS)
+        print(
+            f"✓ Requests: {len(PEDESTRIAN_PINS)} pedestrian button(s), "
+            f"{len(VEHICLE_PINS)} vehicle detector(s)"
+        )
+    except Exception as e:
+        print(f"✗ Error initializing request inputs: {e}")
+        raise
+
 print("\nTraffic light sequence:")
 print(f"  Green:  {GREEN_DURATION}s")
+if inputs:
+    print(f"    ({MIN_GREEN}s to {MAX_GREEN}s on demand, +{GREEN_EXTENSION}s per vehicle)")
 print(f"  Yellow: {YELLOW_DURATION}s")
 print(f"  Red:    {RED_DURATION}s")
+if inputs:
+    print(f"    (at least {MIN_RED}s on demand)")
+if INTERSECTIONS > 1:
+    print(f"  Offset between intersections: {TRAVEL_MS} ms")
 print("\nStarting traffic light cycle...")
 print("Press Ctrl+C to stop\n")
 print("-" * 50)
 
+MESSAGES = {
+    "GREEN": "GREEN  - Go!",
+    "YELLOW": "YELLOW - Slow down!",
+    "RED": "RED    - Stop!",
+}
+
+
+def now_ms():
+    return time.monotonic_ns() // 1000000
+
+
+def show(mask):
+    """Show the LED mask of a single intersection"""
+    state[0] = mask
+    output.write(state)
+
+
+REQUESTS = {
+    "RED": "Pedestrian",
+    "GREEN": "Vehicle",
+}
+
+
+def announce(phase, started_ms):
+    print(MESSAGES.get(phase, phase))
+
+
+def served(phase, latency_ms):
+    worst = light.latency_bound(phase)
+    print(f"  {REQUESTS[phase]} request served after {latency_ms} ms (worst {worst} ms)")
+
+
+if inputs:
+    plan = make_plan(
+        int(GREEN_DURATION * 1000),
+        int(YELLOW_DURATION * 1000),
+        int(RED_DURATION * 1000),
+        min_green_ms=int(MIN_GREEN * 1000),
+        max_green_ms=int(MAX_GREEN * 1000),
+        extend_ms=int(GREEN_EXTENSION * 1000),
+        min_red_ms=int(MIN_RED * 1000),
+    )
+else:
+    plan = make_plan(
+        int(GREEN_DURATION * 1000),
+        int(YELLOW_DURATION * 1000),
+        int(RED_DURATION * 1000),
+    )
+
 # Main loop
 try:
+    if INTERSECTIONS == 1:
+        light = TrafficLight(plan, now_ms(), show, announce, on_service=served)
+    else:
+        light = Network(plan, green_wave(INTERSECTIONS, TRAVEL_MS), now_ms(), output.write)
     while True:
-        # GREEN LIGHT
-        print("GREEN  - Go!")
-        green_led.value = True
-        red_led.value = False
-        yellow_led.value = False
-        time.sleep(GREEN_DURATION)
-
-        # YELLOW LIGHT
-        print("YELLOW - Slow down!")
-        green_led.value = False
-        yellow_led.value = True
-        red_led.value = False
-        time.sleep(YELLOW_DURATION)
-
-        # RED LIGHT
-        print("RED    - Stop!")
-        green_led.value = False
-        yellow_led.value = False
-        red_led.value = True
-        time.sleep(RED_DURATION)
+        now = now_ms()
+        if inputs:
+            inputs.poll(now, light)
+        wait_ms = light.tick(now)
+        if OUTPUT == "pwm":
+            # Fade steps are due every FADE_STEP_MS after a phase change
+            step_ms = output.step(now)
+            if step_ms is not None:
+                wait_ms = min(wait_ms, step_ms)
+        # Other work (sensors, ...) can go here
+        time.sleep(min(wait_ms, POLL_MS) / 1000)
 
 except KeyboardInterrupt:
     print("\n\nTraffic light stopped by user")
 
     # Turn all LEDs off
-    red_led.value = False
-    yellow_led.value = False
-    green_led.value = False
+    output.deinit()
+    if inputs:
+        inputs.deinit()
 
     print("All lights turned off")
 
 except Exception as e:
     print(f"\n\nError: {e}")
     # Turn all LEDs off on error
-    red_led.value = False
-    yellow_led.value = False
-    green_led.value = False
+    output.deinit()
+    if inputs:
+        inputs.deinit()
     raise
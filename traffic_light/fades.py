@@ -0,0 +1,112 @@
+"""
+Traffic Light - LED fades
+Gamma-corrected fades for PWM-dimmed LEDs. The gamma table and the fade
+curves are computed once at startup. After that each fade step is an
+integer division and two table lookups, with no float math. There are no
+hardware imports here, so check.py can run it on a computer.
+"""
+
+import array
+
+# Perceived brightness steps, and the PWM duty of a fully lit LED
+LEVELS = 255
+MAX_DUTY = 65535
+
+
+def gamma_table(brightness=1.0, gamma=2.2):
+    """PWM duty for each perceived brightness level 0..LEVELS
+
+    The eye is far more sensitive to changes in dim light, so equal steps
+    in level need much smaller steps in duty near the bottom. brightness
+    scales the whole table (e.g. 0.2 to dim the lights at night).
+    """
+    top = brightness * MAX_DUTY
+    return array.array(
+        "H", [int(top * (level / LEVELS) ** gamma + 0.5) for level in range(LEVELS + 1)]
+    )
+
+
+def fade_curve(steps, rising):
+    """Perceived level at each of steps + 1 fade steps, easing in and out
+
+    Like an incandescent lamp, the light changes slowly at first and at the
+    end of a fade, and fastest in the middle.
+    """
+    curve = array.array("B")
+    for k in range(steps + 1):
+        x = k / steps
+        level = int(LEVELS * x * x * (3 - 2 * x) + 0.5)
+        curve.append(level if rising else LEVELS - level)
+    return curve
+
+
+class Fader:
+    """Fades PWM channels on and off to follow a state buffer
+
+    channels is [(red, yellow, green), ...], one tuple per intersection, of
+    objects with a duty_cycle (pwmio.PWMOut). write() takes the same state
+    buffer as the outputs in outputs.py and starts the fades; step() must
+    then be called with the time in ms until it returns None. It returns
+    the ms until the next step, which is due every step_ms from the first
+    step() after write().
+    """
+
+    def __init__(
+        self, channels, fade_in_ms=100, fade_out_ms=200, step_ms=10, brightness=1.0, gamma=2.2
+    ):
+        self.channels = [channel for group in channels for channel in group]
+        self.duty = gamma_table(brightness, gamma)
+        self.step_ms = step_ms
+        self.rise = fade_curve(max(1, fade_in_ms // step_ms), True)
+        self.fall = fade_curve(max(1, fade_out_ms // step_ms), False)
+        count = len(self.channels)
+        self.level = bytearray(count)
+        self.curve = [None] * count  # fade curve of each fading channel
+        self.first = [0] * count  # step of its curve when the fade started
+        self.started = None
+        for channel in self.channels:
+            channel.duty_cycle = 0
+
+    def write(self, state):
+        for i in range(len(self.channels)):
+            intersection, light = divmod(i, 3)
+            on = state[intersection >> 1] >> ((intersection & 1) * 4 + light) & 1
+            curve = self.rise if on else self.fall
+            level = self.level[i]
+            if level == curve[-1]:
+                self.curve[i] = None
+                continue
+            # Continue from the current level if a fade is cut short
+            k = 0
+            if on:
+                while curve[k] < level:
+                    k += 1
+            else:
+                while curve[k] > level:
+                    k += 1
+            self.curve[i] = curve
+            self.first[i] = k
+        self.started = None
+
+    def step(self, now_ms):
+        """Set the duty of every fading channel for now_ms; returns ms until the next step"""
+        if self.started is None:
+            self.started = now_ms
+        k = (now_ms - self.started) // self.step_ms
+        fading = False
+        for i, curve in enumerate(self.curve):
+            if curve is None:
+                continue
+            j = self.first[i] + k
+            if j >= len(curve) - 1:
+                j = len(curve) - 1
+                self.curve[i] = None
+            else:
+                fading = True
+            level = curve[j]
+            if level != self.level[i]:
+                self.level[i] = level
+                self.channels[i].duty_cycle = self.duty[level]
+        if not fading:
+            return None
+        return self.started + (k + 1) * self.step_ms - now_ms
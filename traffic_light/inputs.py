@@ -0,0 +1,50 @@
+"""
+Traffic Light - Request inputs
+Pedestrian buttons and vehicle detectors are captured in the background by
+keypad and countio, so a press or a passing car is never missed while the
+main loop is between ticks. poll() hands the queued requests to the
+TrafficLight in traffic.py.
+"""
+
+import countio
+import keypad
+import supervisor
+
+# supervisor.ticks_ms() and keypad event timestamps wrap at 2**29
+TICKS_MASK = 0x1FFFFFFF
+
+
+class RequestInputs:
+    """Pedestrian buttons (request RED) and vehicle detectors (request GREEN)
+
+    Buttons connect their pin to GND when pressed. keypad scans them and
+    queues each press with its timestamp, so the request's age is known.
+    Detectors give a rising edge per vehicle; countio counts the edges, so a
+    vehicle is only seen at the next poll and counts from then.
+    """
+
+    def __init__(self, pedestrian_pins=(), vehicle_pins=()):
+        self.keys = None
+        if pedestrian_pins:
+            self.keys = keypad.Keys(pedestrian_pins, value_when_pressed=False, pull=True)
+            self.event = keypad.Event()
+        self.counters = [countio.Counter(pin, edge=countio.Edge.RISE) for pin in vehicle_pins]
+
+    def poll(self, now_ms, light):
+        """Pass every request since the last poll to light"""
+        if self.keys:
+            event = self.event
+            while self.keys.events.get_into(event):
+                if event.pressed:
+                    age = (supervisor.ticks_ms() - event.timestamp) & TICKS_MASK
+                    light.request("RED", now_ms, age)
+        for counter in self.counters:
+            if counter.count:
+                counter.reset()
+                light.request("GREEN", now_ms)
+
+    def deinit(self):
+        if self.keys:
+            self.keys.deinit()
+        for counter in self.counters:
+            counter.deinit()
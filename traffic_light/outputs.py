@@ -0,0 +1,156 @@
+"""
+Traffic Light - LED outputs
+Each output takes the whole LED state buffer from traffic.py (4 bits per
+intersection: red, yellow, green, spare) and shows it with one batched
+write, instead of setting LED pins one at a time. PWMOutput fades the
+lights instead of switching them.
+"""
+
+import array
+
+import digitalio
+
+from fades import Fader
+
+
+class PinOutput:
+    """Separate DigitalInOut pins, 3 per intersection (simple fallback)"""
+
+    def __init__(self, pins):
+        # pins: [(red, yellow, green), ...], one tuple per intersection
+        self.leds = []
+        for group in pins:
+            for pin in group:
+                led = digitalio.DigitalInOut(pin)
+                led.direction = digitalio.Direction.OUTPUT
+                led.value = False
+                self.leds.append(led)
+
+    def write(self, state):
+        for i, led in enumerate(self.leds):
+            intersection, light = divmod(i, 3)
+            led.value = bool(state[intersection >> 1] >> ((intersection & 1) * 4 + light) & 1)
+
+    def deinit(self):
+        for led in self.leds:
+            led.deinit()
+
+
+class PortOutput:
+    """Consecutive GPIO pins set all at once through a PIO state machine
+
+    Intersection n uses pins first_pin + 4n (red), + 4n + 1 (yellow) and
+    + 4n + 2 (green); + 4n + 3 is driven but not used. All pins change in
+    the same clock cycle, like writing a port register. The pins must be
+    brought out on the board: on a Pico GP23-GP25 are used internally, so
+    from GP6 there is room for 4 intersections (GP6-GP20).
+    """
+
+    # "out pins, 32": copy the next word from the TX FIFO to the pins
+    PROGRAM = array.array("H", [0x6000])
+
+    # Runs of consecutive GPIO pins a Pico brings out to its header
+    # (GP23-GP25 drive the power supply and LED, GP29 measures VSYS)
+    HEADER_PINS = ((0, 22), (26, 28))
+
+    def __init__(self, first_pin, intersections):
+        import board
+        import rp2pio
+
+        pin_count = intersections * 4 - 1
+        first = None
+        for n in range(30):
+            if getattr(board, f"GP{n}", None) is first_pin:
+                first = n
+                break
+        if first is not None:
+            for low, high in self.HEADER_PINS:
+                if low <= first <= high:
+                    break
+            else:
+                raise ValueError(f"GP{first} is not on the header")
+            if first + pin_count - 1 > high:
+                raise ValueError(
+                    f"{intersections} intersections need GP{first}-GP{first + pin_count - 1}, "
+                    f"past GP{high}: at most {(high - first + 2) // 4} from GP{first}"
+                )
+
+        self.word = array.array("L", [0])
+        self.state_machine = rp2pio.StateMachine(
+            self.PROGRAM,
+            frequency=1000000,
+            first_out_pin=first_pin,
+            out_pin_count=pin_count,
+            auto_pull=True,
+            pull_threshold=32,
+            out_shift_right=True,
+        )
+
+    def write(self, state):
+        word = 0
+        for i, byte in enumerate(state):
+            word |= byte << (8 * i)
+        self.word[0] = word
+        self.state_machine.write(self.word)
+
+    def deinit(self):
+        self.word[0] = 0
+        self.state_machine.write(self.word)
+        self.state_machine.deinit()
+
+
+class ShiftRegisterOutput:
+    """A chain of 74HC595 shift registers fed over SPI
+
+    The state buffer is shifted out in one SPI transfer (last chip first),
+    then the latch pin copies it to every chip's outputs at once. Each chip
+    drives two intersections.
+    """
+
+    def __init__(self, clock, data, latch, intersections, baudrate=1000000):
+        import busio
+
+        self.spi = busio.SPI(clock, MOSI=data)
+        while not self.spi.try_lock():
+            pass
+        self.spi.configure(baudrate=baudrate)
+        self.latch = digitalio.DigitalInOut(latch)
+        self.latch.direction = digitalio.Direction.OUTPUT
+        self.buffer = bytearray((intersections + 1) // 2)
+
+    def write(self, state):
+        # The first byte sent ends up in the last chip of the chain
+        buffer = self.buffer
+        last = len(buffer) - 1
+        for i in range(len(buffer)):
+            buffer[last - i] = state[i]
+        self.spi.write(buffer)
+        self.latch.value = True
+        self.latch.value = False
+
+    def deinit(self):
+        self.write(bytes(len(self.buffer)))
+        self.spi.unlock()
+        self.spi.deinit()
+        self.latch.deinit()
+
+
+class PWMOutput(Fader):
+    """PWM pins, 3 per intersection, dimmed and faded (see fades.py)
+
+    write() starts the fades, then step() must be called from the main loop
+    until it returns None.
+    """
+
+    def __init__(self, pins, brightness=1.0, fade_in_ms=100, fade_out_ms=200, step_ms=10):
+        import pwmio
+
+        # pins: [(red, yellow, green), ...], one tuple per intersection
+        self.pwms = [[pwmio.PWMOut(pin, frequency=1000) for pin in group] for group in pins]
+        super().__init__(self.pwms, fade_in_ms, fade_out_ms, step_ms, brightness)
+
+    def deinit(self):
+        for group in self.pwms:
+            for pwm in group:
+                pwm.duty_cycle = 0
+                pwm.deinit()
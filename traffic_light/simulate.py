@@ -0,0 +1,488 @@
+"""
+Traffic light simulator - run on a computer, not on the RP2040
+
+Runs code.py against fake board, digitalio, rp2pio, busio, pwmio, time,
+keypad, countio and supervisor modules on a virtual clock. Each sleep jumps the clock straight to the next
+deadline (POLL_MS is raised so the main loop never wakes early), so a day
+of cycles takes a fraction of a second. Every change of an intersection's
+lights is recorded from the LED writes, then written as a CSV trace and
+summed up per phase. Pedestrian button presses and passing vehicles can be
+injected at set times; the clock wakes the main loop for each one, as its
+real POLL_MS would, and the program's "request served" reports are summed
+up too.
+
+Usage:
+    python simulate.py [--hours H] [--trace FILE] [--set NAME=VALUE ...]
+                       [--request MS[+EVERY]:PIN ...] [--verbose]
+
+    --hours H          simulated time (default 24)
+    --trace FILE       write the phase changes to FILE as CSV (ms,intersection,phase)
+    --set NAME=VALUE   replace a setting at the top of code.py, e.g.
+                       --set GREEN_DURATION=4.0 --set INTERSECTIONS=3
+    --request MS[+EVERY]:PIN
+                       press the button (or pulse the vehicle detector) on PIN
+                       at MS ms, and every EVERY ms after that, e.g.
+                       --set 'PEDESTRIAN_PINS=(board.GP14,)' --request 30000+90000:GP14
+    --verbose          show the program's console output
+"""
+
+import bisect
+import io
+import os
+import re
+import sys
+import time
+import types
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Longest sleep of the simulated main loop: far beyond any phase, so each
+# sleep lasts until the next deadline
+POLL_MS = 1 << 30
+
+# LED mask bits, as in traffic.py
+LIGHTS = ((1, "RED"), (2, "YELLOW"), (4, "GREEN"))
+
+
+class Stop(KeyboardInterrupt):
+    """Raised by the fake time.sleep when the simulated time is up
+
+    code.py treats it like Ctrl+C and turns the lights off.
+    """
+
+
+class Simulation:
+    """Virtual clock and light changes of one run"""
+
+    def __init__(self):
+        self.ns = 0
+        self.end_ns = 0
+        self.namespace = {}  # code.py's globals, filled in as it runs
+        self.masks = {}  # intersection -> LED mask shown now
+        self.trace = []  # (ms, intersection, LED mask)
+        self.sleeps = 0
+        self.requests = []  # (ns, pin) not yet seen by an input, sorted
+        self.input_pins = set()  # pins of the fake keypad and countio
+        self.served = []  # (request, latency ms) reported by code.py
+
+    def add_request(self, ms, every_ms, pin):
+        """Schedule a press or vehicle on pin at ms, repeated every_ms"""
+        ns = ms * 1000000
+        while ns < self.end_ns:
+            bisect.insort(self.requests, (ns, pin))
+            if not every_ms:
+                break
+            ns += every_ms * 1000000
+
+    def take_requests(self, pin):
+        """Times (ns) of the requests on pin that are due, oldest first"""
+        due = [ns for ns, p in self.requests if p == pin and ns <= self.ns]
+        if due:
+            self.requests = [r for r in self.requests if r[1] != pin or r[0] > self.ns]
+        return due
+
+    def next_request_ns(self):
+        """When the next request after now arrives, or None"""
+        i = bisect.bisect_right(self.requests, (self.ns, "\uffff"))
+        return self.requests[i][0] if i < len(self.requests) else None
+
+    def show(self, intersection, mask):
+        """Record an intersection's LEDs, if they changed"""
+        if self.masks.get(intersection, 0) != mask:
+            self.masks[intersection] = mask
+            self.trace.append((self.ns // 1000000, intersection, mask))
+
+    def show_state(self, state):
+        """Record a whole state buffer (4 bits per intersection, 2 per byte)"""
+        for n in range(self.namespace["INTERSECTIONS"]):
+            self.show(n, state[n >> 1] >> ((n & 1) * 4) & 7)
+
+
+SIM = Simulation()
+
+
+# Fake time -------------------------------------------------------------------
+
+def monotonic_ns():
+    return SIM.ns
+
+
+def monotonic():
+    return SIM.ns / 1000000000
+
+
+def fake_sleep(seconds):
+    SIM.sleeps += 1
+    wake_ns = SIM.ns + round(seconds * 1000000000)
+    # A request wakes the loop, as polling every POLL_MS would on the board
+    request_ns = SIM.next_request_ns()
+    if request_ns is not None and request_ns < wake_ns:
+        wake_ns = request_ns
+    SIM.ns = wake_ns
+    if SIM.ns >= SIM.end_ns:
+        SIM.ns = SIM.end_ns
+        raise Stop
+
+
+# Fake digitalio --------------------------------------------------------------
+
+class Direction:
+    INPUT = "INPUT"
+    OUTPUT = "OUTPUT"
+
+
+class DigitalInOut:
+    """A pin; the red, yellow and green pins of code.py show intersection 0"""
+
+    def __init__(self, pin):
+        self.pin = pin
+        self.direction = Direction.INPUT
+        self._value = False
+        self.bit = 0
+        for bit, name in LIGHTS:
+            if SIM.namespace.get(name + "_PIN") == pin:
+                self.bit = bit
+
+    @property
+    def value(self):
+        return self._value
+
+    @value.setter
+    def value(self, value):
+        self._value = bool(value)
+        if self.bit:
+            mask = SIM.masks.get(0, 0) & ~self.bit
+            SIM.show(0, mask | self.bit if value else mask)
+
+    def deinit(self):
+        self.value = False
+
+
+# Fake pwmio ------------------------------------------------------------------
+
+class PWMOut:
+    """A PWM pin; a light counts as on while its duty cycle is above 0"""
+
+    def __init__(self, pin, *, duty_cycle=0, frequency=500, variable_frequency=False):
+        self.led = DigitalInOut(pin)
+        self._duty_cycle = duty_cycle
+        self.frequency = frequency
+
+    @property
+    def duty_cycle(self):
+        return self._duty_cycle
+
+    @duty_cycle.setter
+    def duty_cycle(self, value):
+        self._duty_cycle = value
+        self.led.value = value > 0
+
+    def deinit(self):
+        self.led.deinit()
+
+
+# Fake rp2pio -----------------------------------------------------------------
+
+class StateMachine:
+    """Decodes the words written to the pins, 4 pins per intersection"""
+
+    def __init__(self, program, *, frequency, first_out_pin, out_pin_count, **kwargs):
+        self.first_out_pin = first_out_pin
+
+    def write(self, buffer):
+        word = buffer[-1]
+        SIM.show_state(word.to_bytes(4, "little"))
+
+    def deinit(self):
+        pass
+
+
+# Fake supervisor, keypad and countio ------------------------------------------
+
+TICKS_MASK = 0x1FFFFFFF
+
+
+def ticks_ms():
+    return SIM.ns // 1000000 & TICKS_MASK
+
+
+class Event:
+    def __init__(self, key_number=0, pressed=True, timestamp=0):
+        self.key_number = key_number
+        self.pressed = pressed
+        self.released = not pressed
+        self.timestamp = timestamp
+
+
+class EventQueue:
+    """Hands out a press event for each request due on the keys' pins"""
+
+    def __init__(self, pins):
+        self.pins = pins
+        self.pending = []  # (ns, key number)
+
+    def get_into(self, event):
+        if not self.pending:
+            for key_number, pin in enumerate(self.pins):
+                self.pending += [(ns, key_number) for ns in SIM.take_requests(pin)]
+            self.pending.sort()
+        if not self.pending:
+            return False
+        ns, event.key_number = self.pending.pop(0)
+        event.pressed = True
+        event.released = False
+        event.timestamp = ns // 1000000 & TICKS_MASK
+        return True
+
+
+class Keys:
+    def __init__(self, pins, *, value_when_pressed, pull=True, **kwargs):
+        SIM.input_pins.update(pins)
+        self.events = EventQueue(tuple(pins))
+
+    def deinit(self):
+        pass
+
+
+class Edge:
+    RISE = "RISE"
+    FALL = "FALL"
+
+
+class Counter:
+    """Counts a rising edge for each request due on its pin"""
+
+    def __init__(self, pin, *, edge=Edge.FALL, pull=None):
+        SIM.input_pins.add(pin)
+        self.pin = pin
+        self.counted = 0
+
+    @property
+    def count(self):
+        self.counted += len(SIM.take_requests(self.pin))
+        return self.counted
+
+    def reset(self):
+        self.counted = 0
+
+    def deinit(self):
+        pass
+
+
+# Fake busio ------------------------------------------------------------------
+
+class SPI:
+    """Decodes the bytes shifted into a 74HC595 chain (last chip first)"""
+
+    def __init__(self, clock, MOSI=None, MISO=None):
+        pass
+
+    def try_lock(self):
+        return True
+
+    def configure(self, **kwargs):
+        pass
+
+    def write(self, buffer):
+        SIM.show_state(bytes(reversed(buffer)))
+
+    def unlock(self):
+        pass
+
+    def deinit(self):
+        pass
+
+
+# Running code.py ---------------------------------------------------------------
+
+SERVED = re.compile(r"(\w+) request served after (\d+) ms")
+
+
+class Console(io.TextIOBase):
+    """Swallows the program's output unless --verbose, keeping its request
+    reports"""
+
+    def __init__(self, echo):
+        self.echo = echo
+
+    def write(self, text):
+        if self.echo:
+            sys.__stdout__.write(text)
+        for name, ms in SERVED.findall(text):
+            SIM.served.append((name, int(ms)))
+        return len(text)
+
+
+def fake_modules():
+    board = types.ModuleType("board")
+    for n in range(30):
+        setattr(board, f"GP{n}", f"GP{n}")
+    digitalio = types.ModuleType("digitalio")
+    digitalio.DigitalInOut = DigitalInOut
+    digitalio.Direction = Direction
+    rp2pio = types.ModuleType("rp2pio")
+    rp2pio.StateMachine = StateMachine
+    pwmio = types.ModuleType("pwmio")
+    pwmio.PWMOut = PWMOut
+    busio = types.ModuleType("busio")
+    busio.SPI = SPI
+    fake_time = types.ModuleType("time")
+    fake_time.monotonic_ns = monotonic_ns
+    fake_time.monotonic = monotonic
+    fake_time.sleep = fake_sleep
+    supervisor = types.ModuleType("supervisor")
+    supervisor.ticks_ms = ticks_ms
+    keypad = types.ModuleType("keypad")
+    keypad.Keys = Keys
+    keypad.Event = Event
+    countio = types.ModuleType("countio")
+    countio.Counter = Counter
+    countio.Edge = Edge
+    return {
+        "board": board,
+        "digitalio": digitalio,
+        "rp2pio": rp2pio,
+        "busio": busio,
+        "pwmio": pwmio,
+        "time": fake_time,
+        "supervisor": supervisor,
+        "keypad": keypad,
+        "countio": countio,
+    }
+
+
+def apply_settings(source, settings):
+    """Replace "NAME = ..." lines of code.py with the given values"""
+    for name, value in settings:
+        source, count = re.subn(
+            rf"^{name} = .*$", f"{name} = {value}", source, count=1, flags=re.M
+        )
+        if not count:
+            raise SystemExit(f"code.py has no setting {name}")
+    return source
+
+
+def run_program(hours, settings=(), verbose=False, requests=()):
+    """Run code.py for the given number of simulated hours
+
+    requests are (ms, every ms, pin) presses or vehicles to inject.
+    """
+    path = os.path.join(HERE, "code.py")
+    with open(path) as f:
+        source = apply_settings(f.read(), [("POLL_MS", POLL_MS)] + list(settings))
+    SIM.end_ns = round(hours * 3600 * 1000000000)
+    for ms, every_ms, pin in requests:
+        SIM.add_request(ms, every_ms, pin)
+    SIM.namespace = {"__name__": "__main__", "__file__": path}
+
+    modules = fake_modules()
+    saved = {name: sys.modules.get(name) for name in modules}
+    sys.modules.update(modules)
+    sys.path.insert(0, HERE)
+    for name in ("traffic", "outputs", "fades", "inputs"):
+        sys.modules.pop(name, None)
+    stdout = sys.stdout
+    sys.stdout = Console(verbose)
+    try:
+        exec(compile(source, path, "exec"), SIM.namespace)
+    finally:
+        sys.stdout = stdout
+        sys.path.remove(HERE)
+        for name in ("traffic", "outputs", "fades", "inputs"):
+            sys.modules.pop(name, None)
+        for name, module in saved.items():
+            if module is None:
+                sys.modules.pop(name, None)
+            else:
+                sys.modules[name] = module
+    unused = {pin for _, _, pin in requests} - SIM.input_pins
+    if unused:
+        raise SystemExit(
+            f"No pedestrian button or vehicle detector on {', '.join(sorted(unused))} "
+            "(see PEDESTRIAN_PINS and VEHICLE_PINS; inputs need INTERSECTIONS = 1)"
+        )
+
+
+# Analysis ----------------------------------------------------------------------
+
+def phase_name(mask):
+    names = [name for bit, name in LIGHTS if mask & bit]
+    return "+".join(names) or "OFF"
+
+
+def write_trace(path):
+    with open(path, "w") as f:
+        f.write("ms,intersection,phase\n")
+        for ms, intersection, mask in SIM.trace:
+            f.write(f"{ms},{intersection},{phase_name(mask)}\n")
+
+
+def totals():
+    """{phase: [times shown, total ms]} over all intersections"""
+    end_ms = SIM.end_ns // 1000000
+    result = {}
+    shown = {}  # intersection -> (mask, since ms)
+    for ms, intersection, mask in SIM.trace + [(end_ms, None, 0)]:
+        for n in ([intersection] if intersection is not None else list(shown)):
+            if n in shown:
+                previous, since = shown.pop(n)
+                if previous and ms > since:
+                    entry = result.setdefault(phase_name(previous), [0, 0])
+                    entry[0] += 1
+                    entry[1] += ms - since
+        if intersection is not None and mask:
+            shown[intersection] = (mask, ms)
+    return result
+
+
+def parse_request(text):
+    """MS[+EVERY]:PIN as (ms, every ms, pin)"""
+    times, _, pin = text.partition(":")
+    ms, _, every_ms = times.partition("+")
+    if not pin or not ms.isdigit() or not (every_ms or "0").isdigit():
+        raise SystemExit(f"--request {text}: expected MS[+EVERY]:PIN, e.g. 30000+90000:GP14")
+    return int(ms), int(every_ms or 0), pin
+
+
+def main():
+    args = sys.argv[1:]
+    hours = float(args[args.index("--hours") + 1]) if "--hours" in args else 24
+    trace_path = args[args.index("--trace") + 1] if "--trace" in args else None
+    verbose = "--verbose" in args
+    settings = [
+        tuple(args[i + 1].split("=", 1)) for i, arg in enumerate(args) if arg == "--set"
+    ]
+    requests = [parse_request(args[i + 1]) for i, arg in enumerate(args) if arg == "--request"]
+
+    wall_start = time.perf_counter()
+    run_program(hours, settings, verbose, requests)
+    wall = time.perf_counter() - wall_start
+
+    if trace_path:
+        write_trace(trace_path)
+    intersections = SIM.namespace["INTERSECTIONS"]
+    total_ms = SIM.end_ns // 1000000 * intersections
+    print(f"{'phase':<12} {'shown':>8} {'total s':>10} {'share':>7} {'average s':>10}")
+    for name, (count, ms) in sorted(totals().items(), key=lambda item: -item[1][1]):
+        print(
+            f"{name:<12} {count:8d} {ms / 1000:10.1f} {100 * ms / total_ms:6.1f}% "
+            f"{ms / count / 1000:10.3f}"
+        )
+    print(
+        f"Simulated {hours:g} h of {intersections} intersection(s): "
+        f"{len(SIM.trace)} light changes, {SIM.sleeps} sleeps, in {wall:.2f} s"
+    )
+    if requests:
+        by_kind = {}
+        for name, ms in SIM.served:
+            by_kind.setdefault(name, []).append(ms)
+        for name, latencies in sorted(by_kind.items()):
+            print(
+                f"{name} requests served: {len(latencies)}, after "
+                f"{sum(latencies) / len(latencies) / 1000:.3f} s on average, "
+                f"{max(latencies) / 1000:.3f} s at most"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""
+Traffic Light - Phase logic
+Runs a traffic light plan from a table of phases, driven by millisecond
+deadlines instead of sleeps. There are no hardware imports here: code.py
+connects the controller to the LEDs, and check.py runs it against a fake
+clock on a computer.
+"""
+
+import array
+
+# LED mask bits
+RED = 1
+YELLOW = 2
+GREEN = 4
+
+
+def make_plan(
+    green_ms,
+    yellow_ms,
+    red_ms,
+    min_green_ms=None,
+    max_green_ms=None,
+    extend_ms=0,
+    min_red_ms=None,
+):
+    """The standard green -> yellow -> red plan with the given durations
+
+    A plan is a phase table of (name, LED mask, duration in ms, name of the
+    next phase) rows. Other plans (all-red clearance, flashing yellow, ...)
+    are just different tables. A row may add (min ms, max ms, extension ms)
+    for requests: a phase is cut to its minimum when another phase is
+    requested, and each request for the phase itself holds it for the
+    extension, up to its maximum. Without them a phase always runs for its
+    duration.
+    """
+    return (
+        (
+            "GREEN",
+            GREEN,
+            green_ms,
+            "YELLOW",
+            green_ms if min_green_ms is None else min_green_ms,
+            green_ms if max_green_ms is None else max_green_ms,
+            extend_ms,
+        ),
+        ("YELLOW", YELLOW, yellow_ms, "RED"),
+        ("RED", RED, red_ms, "GREEN", red_ms if min_red_ms is None else min_red_ms, red_ms, 0),
+    )
+
+
+DEFAULT_PLAN = make_plan(5000, 2000, 5000)
+
+
+class TrafficLight:
+    """Steps through a phase table as its deadlines pass
+
+    Each phase ends a fixed time after the previous one ended, not after the
+    tick that noticed it, so late ticks never stretch the cycle. Whenever the
+    phase changes, output is called with its LED mask and on_change with its
+    name and scheduled start time.
+
+    request() asks for a phase (e.g. RED for a pedestrian, GREEN for a
+    waiting vehicle). When the phase starts, on_service is called with its
+    name and the ms from the request; latency_bound() gives the worst case.
+    """
+
+    def __init__(self, plan, now_ms, output, on_change=None, start=0, on_service=None):
+        names = [row[0] for row in plan]
+        self.names = names
+        self.masks = [row[1] for row in plan]
+        self.durations = [row[2] for row in plan]
+        self.next = [names.index(row[3]) for row in plan]
+        self.min = [row[4] if len(row) > 4 else row[2] for row in plan]
+        self.max = [row[5] if len(row) > 5 else row[2] for row in plan]
+        self.extend = [row[6] if len(row) > 6 else 0 for row in plan]
+        self.waiting = [None] * len(plan)  # request time for each phase
+        self.output = output
+        self.on_change = on_change
+        self.on_service = on_service
+        self.enter(start, now_ms)
+
+    def enter(self, phase, at_ms):
+        """Start a phase at at_ms and show it"""
+        self.phase = phase
+        self.started = at_ms
+        self.deadline = at_ms + self.durations[phase]
+        self.output(self.masks[phase])
+        if self.on_change:
+            self.on_change(self.names[phase], at_ms)
+        requested = self.waiting[phase]
+        if requested is not None:
+            self.waiting[phase] = None
+            if self.on_service:
+                self.on_service(self.names[phase], at_ms - requested)
+        self.hurry(at_ms)
+
+    def hurry(self, now_ms):
+        """Cut the current phase to its minimum if another phase is waiting"""
+        for phase, requested in enumerate(self.waiting):
+            if requested is not None and phase != self.phase:
+                shortest = max(self.started + self.min[self.phase], now_ms)
+                if shortest - self.deadline < 0:
+                    self.deadline = shortest
+                return
+
+    def request(self, name, now_ms, age_ms=0):
+        """Ask for a phase; age_ms is how long ago the request was made"""
+        phase = self.names.index(name)
+        requested = now_ms - age_ms
+        if phase == self.phase and self.extend[phase]:
+            # Hold the phase a little longer, up to its maximum
+            held = min(now_ms + self.extend[phase], self.started + self.max[phase])
+            if held - self.deadline > 0:
+                self.deadline = held
+            if self.on_service:
+                self.on_service(name, age_ms)
+            return
+        if self.waiting[phase] is None:
+            self.waiting[phase] = requested
+        self.hurry(now_ms)
+
+    def latency_bound(self, name):
+        """Longest possible wait (ms) from a request for a phase to its start
+
+        The request may arrive just as the phase starts without extending
+        it, so the wait can be its whole length (not extended further) plus
+        every other phase, cut to its minimum unless requests extend it.
+        """
+        target = self.names.index(name)
+        total = 0
+        for phase in range(len(self.names)):
+            if phase == target:
+                total += self.durations[phase]
+            elif self.extend[phase]:
+                total += self.max[phase]
+            else:
+                total += self.min[phase]
+        return total
+
+    def tick(self, now_ms):
+        """Advance past every deadline up to now_ms; returns ms until the next one"""
+        while now_ms - self.deadline >= 0:
+            self.enter(self.next[self.phase], self.deadline)
+        return self.deadline - now_ms
+
+
+# Each intersection's LED mask takes 4 bits of a network's state buffer
+# (the 4th is spare), two intersections per byte, intersection 0 in the low
+# bits of byte 0. On a 74HC595 chain that is Q0-Q2 and Q4-Q6 of each chip.
+BITS_PER_SIGNAL = 4
+
+
+def green_wave(count, travel_ms):
+    """Offsets that start each intersection travel_ms after the one before"""
+    return [i * travel_ms for i in range(count)]
+
+
+class Network:
+    """Many intersections running one plan, each shifted by an offset
+
+    All intersections share the plan's cycle, so one cycle of phase changes
+    for the whole network is compiled into a single time-sorted table.
+    tick() walks that table from where it left off and only touches the
+    intersections that change, then writes the whole state buffer with one
+    call to output.
+    """
+
+    def __init__(self, plan, offsets, now_ms, output):
+        names = [row[0] for row in plan]
+        masks = [row[1] for row in plan]
+        durations = [row[2] for row in plan]
+        following = [names.index(row[3]) for row in plan]
+
+        # Start time of each phase within the cycle, following the table
+        # from its first row
+        starts = []
+        phase = 0
+        t = 0
+        while True:
+            starts.append((t, masks[phase]))
+            t += durations[phase]
+            phase = following[phase]
+            if phase == 0:
+                break
+        self.cycle_ms = t
+
+        events = []
+        for i, offset in enumerate(offsets):
+            for start, mask in starts:
+                events.append(((start + offset) % t, i << 8 | mask))
+        events.sort()
+        self.times = array.array("L", [e[0] for e in events])
+        self.changes = array.array("L", [e[1] for e in events])
+        self.count = len(offsets)
+        self.state = bytearray((len(offsets) * BITS_PER_SIGNAL + 7) // 8)
+        self.output = output
+
+        # Replay the previous cycle so every intersection is in the right
+        # phase for now_ms
+        self.position = 0
+        self.cycle_start = now_ms - t
+        self.tick(now_ms)
+
+    def mask(self, intersection):
+        """Current LED mask of one intersection"""
+        return self.state[intersection >> 1] >> ((intersection & 1) * 4) & 0xF
+
+    def tick(self, now_ms):
+        """Apply every phase change up to now_ms; returns ms until the next one"""
+        times = self.times
+        changes = self.changes
+        state = self.state
+        i = self.position
+        changed = False
+        while now_ms - (self.cycle_start + times[i]) >= 0:
+            change = changes[i]
+            intersection = change >> 8
+            shift = (intersection & 1) * 4
+            byte = intersection >> 1
+            state[byte] = state[byte] & ~(0xF << shift) | (change & 0xF) << shift
+            changed = True
+            i += 1
+            if i == len(times):
+                i = 0
+                self.cycle_start += self.cycle_ms
+        self.position = i
+        if changed:
+            self.output(state)
+        return self.cycle_start + times[i] - now_ms